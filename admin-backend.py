@@ -14,6 +14,10 @@ app.config.from_object(Config)
 CORS(app, origins=["http://localhost:3000"])  # React admin frontend
 jwt = JWTManager(app)
 
+# Return each request's pooled DB connection on teardown
+from models import Database
+app.teardown_appcontext(Database.close_request_connection)
+
 # Create upload directory
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
@@ -304,6 +308,7 @@ app.register_blueprint(public_bp, url_prefix='/api/v1')
 @app.route('/health', methods=['GET'])
 def health_check():
     from utils.response_formatter import success_response
+    from models import Database
     return success_response({
         'status': 'healthy',
         'service': 'E-commerce Admin API',
@@ -312,7 +317,9 @@ def health_check():
             'admin': '/admin/api/v1',
             'public': '/api/v1',
             'uploads': '/uploads'
-        }
+        },
+        'database_pool': Database.pool_stats(),
+        'database_replica_pool': Database.replica_pool_stats()
     }, 'API is running successfully')
 
 # API information endpoint
@@ -537,16 +544,20 @@ def missing_token_callback(error):
 
 @app.before_request
 def before_request():
-    """Log requests for debugging (optional)"""
-    pass
+    """Start per-request query instrumentation and this worker's snapshot scheduler"""
+    from db_instrumentation import start_request_stats
+    from snapshots import Snapshots
+    start_request_stats()
+    Snapshots.start(app)
 
 @app.after_request
 def after_request(response):
-    """Add security headers and CORS"""
+    """Add security headers, CORS and DB timing headers"""
+    from db_instrumentation import add_stats_headers
     response.headers['X-Content-Type-Options'] = 'nosniff'
     response.headers['X-Frame-Options'] = 'DENY'
     response.headers['X-XSS-Protection'] = '1; mode=block'
-    return response
+    return add_stats_headers(response)
 
 # ======================= WEBHOOK ENDPOINTS =======================
 
@@ -690,6 +701,10 @@ if __name__ == '__main__':
     print("   • GET  /api/v1/sitemap.xml - Public sitemap.xml")
     print("=" * 70)
     
+    # Warm the dashboard snapshots before the first admin arrives
+    from snapshots import Snapshots
+    Snapshots.start(app)
+    
     # Run the application
     app.run(
         debug=True, 
@@ -1,4 +1,4 @@
-from flask import Blueprint, request
+from flask import Blueprint, request, jsonify
 import json
 from datetime import datetime, timedelta
 from slugify import slugify
@@ -6,8 +6,9 @@ import re
 
 # Import our modules
 from models import Database, SiteConfig
+from page_counts import PageCount
 from utils import (admin_required, success_response, error_response, get_request_data, 
-                   save_image, ResponseFormatter)
+                   save_image, ResponseFormatter, Keyset, use_read_replica)
 
 # Create blueprint
 blog_bp = Blueprint('blog', __name__)
@@ -71,13 +72,9 @@ def get_blog_posts():
         
         sort_direction = 'ASC' if sort_order.lower() == 'asc' else 'DESC'
         
-        # Get total count
-        count_query = f"""
-        SELECT COUNT(*) as total FROM blog_posts bp 
-        LEFT JOIN admins a ON bp.author_id = a.id
-        WHERE {where_clause}
-        """
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        # Get total count (the filters are all on blog_posts)
+        count_mode = PageCount.mode()
+        total = PageCount.total("blog_posts bp", where_clause, params, count_mode)
         
         # Get blog posts with author info
         posts_query = f"""
@@ -90,34 +87,10 @@ def get_blog_posts():
         LIMIT %s OFFSET %s
         """
         params.extend([per_page, offset])
-        posts = Database.execute_query(posts_query, params, fetch=True)
+        posts = Database.execute_query(posts_query, params, fetch=True, decode='blog_posts')
         
-        # Parse JSON fields and add computed fields
+        # Add computed fields
         for post in posts:
-            # Parse categories and tags
-            if post.get('categories'):
-                try:
-                    post['categories'] = json.loads(post['categories'])
-                except:
-                    post['categories'] = []
-            else:
-                post['categories'] = []
-            
-            if post.get('tags'):
-                try:
-                    post['tags'] = json.loads(post['tags'])
-                except:
-                    post['tags'] = []
-            else:
-                post['tags'] = []
-            
-            # Parse meta fields
-            if post.get('meta_data'):
-                try:
-                    post['meta_data'] = json.loads(post['meta_data'])
-                except:
-                    post['meta_data'] = {}
-            
             # Add status labels
             if post['status'] == 'published' and post['published_at'] and post['published_at'] > datetime.now():
                 post['status_label'] = 'Scheduled'
@@ -133,7 +106,7 @@ def get_blog_posts():
             else:
                 post['reading_time'] = 1
         
-        return jsonify(ResponseFormatter.paginated(posts, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(posts, total, page, per_page, count=count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -248,32 +221,13 @@ def get_blog_post(post_id):
         WHERE bp.id = %s
         """
         
-        post_result = Database.execute_query(post_query, (post_id,), fetch=True)
+        post_result = Database.execute_query(post_query, (post_id,), fetch=True, decode='blog_posts')
         
         if not post_result:
             return error_response('Blog post not found', 404)
         
         post = post_result[0]
         
-        # Parse JSON fields
-        if post.get('categories'):
-            try:
-                post['categories'] = json.loads(post['categories'])
-            except:
-                post['categories'] = []
-        
-        if post.get('tags'):
-            try:
-                post['tags'] = json.loads(post['tags'])
-            except:
-                post['tags'] = []
-        
-        if post.get('meta_data'):
-            try:
-                post['meta_data'] = json.loads(post['meta_data'])
-            except:
-                post['meta_data'] = {}
-        
         # Add computed fields
         if post['content']:
             word_count = len(post['content'].split())
@@ -501,17 +455,12 @@ def get_blog_categories():
         categories = []
         posts = Database.execute_query(
             "SELECT categories FROM blog_posts WHERE status = 'published' AND categories IS NOT NULL",
-            fetch=True
+            fetch=True, decode='blog_posts'
         )
         category_counts = {}
         for post in posts:
-            if post['categories']:
-                try:
-                    post_categories = json.loads(post['categories'])
-                    for cat in post_categories:
-                        category_counts[cat] = category_counts.get(cat, 0) + 1
-                except:
-                    continue
+            for cat in post['categories']:
+                category_counts[cat] = category_counts.get(cat, 0) + 1
         
         categories = [
             {'category': cat, 'post_count': count}
@@ -531,17 +480,12 @@ def get_blog_tags():
         tags = []
         posts = Database.execute_query(
             "SELECT tags FROM blog_posts WHERE status = 'published' AND tags IS NOT NULL",
-            fetch=True
+            fetch=True, decode='blog_posts'
         )
         tag_counts = {}
         for post in posts:
-            if post['tags']:
-                try:
-                    post_tags = json.loads(post['tags'])
-                    for tag in post_tags:
-                        tag_counts[tag] = tag_counts.get(tag, 0) + 1
-                except:
-                    continue
+            for tag in post['tags']:
+                tag_counts[tag] = tag_counts.get(tag, 0) + 1
         
         tags = [
             {'tag': tag, 'post_count': count}
@@ -566,6 +510,7 @@ def get_blog_comments():
         search = request.args.get('search', '').strip()
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'desc')
+        cursor = request.args.get('cursor')
         
         offset = (page - 1) * per_page
         
@@ -591,20 +536,29 @@ def get_blog_comments():
         
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
-        # Validate sort columns
-        valid_sort_columns = ['author_name', 'created_at', 'post_title']
-        if sort_by not in valid_sort_columns:
+        # Validate sort columns (post_title comes from the joined post)
+        sort_columns = {'author_name': 'bc.author_name', 'created_at': 'bc.created_at', 'post_title': 'bp.title'}
+        if sort_by not in sort_columns:
             sort_by = 'created_at'
+        sort_column = sort_columns[sort_by]
         
         sort_direction = 'ASC' if sort_order.lower() == 'asc' else 'DESC'
         
-        # Get total count
-        count_query = f"""
-        SELECT COUNT(*) as total FROM blog_comments bc 
-        LEFT JOIN blog_posts bp ON bc.post_id = bp.id
-        WHERE {where_clause}
-        """
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        # Get total count (the filters are all on blog_comments)
+        count_mode = PageCount.mode()
+        total = PageCount.total("blog_comments bc", where_clause, params, count_mode)
+        
+        # A cursor seeks past the previous page's last (sort value, id) instead of OFFSET
+        if cursor:
+            try:
+                seek_sql, seek_params = Keyset.after(
+                    cursor, sort_by, sort_direction, sort_column, "bc.id", nullable=sort_by == 'post_title'
+                )
+            except ValueError as e:
+                return error_response(str(e), 400)
+            where_clause = f"{where_clause} AND {seek_sql}"
+            params.extend(seek_params)
+            offset = 0
         
         # Get comments with post info
         comments_query = f"""
@@ -613,11 +567,12 @@ def get_blog_comments():
         FROM blog_comments bc
         LEFT JOIN blog_posts bp ON bc.post_id = bp.id
         WHERE {where_clause}
-        ORDER BY bc.{sort_by} {sort_direction}
+        ORDER BY {sort_column} {sort_direction}, bc.id {sort_direction}
         LIMIT %s OFFSET %s
         """
-        params.extend([per_page, offset])
+        params.extend([per_page + 1, offset])
         comments = Database.execute_query(comments_query, params, fetch=True)
+        comments, next_cursor = Keyset.page(comments, per_page, sort_by, sort_direction)
         
         # Add status labels
         for comment in comments:
@@ -631,7 +586,7 @@ def get_blog_comments():
                 comment['status'] = 'pending'
                 comment['status_label'] = 'Pending'
         
-        return jsonify(ResponseFormatter.paginated(comments, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(comments, total, page, per_page, next_cursor, count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -766,6 +721,7 @@ def bulk_comment_action():
 
 @blog_bp.route('/blog/analytics/dashboard', methods=['GET'])
 @admin_required
+@use_read_replica
 def blog_analytics_dashboard():
     try:
         days = int(request.args.get('days', 30))
@@ -1017,8 +973,8 @@ def get_newsletter_subscribers():
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
         # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM blog_newsletter_subscribers WHERE {where_clause}"
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        count_mode = PageCount.mode()
+        total = PageCount.total("blog_newsletter_subscribers", where_clause, params, count_mode)
         
         # Get subscribers
         subscribers_query = f"""
@@ -1028,17 +984,11 @@ def get_newsletter_subscribers():
         LIMIT %s OFFSET %s
         """
         params.extend([per_page, offset])
-        subscribers = Database.execute_query(subscribers_query, params, fetch=True)
-        
-        # Parse preferences
-        for subscriber in subscribers:
-            if subscriber.get('preferences'):
-                try:
-                    subscriber['preferences'] = json.loads(subscriber['preferences'])
-                except:
-                    subscriber['preferences'] = {}
+        subscribers = Database.execute_query(
+            subscribers_query, params, fetch=True, decode='blog_newsletter_subscribers'
+        )
         
-        return jsonify(ResponseFormatter.paginated(subscribers, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(subscribers, total, page, per_page, count=count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -1183,8 +1133,8 @@ def search_blog_posts():
         where_clause = " AND ".join(where_conditions)
         
         # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM blog_posts bp WHERE {where_clause}"
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        count_mode = PageCount.mode()
+        total = PageCount.total("blog_posts bp", where_clause, params, count_mode)
         
         # Get search results
         search_query = f"""
@@ -1198,23 +1148,9 @@ def search_blog_posts():
         LIMIT %s OFFSET %s
         """
         params.extend([per_page, offset])
-        results = Database.execute_query(search_query, params, fetch=True)
-        
-        # Parse JSON fields
-        for post in results:
-            if post.get('categories'):
-                try:
-                    post['categories'] = json.loads(post['categories'])
-                except:
-                    post['categories'] = []
-            
-            if post.get('tags'):
-                try:
-                    post['tags'] = json.loads(post['tags'])
-                except:
-                    post['tags'] = []
+        results = Database.execute_query(search_query, params, fetch=True, decode='blog_posts')
         
-        return jsonify(ResponseFormatter.paginated(results, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(results, total, page, per_page, count=count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
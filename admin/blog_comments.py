@@ -1,11 +1,12 @@
-from flask import Blueprint, request
+from flask import Blueprint, request, jsonify
 import json
 from datetime import datetime
 
 # Import our modules
 from models import Database
+from page_counts import PageCount
 from utils import (admin_required, success_response, error_response, get_request_data, 
-                   ResponseFormatter, validate_email)
+                   ResponseFormatter, Keyset, validate_email)
 
 # Create blueprint for blog comments management
 blog_comments_bp = Blueprint('blog_comments', __name__)
@@ -23,6 +24,7 @@ def get_blog_comments():
         search = request.args.get('search', '').strip()
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'desc')
+        cursor = request.args.get('cursor')
         
         offset = (page - 1) * per_page
         
@@ -48,20 +50,29 @@ def get_blog_comments():
         
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
-        # Validate sort columns
-        valid_sort_columns = ['author_name', 'created_at', 'post_title']
-        if sort_by not in valid_sort_columns:
+        # Validate sort columns (post_title comes from the joined post)
+        sort_columns = {'author_name': 'bc.author_name', 'created_at': 'bc.created_at', 'post_title': 'bp.title'}
+        if sort_by not in sort_columns:
             sort_by = 'created_at'
+        sort_column = sort_columns[sort_by]
         
         sort_direction = 'ASC' if sort_order.lower() == 'asc' else 'DESC'
         
-        # Get total count
-        count_query = f"""
-        SELECT COUNT(*) as total FROM blog_comments bc 
-        LEFT JOIN blog_posts bp ON bc.post_id = bp.id
-        WHERE {where_clause}
-        """
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        # Get total count (the filters are all on blog_comments)
+        count_mode = PageCount.mode()
+        total = PageCount.total("blog_comments bc", where_clause, params, count_mode)
+        
+        # A cursor seeks past the previous page's last (sort value, id) instead of OFFSET
+        if cursor:
+            try:
+                seek_sql, seek_params = Keyset.after(
+                    cursor, sort_by, sort_direction, sort_column, "bc.id", nullable=sort_by == 'post_title'
+                )
+            except ValueError as e:
+                return error_response(str(e), 400)
+            where_clause = f"{where_clause} AND {seek_sql}"
+            params.extend(seek_params)
+            offset = 0
         
         # Get comments with post info
         comments_query = f"""
@@ -70,11 +81,12 @@ def get_blog_comments():
         FROM blog_comments bc
         LEFT JOIN blog_posts bp ON bc.post_id = bp.id
         WHERE {where_clause}
-        ORDER BY bc.{sort_by} {sort_direction}
+        ORDER BY {sort_column} {sort_direction}, bc.id {sort_direction}
         LIMIT %s OFFSET %s
         """
-        params.extend([per_page, offset])
+        params.extend([per_page + 1, offset])
         comments = Database.execute_query(comments_query, params, fetch=True)
+        comments, next_cursor = Keyset.page(comments, per_page, sort_by, sort_direction)
         
         # Add status labels and computed fields
         for comment in comments:
@@ -100,7 +112,7 @@ def get_blog_comments():
             else:
                 comment['content_preview'] = comment['content']
         
-        return jsonify(ResponseFormatter.paginated(comments, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(comments, total, page, per_page, next_cursor, count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -1,9 +1,10 @@
-from flask import Blueprint, request
+from flask import Blueprint, request, jsonify
 import json
 from datetime import datetime
 
 # Import our modules
 from models import Database, Category
+from page_counts import PageCount
 from utils import (admin_required, success_response, error_response, get_request_data, 
                    save_image, ResponseFormatter)
 
@@ -66,13 +67,11 @@ def get_categories():
             SELECT * FROM category_tree
             ORDER BY level, display_order, name
             """
-            categories = Database.execute_query(categories_query, params, fetch=True)
+            categories = Database.execute_query(categories_query, params, fetch=True, decode='categories')
         else:
             # Get total count for pagination
-            count_query = f"""
-            SELECT COUNT(*) as total FROM categories c WHERE {where_clause}
-            """
-            total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+            count_mode = PageCount.mode()
+            total = PageCount.total("categories c", where_clause, params, count_mode)
             
             # Get categories with product count
             offset = (page - 1) * per_page
@@ -88,28 +87,12 @@ def get_categories():
             LIMIT %s OFFSET %s
             """
             params.extend([per_page, offset])
-            categories = Database.execute_query(categories_query, params, fetch=True)
-        
-        # Parse JSON fields
-        for category in categories:
-            # Parse discount rules
-            if category.get('discount_rules'):
-                try:
-                    category['discount_rules'] = json.loads(category['discount_rules'])
-                except:
-                    category['discount_rules'] = {}
-            
-            # Parse page customization
-            if category.get('page_customization'):
-                try:
-                    category['page_customization'] = json.loads(category['page_customization'])
-                except:
-                    category['page_customization'] = {}
+            categories = Database.execute_query(categories_query, params, fetch=True, decode='categories')
         
         if include_children:
             return success_response(categories)
         else:
-            return jsonify(ResponseFormatter.paginated(categories, total, page, per_page))
+            return jsonify(ResponseFormatter.paginated(categories, total, page, per_page, count=count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -204,26 +187,13 @@ def get_category(category_id):
         WHERE c.id = %s
         """
         
-        category_result = Database.execute_query(category_query, (category_id,), fetch=True)
+        category_result = Database.execute_query(category_query, (category_id,), fetch=True, decode='categories')
         
         if not category_result:
             return error_response('Category not found', 404)
         
         category = category_result[0]
         
-        # Parse JSON fields
-        if category.get('discount_rules'):
-            try:
-                category['discount_rules'] = json.loads(category['discount_rules'])
-            except:
-                category['discount_rules'] = {}
-        
-        if category.get('page_customization'):
-            try:
-                category['page_customization'] = json.loads(category['page_customization'])
-            except:
-                category['page_customization'] = {}
-        
         # Get child categories
         children_query = """
         SELECT id, name, display_order, is_active,
@@ -579,15 +549,7 @@ def get_featured_categories():
         ORDER BY c.display_order, c.name
         """
         
-        featured_categories = Database.execute_query(featured_query, fetch=True)
-        
-        # Parse JSON fields
-        for category in featured_categories:
-            if category.get('discount_rules'):
-                try:
-                    category['discount_rules'] = json.loads(category['discount_rules'])
-                except:
-                    category['discount_rules'] = {}
+        featured_categories = Database.execute_query(featured_query, fetch=True, decode='categories')
         
         return success_response(featured_categories)
         
@@ -624,18 +586,14 @@ def toggle_featured_category(category_id):
 def get_category_discount_rules(category_id):
     try:
         category = Database.execute_query(
-            "SELECT discount_rules FROM categories WHERE id = %s", (category_id,), fetch=True
+            "SELECT discount_rules FROM categories WHERE id = %s", (category_id,), fetch=True,
+            decode='categories'
         )
         
         if not category:
             return error_response('Category not found', 404)
         
-        discount_rules = {}
-        if category[0]['discount_rules']:
-            try:
-                discount_rules = json.loads(category[0]['discount_rules'])
-            except:
-                discount_rules = {}
+        discount_rules = category[0]['discount_rules'] or {}
         
         return success_response(discount_rules)
         
@@ -671,18 +629,14 @@ def update_category_discount_rules(category_id):
 def get_category_page_customization(category_id):
     try:
         category = Database.execute_query(
-            "SELECT page_customization FROM categories WHERE id = %s", (category_id,), fetch=True
+            "SELECT page_customization FROM categories WHERE id = %s", (category_id,), fetch=True,
+            decode='categories'
         )
         
         if not category:
             return error_response('Category not found', 404)
         
-        page_customization = {}
-        if category[0]['page_customization']:
-            try:
-                page_customization = json.loads(category[0]['page_customization'])
-            except:
-                page_customization = {}
+        page_customization = category[0]['page_customization'] or {}
         
         return success_response(page_customization)
         
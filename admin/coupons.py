@@ -8,8 +8,10 @@ import uuid
 
 # Import our modules
 from models import Database, SiteConfig
+from page_counts import PageCount
+from response_cache import cached
 from utils import (admin_required, success_response, error_response, get_request_data, 
-                   ResponseFormatter)
+                   ResponseFormatter, Keyset)
 
 # Create blueprint
 coupons_bp = Blueprint('coupons', __name__)
@@ -27,6 +29,7 @@ def get_coupons():
         search = request.args.get('search', '').strip()
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'desc')
+        cursor = request.args.get('cursor')
         
         offset = (page - 1) * per_page
         
@@ -61,13 +64,30 @@ def get_coupons():
         
         sort_direction = 'ASC' if sort_order.lower() == 'asc' else 'DESC'
         
+        # type is an ENUM: order and seek on its position, not the label
+        enum_sort = sort_by == 'type'
+        sort_column = Keyset.enum_position("c.type") if enum_sort else f"c.{sort_by}"
+        
         # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM coupons c WHERE {where_clause}"
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        count_mode = PageCount.mode()
+        total = PageCount.total("coupons c", where_clause, params, count_mode)
+        
+        # A cursor seeks past the previous page's last (sort value, id) instead of OFFSET
+        if cursor:
+            try:
+                seek_sql, seek_params = Keyset.after(
+                    cursor, sort_by, sort_direction, sort_column, "c.id",
+                    nullable=sort_by not in ('code', 'name', 'type', 'value')
+                )
+            except ValueError as e:
+                return error_response(str(e), 400)
+            where_clause = f"{where_clause} AND {seek_sql}"
+            params.extend(seek_params)
+            offset = 0
         
         # Get coupons with usage stats
         coupons_query = f"""
-        SELECT c.*, a.name as created_by_name,
+        SELECT c.*, a.name as created_by_name,{f' {sort_column} as keyset_position,' if enum_sort else ''}
                CASE 
                    WHEN c.valid_until IS NOT NULL AND c.valid_until <= NOW() THEN 'expired'
                    WHEN c.valid_from > NOW() THEN 'upcoming'
@@ -81,30 +101,18 @@ def get_coupons():
         FROM coupons c
         LEFT JOIN admins a ON c.created_by = a.id
         WHERE {where_clause}
-        ORDER BY c.{sort_by} {sort_direction}
+        ORDER BY {sort_column} {sort_direction}, c.id {sort_direction}
         LIMIT %s OFFSET %s
         """
-        params.extend([per_page, offset])
-        coupons = Database.execute_query(coupons_query, params, fetch=True)
+        params.extend([per_page + 1, offset])
+        coupons = Database.execute_query(coupons_query, params, fetch=True, decode='coupons')
+        coupons, next_cursor = Keyset.page(
+            coupons, per_page, sort_by, sort_direction,
+            sort_key='keyset_position' if enum_sort else None, strip_sort_key=enum_sort
+        )
         
-        # Add computed fields and parse JSON
+        # Add computed fields
         for coupon in coupons:
-            # Convert Decimal to float
-            coupon['value'] = float(coupon['value'])
-            if coupon['max_discount_amount']:
-                coupon['max_discount_amount'] = float(coupon['max_discount_amount'])
-            if coupon['minimum_amount']:
-                coupon['minimum_amount'] = float(coupon['minimum_amount'])
-            if coupon['maximum_amount']:
-                coupon['maximum_amount'] = float(coupon['maximum_amount'])
-            
-            # Parse buy_x_get_y_config
-            if coupon.get('buy_x_get_y_config'):
-                try:
-                    coupon['buy_x_get_y_config'] = json.loads(coupon['buy_x_get_y_config'])
-                except:
-                    coupon['buy_x_get_y_config'] = {}
-            
             # Add usage info
             if coupon['usage_limit']:
                 coupon['remaining_uses'] = max(0, coupon['usage_limit'] - coupon['used_count'])
@@ -123,7 +131,7 @@ def get_coupons():
             else:
                 coupon['expires_in_days'] = 0
         
-        return jsonify(ResponseFormatter.paginated(coupons, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(coupons, total, page, per_page, next_cursor, count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -267,29 +275,13 @@ def get_coupon(coupon_id):
         WHERE c.id = %s
         """
         
-        coupon_result = Database.execute_query(coupon_query, (coupon_id,), fetch=True)
+        coupon_result = Database.execute_query(coupon_query, (coupon_id,), fetch=True, decode='coupons')
         
         if not coupon_result:
             return error_response('Coupon not found', 404)
         
         coupon = coupon_result[0]
         
-        # Convert Decimal to float
-        coupon['value'] = float(coupon['value'])
-        if coupon['max_discount_amount']:
-            coupon['max_discount_amount'] = float(coupon['max_discount_amount'])
-        if coupon['minimum_amount']:
-            coupon['minimum_amount'] = float(coupon['minimum_amount'])
-        if coupon['maximum_amount']:
-            coupon['maximum_amount'] = float(coupon['maximum_amount'])
-        
-        # Parse JSON fields
-        if coupon.get('buy_x_get_y_config'):
-            try:
-                coupon['buy_x_get_y_config'] = json.loads(coupon['buy_x_get_y_config'])
-            except:
-                coupon['buy_x_get_y_config'] = {}
-        
         # Get usage statistics
         usage_stats = Database.execute_query(
             """SELECT 
@@ -299,15 +291,9 @@ def get_coupon(coupon_id):
                    AVG(discount_amount) as avg_discount_amount,
                    MAX(usage_date) as last_used_date
                FROM coupon_usage WHERE coupon_id = %s""",
-            (coupon_id,), fetch=True
+            (coupon_id,), fetch=True, decode=True
         )[0]
         
-        # Convert decimals
-        if usage_stats['total_discount_given']:
-            usage_stats['total_discount_given'] = float(usage_stats['total_discount_given'])
-        if usage_stats['avg_discount_amount']:
-            usage_stats['avg_discount_amount'] = float(usage_stats['avg_discount_amount'])
-        
         coupon['usage_statistics'] = usage_stats
         
         return success_response(coupon)
@@ -449,7 +435,7 @@ def validate_coupon_code(code, customer_id=None, cart_items=None):
         coupon = Database.execute_query(
             """SELECT * FROM coupons WHERE code = %s AND is_active = 1 
                AND valid_from <= NOW() AND (valid_until IS NULL OR valid_until > NOW())""",
-            (code,), fetch=True
+            (code,), fetch=True, prepared=True
         )
         
         if not coupon:
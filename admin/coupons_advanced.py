@@ -28,8 +28,8 @@ def get_flash_sales():
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
         # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM flash_sales fs WHERE {where_clause}"
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        count_mode = PageCount.mode()
+        total = PageCount.total("flash_sales fs", where_clause, params, count_mode)
         
         # Get flash sales
         sales_query = f"""
@@ -46,15 +46,9 @@ def get_flash_sales():
         LIMIT %s OFFSET %s
         """
         params.extend([per_page, offset])
-        flash_sales = Database.execute_query(sales_query, params, fetch=True)
+        flash_sales = Database.execute_query(sales_query, params, fetch=True, decode='flash_sales')
         
-        # Convert decimals and add computed fields
-        for sale in flash_sales:
-            sale['discount_value'] = float(sale['discount_value'])
-            if sale['max_discount_amount']:
-                sale['max_discount_amount'] = float(sale['max_discount_amount'])
-        
-        return jsonify(ResponseFormatter.paginated(flash_sales, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(flash_sales, total, page, per_page, count=count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -248,13 +242,7 @@ def coupon_analytics_dashboard():
         FROM coupon_usage
         WHERE usage_date >= DATE_SUB(NOW(), INTERVAL %s DAY)
         """
-        discount_stats = Database.execute_query(discount_stats_query, (days,), fetch=True)[0]
-        
-        # Convert decimals
-        if discount_stats['total_discount_given']:
-            discount_stats['total_discount_given'] = float(discount_stats['total_discount_given'])
-        if discount_stats['avg_discount_amount']:
-            discount_stats['avg_discount_amount'] = float(discount_stats['avg_discount_amount'])
+        discount_stats = Database.execute_query(discount_stats_query, (days,), fetch=True, decode=True)[0]
         
         # Top performing coupons
         top_coupons_query = """
@@ -269,12 +257,7 @@ def coupon_analytics_dashboard():
         ORDER BY usage_count DESC
         LIMIT 10
         """
-        top_coupons = Database.execute_query(top_coupons_query, (days,), fetch=True)
-        
-        # Convert decimals in top coupons
-        for coupon in top_coupons:
-            if coupon['total_discount']:
-                coupon['total_discount'] = float(coupon['total_discount'])
+        top_coupons = Database.execute_query(top_coupons_query, (days,), fetch=True, decode=True)
         
         # Daily usage trends
         trends_query = """
@@ -286,11 +269,7 @@ def coupon_analytics_dashboard():
         GROUP BY DATE(usage_date)
         ORDER BY date
         """
-        usage_trends = Database.execute_query(trends_query, (days,), fetch=True)
-        
-        # Convert decimals in trends
-        for trend in usage_trends:
-            trend['total_discount'] = float(trend['total_discount'])
+        usage_trends = Database.execute_query(trends_query, (days,), fetch=True, decode=True)
         
         return success_response({
             'days': days,
@@ -369,9 +348,11 @@ def bulk_generate_coupons():
             return error_response('Count must be between 1 and 100', 400)
         
         current_admin = get_jwt_identity()
-        created_coupons = []
         
-        # Generate coupons
+        # Generate candidate codes, skipping repeats within the batch
+        codes = []
+        names = []
+        seen = set()
         for i in range(count):
             code = generate_coupon_code(
                 length=int(data.get('code_length', 8)),
@@ -380,18 +361,34 @@ def bulk_generate_coupons():
                 code_type=data.get('code_type', 'random')
             )
             
-            # Check for duplicate
-            existing = Database.execute_query(
-                "SELECT COUNT(*) as count FROM coupons WHERE code = %s",
-                (code,), fetch=True
-            )[0]['count']
-            
-            if existing > 0:
+            if code in seen:
                 continue  # Skip duplicate
             
-            name = data['name_template'].replace('{counter}', str(i + 1))
+            seen.add(code)
+            codes.append(code)
+            names.append(data['name_template'].replace('{counter}', str(i + 1)))
+        
+        valid_from = datetime.now()
+        valid_until = None
+        if data.get('valid_days'):
+            valid_until = valid_from + timedelta(days=int(data['valid_days']))
+        
+        # All coupons are inserted in one transaction
+        with Database.transaction():
+            # Check for duplicates against existing coupons in one query
+            code_placeholders = ','.join(['%s'] * len(codes))
+            existing_codes = {
+                row['code'] for row in Database.execute_query(
+                    f"SELECT code FROM coupons WHERE code IN ({code_placeholders})",
+                    codes, fetch=True
+                )
+            }
             
-            # Create coupon
+            new_coupons = [
+                (code, name) for code, name in zip(codes, names) if code not in existing_codes
+            ]
+            
+            # Create coupons
             coupon_query = """
             INSERT INTO coupons (code, name, description, type, value, minimum_amount,
                                usage_limit_per_customer, valid_from, valid_until,
@@ -399,24 +396,20 @@ def bulk_generate_coupons():
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             """
             
-            valid_from = datetime.now()
-            valid_until = None
-            if data.get('valid_days'):
-                valid_until = valid_from + timedelta(days=int(data['valid_days']))
-            
-            coupon_id = Database.execute_query(coupon_query, (
-                code, name, data.get('description', ''), data['type'],
-                float(data['value']), float(data.get('minimum_amount', 0)),
-                int(data.get('usage_limit_per_customer', 1)), valid_from, valid_until,
-                data.get('customer_eligibility', 'all'), True,
-                current_admin['id'], datetime.now()
-            ))
-            
-            created_coupons.append({
-                'id': coupon_id,
-                'code': code,
-                'name': name
-            })
+            created_at = datetime.now()
+            coupon_ids = Database.execute_many(coupon_query, [
+                (code, name, data.get('description', ''), data['type'],
+                 float(data['value']), float(data.get('minimum_amount', 0)),
+                 int(data.get('usage_limit_per_customer', 1)), valid_from, valid_until,
+                 data.get('customer_eligibility', 'all'), True,
+                 current_admin['id'], created_at)
+                for code, name in new_coupons
+            ], return_ids=True)
+        
+        created_coupons = [
+            {'id': coupon_id, 'code': code, 'name': name}
+            for coupon_id, (code, name) in zip(coupon_ids, new_coupons)
+        ]
         
         return success_response({
             'created_count': len(created_coupons),
@@ -441,42 +434,39 @@ def get_applicable_coupons_for_customer(customer_id):
         """
         coupons = Database.execute_query(coupons_query, fetch=True)
         
+        # Everything the checks below need about this customer, fetched once rather than per coupon
+        paid_orders = Database.execute_query(
+            "SELECT COUNT(*) as count FROM orders WHERE customer_id = %s AND payment_status = 'paid'",
+            (customer_id,), fetch=True
+        )[0]['count']
+        allowed_coupons = {row['coupon_id'] for row in Database.execute_query(
+            "SELECT coupon_id FROM coupon_customers WHERE customer_id = %s",
+            (customer_id,), fetch=True
+        )}
+        usage_counts = {row['coupon_id']: row['count'] for row in Database.execute_query(
+            "SELECT coupon_id, COUNT(*) as count FROM coupon_usage WHERE customer_id = %s GROUP BY coupon_id",
+            (customer_id,), fetch=True
+        )}
+        
         applicable_coupons = []
         
         for coupon in coupons:
             # Check customer eligibility
             if coupon['customer_eligibility'] == 'new_customers':
-                order_count = Database.execute_query(
-                    "SELECT COUNT(*) as count FROM orders WHERE customer_id = %s AND payment_status = 'paid'",
-                    (customer_id,), fetch=True
-                )[0]['count']
-                if order_count > 0:
+                if paid_orders > 0:
                     continue
             
             elif coupon['customer_eligibility'] == 'existing_customers':
-                order_count = Database.execute_query(
-                    "SELECT COUNT(*) as count FROM orders WHERE customer_id = %s AND payment_status = 'paid'",
-                    (customer_id,), fetch=True
-                )[0]['count']
-                if order_count == 0:
+                if paid_orders == 0:
                     continue
             
             elif coupon['customer_eligibility'] == 'specific_customers':
-                allowed = Database.execute_query(
-                    "SELECT COUNT(*) as count FROM coupon_customers WHERE coupon_id = %s AND customer_id = %s",
-                    (coupon['id'], customer_id), fetch=True
-                )[0]['count']
-                if allowed == 0:
+                if coupon['id'] not in allowed_coupons:
                     continue
             
             # Check usage limit per customer
             if coupon['usage_limit_per_customer']:
-                customer_usage = Database.execute_query(
-                    "SELECT COUNT(*) as count FROM coupon_usage WHERE coupon_id = %s AND customer_id = %s",
-                    (coupon['id'], customer_id), fetch=True
-                )[0]['count']
-                
-                if customer_usage >= coupon['usage_limit_per_customer']:
+                if usage_counts.get(coupon['id'], 0) >= coupon['usage_limit_per_customer']:
                     continue
             
             applicable_coupons.append(coupon)
@@ -490,6 +480,7 @@ def get_applicable_coupons_for_customer(customer_id):
 
 @coupons_bp.route('/coupons/stats', methods=['GET'])
 @admin_required
+@cached(ttl=120)
 def get_coupons_stats():
     try:
         stats_query = """
@@ -1,4 +1,4 @@
-from flask import Blueprint, request
+from flask import Blueprint, request, jsonify
 import json
 from datetime import datetime, timedelta
 import uuid
@@ -6,8 +6,14 @@ import secrets
 
 # Import our modules
 from models import Database, Customer
+from page_counts import PageCount
+from customer_metrics import CustomerMetrics, SEGMENTS
+from order_search import OrderSearch
+import live_counters
+from response_cache import cached
+from snapshots import snapshot
 from utils import (admin_required, success_response, error_response, get_request_data, 
-                   ResponseFormatter, validate_email, validate_password)
+                   ResponseFormatter, Keyset, validate_email, validate_password, use_read_replica)
 
 # Create blueprint
 customers_bp = Blueprint('customers', __name__)
@@ -26,6 +32,7 @@ def get_customers():
         registration_date = request.args.get('registration_date')
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'desc')
+        cursor = request.args.get('cursor')
         
         offset = (page - 1) * per_page
         
@@ -52,6 +59,11 @@ def get_customers():
             where_conditions.append("DATE(c.created_at) >= %s")
             params.append(registration_date)
         
+        if segment in SEGMENTS:
+            segment_condition, segment_params = CustomerMetrics.segment_filter(segment)
+            where_conditions.append(segment_condition)
+            params.extend(segment_params)
+        
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
         # Validate sort columns
@@ -61,56 +73,43 @@ def get_customers():
         
         sort_direction = 'ASC' if sort_order.lower() == 'asc' else 'DESC'
         
-        # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM customers c WHERE {where_clause}"
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        # Get total count (customer_metrics only needs joining for the segment filter)
+        count_mode = PageCount.mode()
+        count_from = "customers c LEFT JOIN customer_metrics m ON m.customer_id = c.id" if segment in SEGMENTS else "customers c"
+        total = PageCount.total(count_from, where_clause, params, count_mode)
+        
+        # A cursor seeks past the previous page's last (sort value, id) instead of OFFSET
+        if cursor:
+            try:
+                seek_sql, seek_params = Keyset.after(
+                    cursor, sort_by, sort_direction, f"c.{sort_by}", "c.id", nullable=sort_by == 'created_at'
+                )
+            except ValueError as e:
+                return error_response(str(e), 400)
+            where_clause = f"{where_clause} AND {seek_sql}"
+            params.extend(seek_params)
+            offset = 0
         
         # Get customers with analytics
         customers_query = f"""
         SELECT c.*,
-               COALESCE(order_stats.order_count, 0) as order_count,
-               COALESCE(order_stats.total_spent, 0) as total_spent,
-               COALESCE(order_stats.avg_order_value, 0) as avg_order_value,
-               order_stats.last_order_date,
-               CASE 
-                   WHEN order_stats.total_spent >= 50000 THEN 'VIP'
-                   WHEN order_stats.total_spent >= 10000 THEN 'regular'
-                   ELSE 'new'
-               END as segment
+               COALESCE(m.order_count, 0) as order_count,
+               COALESCE(m.total_spent, 0) as total_spent,
+               COALESCE(m.avg_order_value, 0) as avg_order_value,
+               m.last_order_date,
+               COALESCE(m.segment, 'new') as segment
         FROM customers c
-        LEFT JOIN (
-            SELECT customer_id,
-                   COUNT(*) as order_count,
-                   SUM(total_amount) as total_spent,
-                   AVG(total_amount) as avg_order_value,
-                   MAX(created_at) as last_order_date
-            FROM orders
-            WHERE payment_status = 'paid'
-            GROUP BY customer_id
-        ) order_stats ON c.id = order_stats.customer_id
+        LEFT JOIN customer_metrics m ON m.customer_id = c.id
         WHERE {where_clause}
         """
         
-        # Add segment filtering if specified
-        if segment:
-            if segment == 'VIP':
-                customers_query += " HAVING segment = 'VIP'"
-            elif segment == 'regular':
-                customers_query += " HAVING segment = 'regular'"
-            elif segment == 'new':
-                customers_query += " HAVING segment = 'new'"
-        
-        customers_query += f" ORDER BY c.{sort_by} {sort_direction} LIMIT %s OFFSET %s"
-        params.extend([per_page, offset])
+        customers_query += f" ORDER BY c.{sort_by} {sort_direction}, c.id {sort_direction} LIMIT %s OFFSET %s"
+        params.extend([per_page + 1, offset])
         
-        customers = Database.execute_query(customers_query, params, fetch=True)
+        customers = Database.execute_query(customers_query, params, fetch=True, decode=True)
+        customers, next_cursor = Keyset.page(customers, per_page, sort_by, sort_direction)
         
-        # Convert decimal values to float
-        for customer in customers:
-            customer['total_spent'] = float(customer['total_spent']) if customer['total_spent'] else 0
-            customer['avg_order_value'] = float(customer['avg_order_value']) if customer['avg_order_value'] else 0
-        
-        return jsonify(ResponseFormatter.paginated(customers, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(customers, total, page, per_page, next_cursor, count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -122,32 +121,18 @@ def get_customer(customer_id):
         # Get customer details with analytics
         customer_query = """
         SELECT c.*,
-               COALESCE(order_stats.order_count, 0) as order_count,
-               COALESCE(order_stats.total_spent, 0) as total_spent,
-               COALESCE(order_stats.avg_order_value, 0) as avg_order_value,
-               order_stats.last_order_date,
-               order_stats.first_order_date,
-               CASE 
-                   WHEN order_stats.total_spent >= 50000 THEN 'VIP'
-                   WHEN order_stats.total_spent >= 10000 THEN 'regular'
-                   ELSE 'new'
-               END as segment
+               COALESCE(m.order_count, 0) as order_count,
+               COALESCE(m.total_spent, 0) as total_spent,
+               COALESCE(m.avg_order_value, 0) as avg_order_value,
+               m.last_order_date,
+               m.first_order_date,
+               COALESCE(m.segment, 'new') as segment
         FROM customers c
-        LEFT JOIN (
-            SELECT customer_id,
-                   COUNT(*) as order_count,
-                   SUM(total_amount) as total_spent,
-                   AVG(total_amount) as avg_order_value,
-                   MAX(created_at) as last_order_date,
-                   MIN(created_at) as first_order_date
-            FROM orders
-            WHERE payment_status = 'paid'
-            GROUP BY customer_id
-        ) order_stats ON c.id = order_stats.customer_id
+        LEFT JOIN customer_metrics m ON m.customer_id = c.id
         WHERE c.id = %s
         """
         
-        customer_result = Database.execute_query(customer_query, (customer_id,), fetch=True)
+        customer_result = Database.execute_query(customer_query, (customer_id,), fetch=True, decode=True)
         
         if not customer_result:
             return error_response('Customer not found', 404)
@@ -170,14 +155,7 @@ def get_customer(customer_id):
         ORDER BY created_at DESC 
         LIMIT 10
         """
-        recent_orders = Database.execute_query(orders_query, (customer_id,), fetch=True)
-        
-        # Convert decimal values to float
-        customer['total_spent'] = float(customer['total_spent']) if customer['total_spent'] else 0
-        customer['avg_order_value'] = float(customer['avg_order_value']) if customer['avg_order_value'] else 0
-        
-        for order in recent_orders:
-            order['total_amount'] = float(order['total_amount'])
+        recent_orders = Database.execute_query(orders_query, (customer_id,), fetch=True, decode='orders')
         
         customer['addresses'] = addresses
         customer['recent_orders'] = recent_orders
@@ -234,6 +212,8 @@ def create_customer():
                 (customer_id,)
             )
         
+        live_counters.customer_created()
+        
         return success_response({
             'id': customer_id,
             'email': email,
@@ -302,7 +282,12 @@ def update_customer(customer_id):
         params.append(customer_id)
         
         query = f"UPDATE customers SET {', '.join(update_fields)} WHERE id = %s"
-        Database.execute_query(query, params)
+        with Database.transaction():
+            Database.execute_query(query, params)
+            
+            # Orders are searchable by the customer's contact details
+            if any(field in data for field in ('name', 'email', 'phone')):
+                OrderSearch.index_customers([customer_id])
         
         return success_response(message='Customer updated successfully')
         
@@ -415,21 +400,12 @@ def get_customer_segments():
     try:
         segments_query = """
         SELECT 
-            CASE 
-                WHEN COALESCE(order_stats.total_spent, 0) >= 50000 THEN 'VIP'
-                WHEN COALESCE(order_stats.total_spent, 0) >= 10000 THEN 'regular'
-                ELSE 'new'
-            END as segment,
+            COALESCE(m.segment, 'new') as segment,
             COUNT(*) as customer_count,
-            AVG(COALESCE(order_stats.total_spent, 0)) as avg_spent,
-            SUM(COALESCE(order_stats.total_spent, 0)) as total_revenue
+            AVG(COALESCE(m.total_spent, 0)) as avg_spent,
+            SUM(COALESCE(m.total_spent, 0)) as total_revenue
         FROM customers c
-        LEFT JOIN (
-            SELECT customer_id, SUM(total_amount) as total_spent
-            FROM orders
-            WHERE payment_status = 'paid'
-            GROUP BY customer_id
-        ) order_stats ON c.id = order_stats.customer_id
+        LEFT JOIN customer_metrics m ON m.customer_id = c.id
         WHERE c.is_active = 1
         GROUP BY segment
         ORDER BY 
@@ -501,6 +477,8 @@ def bulk_update_customers():
 
 @customers_bp.route('/customers/analytics/summary', methods=['GET'])
 @admin_required
+@snapshot()
+@use_read_replica
 def get_customers_analytics():
     try:
         days = int(request.args.get('days', 30))
@@ -518,18 +496,10 @@ def get_customers_analytics():
         # Customer segments summary
         segments_summary_query = """
         SELECT 
-            CASE 
-                WHEN COALESCE(order_stats.total_spent, 0) >= 50000 THEN 'VIP'
-                WHEN COALESCE(order_stats.total_spent, 0) >= 10000 THEN 'regular'
-                ELSE 'new'
-            END as segment,
+            COALESCE(m.segment, 'new') as segment,
             COUNT(*) as count
         FROM customers c
-        LEFT JOIN (
-            SELECT customer_id, SUM(total_amount) as total_spent
-            FROM orders WHERE payment_status = 'paid'
-            GROUP BY customer_id
-        ) order_stats ON c.id = order_stats.customer_id
+        LEFT JOIN customer_metrics m ON m.customer_id = c.id
         WHERE c.is_active = 1
         GROUP BY segment
         """
@@ -560,6 +530,7 @@ def get_customers_analytics():
 
 @customers_bp.route('/customers/stats', methods=['GET'])
 @admin_required
+@cached(ttl=120)
 def get_customers_stats():
     try:
         stats_query = """
@@ -577,14 +548,10 @@ def get_customers_stats():
         # Get average customer metrics
         avg_metrics_query = """
         SELECT 
-            AVG(COALESCE(order_stats.order_count, 0)) as avg_orders_per_customer,
-            AVG(COALESCE(order_stats.total_spent, 0)) as avg_spent_per_customer
+            AVG(COALESCE(m.order_count, 0)) as avg_orders_per_customer,
+            AVG(COALESCE(m.total_spent, 0)) as avg_spent_per_customer
         FROM customers c
-        LEFT JOIN (
-            SELECT customer_id, COUNT(*) as order_count, SUM(total_amount) as total_spent
-            FROM orders WHERE payment_status = 'paid'
-            GROUP BY customer_id
-        ) order_stats ON c.id = order_stats.customer_id
+        LEFT JOIN customer_metrics m ON m.customer_id = c.id
         WHERE c.is_active = 1
         """
         
@@ -1,8 +1,18 @@
-from flask import Blueprint, request
+from flask import Blueprint, Response, request
 from datetime import datetime, timedelta
 
 # Import our modules
 from models import Database
+from db_async import AsyncDatabase
+from aggregates import ConditionalAggregate, time_windows
+from sales_rollup import SalesRollup, window_start
+from leaderboards import Leaderboards, PRODUCTS_BY_UNITS, PRODUCTS_BY_REVENUE
+from returns_analytics import ReturnAnalytics
+from revenue_series import RevenueSeries, site_timezone
+from response_cache import cached
+from snapshots import snapshot
+from live_counters import LiveCounters
+from stock_index import DEFAULT_THRESHOLD
 from utils import admin_required, success_response, error_response
 
 # Create blueprint
@@ -12,74 +22,55 @@ dashboard_bp = Blueprint('dashboard', __name__)
 
 @dashboard_bp.route('/dashboard/stats', methods=['GET'])
 @admin_required
-def dashboard_stats():
+@cached(ttl=30)
+@snapshot()
+async def dashboard_stats():
     try:
-        today = datetime.now().date()
-        
-        # Real-time order count
-        today_orders_query = "SELECT COUNT(*) as count FROM orders WHERE DATE(created_at) = %s"
-        today_orders = Database.execute_query(today_orders_query, (today,), fetch=True)[0]['count']
-        
-        week_orders_query = "SELECT COUNT(*) as count FROM orders WHERE created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)"
-        week_orders = Database.execute_query(week_orders_query, fetch=True)[0]['count']
-        
-        month_orders_query = "SELECT COUNT(*) as count FROM orders WHERE created_at >= DATE_SUB(NOW(), INTERVAL 30 DAY)"
-        month_orders = Database.execute_query(month_orders_query, fetch=True)[0]['count']
-        
-        # Total revenue analytics
-        today_revenue_query = "SELECT COALESCE(SUM(total_amount), 0) as revenue FROM orders WHERE DATE(created_at) = %s AND payment_status = 'paid'"
-        today_revenue = Database.execute_query(today_revenue_query, (today,), fetch=True)[0]['revenue']
-        
-        week_revenue_query = "SELECT COALESCE(SUM(total_amount), 0) as revenue FROM orders WHERE created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY) AND payment_status = 'paid'"
-        week_revenue = Database.execute_query(week_revenue_query, fetch=True)[0]['revenue']
-        
-        month_revenue_query = "SELECT COALESCE(SUM(total_amount), 0) as revenue FROM orders WHERE created_at >= DATE_SUB(NOW(), INTERVAL 30 DAY) AND payment_status = 'paid'"
-        month_revenue = Database.execute_query(month_revenue_query, fetch=True)[0]['revenue']
-        
-        # Customer count and new registrations
-        total_customers_query = "SELECT COUNT(*) as count FROM customers WHERE is_active = 1"
-        total_customers = Database.execute_query(total_customers_query, fetch=True)[0]['count']
-        
-        new_customers_today_query = "SELECT COUNT(*) as count FROM customers WHERE DATE(created_at) = %s"
-        new_customers_today = Database.execute_query(new_customers_today_query, (today,), fetch=True)[0]['count']
-        
-        new_customers_week_query = "SELECT COUNT(*) as count FROM customers WHERE created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)"
-        new_customers_week = Database.execute_query(new_customers_week_query, fetch=True)[0]['count']
-        
-        new_customers_month_query = "SELECT COUNT(*) as count FROM customers WHERE created_at >= DATE_SUB(NOW(), INTERVAL 30 DAY)"
-        new_customers_month = Database.execute_query(new_customers_month_query, fetch=True)[0]['count']
-        
-        # Product inventory status
-        total_products_query = "SELECT COUNT(*) as count FROM products WHERE status = 'active'"
-        total_products = Database.execute_query(total_products_query, fetch=True)[0]['count']
-        
-        low_stock_query = "SELECT COUNT(*) as count FROM products WHERE stock_quantity <= 10 AND status = 'active'"
-        low_stock_count = Database.execute_query(low_stock_query, fetch=True)[0]['count']
-        
-        out_of_stock_query = "SELECT COUNT(*) as count FROM products WHERE stock_quantity = 0 AND status = 'active'"
-        out_of_stock_count = Database.execute_query(out_of_stock_query, fetch=True)[0]['count']
+        windows = time_windows()
+        
+        # One conditional-aggregate scan per table, bounded by the widest window
+        orders = ConditionalAggregate('orders').where('created_at >= %s', (windows['month'],))
+        for name, since in windows.items():
+            orders.count(f'orders_{name}', 'created_at >= %s', (since,))
+        for name, since in windows.items():
+            orders.sum(f'revenue_{name}', 'total_amount', "created_at >= %s AND payment_status = 'paid'", (since,))
+        
+        customers = ConditionalAggregate('customers').count('total', 'is_active = 1')
+        for name, since in windows.items():
+            customers.count(f'new_{name}', 'created_at >= %s', (since,))
+        
+        # Low-stock counts come from the product_low_stock index in the same statement
+        products = (ConditionalAggregate('products').where("status = 'active'")
+                    .count('total_products')
+                    .scalar('low_stock', 'SELECT COUNT(*) FROM product_low_stock')
+                    .scalar('out_of_stock', 'SELECT COUNT(*) FROM product_low_stock WHERE stock_quantity = 0'))
+        
+        order_stats, customer_stats, product_stats = await AsyncDatabase.fetch_all(
+            orders.query(), customers.query(), products.query(), decode=True
+        )
+        order_stats, customer_stats, product_stats = order_stats[0], customer_stats[0], product_stats[0]
         
         return success_response({
             'orders': {
-                'today': today_orders,
-                'week': week_orders,
-                'month': month_orders
+                'today': order_stats['orders_today'],
+                'week': order_stats['orders_week'],
+                'month': order_stats['orders_month']
             },
             'revenue': {
-                'today': float(today_revenue),
-                'week': float(week_revenue),
-                'month': float(month_revenue)
+                'today': order_stats['revenue_today'],
+                'week': order_stats['revenue_week'],
+                'month': order_stats['revenue_month']
             },
             'customers': {
-                'total': total_customers,
-                'new_today': new_customers_today,
-                'new_week': new_customers_week,
-                'new_month': new_customers_month
+                'total': customer_stats['total'],
+                'new_today': customer_stats['new_today'],
+                'new_week': customer_stats['new_week'],
+                'new_month': customer_stats['new_month']
             },
             'inventory': {
-                'total_products': total_products,
-                'low_stock': low_stock_count,
-                'out_of_stock': out_of_stock_count
+                'total_products': product_stats['total_products'],
+                'low_stock': product_stats['low_stock'],
+                'out_of_stock': product_stats['out_of_stock']
             }
         })
         
@@ -88,6 +79,8 @@ def dashboard_stats():
 
 @dashboard_bp.route('/dashboard/revenue-analytics', methods=['GET'])
 @admin_required
+@cached(ttl=300)
+@snapshot()
 def revenue_analytics():
     try:
         # Get date range from query params
@@ -102,34 +95,31 @@ def revenue_analytics():
         
         if period == 'daily':
             revenue_query = """
-            SELECT DATE(created_at) as date, COALESCE(SUM(total_amount), 0) as revenue
-            FROM orders 
-            WHERE DATE(created_at) BETWEEN %s AND %s AND payment_status = 'paid'
-            GROUP BY DATE(created_at)
+            SELECT sales_date as date, COALESCE(SUM(total_amount), 0) as revenue
+            FROM sales_daily_rollup 
+            WHERE sales_date BETWEEN %s AND %s AND payment_status = 'paid'
+            GROUP BY sales_date
             ORDER BY date
             """
         elif period == 'weekly':
             revenue_query = """
-            SELECT YEARWEEK(created_at, 1) as week, COALESCE(SUM(total_amount), 0) as revenue
-            FROM orders 
-            WHERE DATE(created_at) BETWEEN %s AND %s AND payment_status = 'paid'
-            GROUP BY YEARWEEK(created_at, 1)
+            SELECT YEARWEEK(sales_date, 1) as week, COALESCE(SUM(total_amount), 0) as revenue
+            FROM sales_daily_rollup 
+            WHERE sales_date BETWEEN %s AND %s AND payment_status = 'paid'
+            GROUP BY YEARWEEK(sales_date, 1)
             ORDER BY week
             """
         else:  # monthly
             revenue_query = """
-            SELECT DATE_FORMAT(created_at, '%Y-%m') as month, COALESCE(SUM(total_amount), 0) as revenue
-            FROM orders 
-            WHERE DATE(created_at) BETWEEN %s AND %s AND payment_status = 'paid'
-            GROUP BY DATE_FORMAT(created_at, '%Y-%m')
+            SELECT DATE_FORMAT(sales_date, '%Y-%m') as month, COALESCE(SUM(total_amount), 0) as revenue
+            FROM sales_daily_rollup 
+            WHERE sales_date BETWEEN %s AND %s AND payment_status = 'paid'
+            GROUP BY DATE_FORMAT(sales_date, '%Y-%m')
             ORDER BY month
             """
         
-        revenue_data = Database.execute_query(revenue_query, (start_date, end_date), fetch=True)
-        
-        # Convert Decimal to float for JSON serialization
-        for item in revenue_data:
-            item['revenue'] = float(item['revenue'])
+        SalesRollup.ensure_fresh()
+        revenue_data = Database.execute_query(revenue_query, (start_date, end_date), fetch=True, decode=True)
         
         return success_response({
             'period': period,
@@ -141,25 +131,67 @@ def revenue_analytics():
     except Exception as e:
         return error_response(str(e), 500)
 
+@dashboard_bp.route('/dashboard/revenue-series', methods=['GET'])
+@admin_required
+@cached(ttl=300)
+@snapshot()
+def revenue_series():
+    """Gap-filled revenue/order series in the site timezone as parallel arrays"""
+    try:
+        granularity = request.args.get('granularity', 'daily')  # hourly, daily, weekly, monthly
+        tz = site_timezone()
+        
+        try:
+            end_date = request.args.get('end_date')
+            end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else datetime.now(tz).date()
+            start_date = request.args.get('start_date')
+            start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else end_date - timedelta(days=30)
+        except ValueError:
+            return error_response('Dates must be YYYY-MM-DD', 400)
+        
+        RevenueSeries.ensure_fresh()
+        try:
+            series = RevenueSeries.series(granularity, start_date, end_date, tz)
+        except ValueError as e:
+            return error_response(str(e), 400)
+        
+        return success_response(series)
+        
+    except Exception as e:
+        return error_response(str(e), 500)
+
 @dashboard_bp.route('/dashboard/low-stock-alerts', methods=['GET'])
 @admin_required
+@cached(ttl=60)
+@snapshot()
 def low_stock_alerts():
     try:
-        threshold = int(request.args.get('threshold', 10))
-        
-        low_stock_query = """
-        SELECT p.id, p.name, p.sku, p.stock_quantity, p.price, c.name as category_name
-        FROM products p
-        LEFT JOIN categories c ON p.category_id = c.id
-        WHERE p.stock_quantity <= %s AND p.status = 'active'
-        ORDER BY p.stock_quantity ASC, p.name
-        """
-        
-        low_stock_products = Database.execute_query(low_stock_query, (threshold,), fetch=True)
+        # By default products below their own threshold come from the low-stock
+        # index; an explicit ?threshold= may reach past it, so it scans products
+        threshold = request.args.get('threshold')
+        
+        if threshold is None:
+            threshold = DEFAULT_THRESHOLD
+            low_stock_query = """
+            SELECT p.id, p.name, p.sku, p.stock_quantity, p.price, c.name as category_name
+            FROM product_low_stock ls
+            JOIN products p ON ls.product_id = p.id
+            LEFT JOIN categories c ON p.category_id = c.id
+            ORDER BY ls.stock_quantity ASC, p.name
+            """
+            params = ()
+        else:
+            threshold = int(threshold)
+            low_stock_query = """
+            SELECT p.id, p.name, p.sku, p.stock_quantity, p.price, c.name as category_name
+            FROM products p
+            LEFT JOIN categories c ON p.category_id = c.id
+            WHERE p.stock_quantity <= %s AND p.status = 'active'
+            ORDER BY p.stock_quantity ASC, p.name
+            """
+            params = (threshold,)
         
-        # Convert Decimal to float
-        for product in low_stock_products:
-            product['price'] = float(product['price'])
+        low_stock_products = Database.execute_query(low_stock_query, params, fetch=True, decode='products')
         
         return success_response({
             'threshold': threshold,
@@ -172,33 +204,49 @@ def low_stock_alerts():
 
 @dashboard_bp.route('/dashboard/top-selling-products', methods=['GET'])
 @admin_required
+@cached(ttl=300)
+@snapshot()
 def top_selling_products():
     try:
         limit = int(request.args.get('limit', 10))
         days = int(request.args.get('days', 30))
+        sort = request.args.get('sort', 'units')  # units, revenue
+        if sort not in ('units', 'revenue'):
+            return error_response('sort must be units or revenue', 400)
+        
+        SalesRollup.ensure_fresh()
+        if Leaderboards.covers(days, limit):
+            top_products_query = """
+            SELECT p.id, p.name, p.sku, p.price,
+                   l.units as total_sold,
+                   l.revenue as total_revenue,
+                   c.name as category_name
+            FROM sales_leaderboards l
+            JOIN products p ON l.entity_id = p.id
+            LEFT JOIN categories c ON p.category_id = c.id
+            WHERE l.board = %s AND l.window_days = %s
+            ORDER BY l.position
+            LIMIT %s
+            """
+            board = PRODUCTS_BY_UNITS if sort == 'units' else PRODUCTS_BY_REVENUE
+            params = (board, days, limit)
+        else:
+            top_products_query = f"""
+            SELECT p.id, p.name, p.sku, p.price, 
+                   CAST(SUM(r.units_sold) AS SIGNED) as total_sold,
+                   SUM(r.revenue) as total_revenue,
+                   c.name as category_name
+            FROM product_sales_daily_rollup r
+            JOIN products p ON r.product_id = p.id
+            LEFT JOIN categories c ON p.category_id = c.id
+            WHERE r.sales_date >= %s AND r.payment_status = 'paid'
+            GROUP BY p.id, p.name, p.sku, p.price, c.name
+            ORDER BY {'total_sold' if sort == 'units' else 'total_revenue'} DESC
+            LIMIT %s
+            """
+            params = (window_start(days), limit)
         
-        top_products_query = """
-        SELECT p.id, p.name, p.sku, p.price, 
-               SUM(oi.quantity) as total_sold,
-               SUM(oi.quantity * oi.price) as total_revenue,
-               c.name as category_name
-        FROM order_items oi
-        JOIN products p ON oi.product_id = p.id
-        JOIN orders o ON oi.order_id = o.id
-        LEFT JOIN categories c ON p.category_id = c.id
-        WHERE o.created_at >= DATE_SUB(NOW(), INTERVAL %s DAY) 
-              AND o.payment_status = 'paid'
-        GROUP BY p.id, p.name, p.sku, p.price, c.name
-        ORDER BY total_sold DESC
-        LIMIT %s
-        """
-        
-        top_products = Database.execute_query(top_products_query, (days, limit), fetch=True)
-        
-        # Convert Decimal to float
-        for product in top_products:
-            product['price'] = float(product['price'])
-            product['total_revenue'] = float(product['total_revenue'])
+        top_products = Database.execute_query(top_products_query, params, fetch=True, decode=True)
         
         return success_response({
             'days': days,
@@ -210,19 +258,22 @@ def top_selling_products():
 
 @dashboard_bp.route('/dashboard/order-status-distribution', methods=['GET'])
 @admin_required
+@cached(ttl=120)
+@snapshot()
 def order_status_distribution():
     try:
         days = int(request.args.get('days', 30))
         
         status_query = """
-        SELECT status, COUNT(*) as count
-        FROM orders
-        WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
+        SELECT status, CAST(SUM(order_count) AS SIGNED) as count
+        FROM sales_daily_rollup
+        WHERE sales_date >= %s
         GROUP BY status
         ORDER BY count DESC
         """
         
-        status_data = Database.execute_query(status_query, (days,), fetch=True)
+        SalesRollup.ensure_fresh()
+        status_data = Database.execute_query(status_query, (window_start(days),), fetch=True)
         
         return success_response({
             'days': days,
@@ -234,27 +285,26 @@ def order_status_distribution():
 
 @dashboard_bp.route('/dashboard/payment-method-stats', methods=['GET'])
 @admin_required
+@cached(ttl=300)
+@snapshot()
 def payment_method_stats():
     try:
         days = int(request.args.get('days', 30))
         
         payment_query = """
         SELECT payment_method, 
-               COUNT(*) as order_count,
+               CAST(SUM(order_count) AS SIGNED) as order_count,
                SUM(total_amount) as total_amount
-        FROM orders
-        WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY) 
+        FROM sales_daily_rollup
+        WHERE sales_date >= %s 
               AND payment_status = 'paid'
-              AND payment_method IS NOT NULL
+              AND payment_method <> ''
         GROUP BY payment_method
         ORDER BY total_amount DESC
         """
         
-        payment_data = Database.execute_query(payment_query, (days,), fetch=True)
-        
-        # Convert Decimal to float
-        for item in payment_data:
-            item['total_amount'] = float(item['total_amount'])
+        SalesRollup.ensure_fresh()
+        payment_data = Database.execute_query(payment_query, (window_start(days),), fetch=True, decode=True)
         
         return success_response({
             'days': days,
@@ -266,43 +316,28 @@ def payment_method_stats():
 
 @dashboard_bp.route('/dashboard/return-refund-rate', methods=['GET'])
 @admin_required
+@cached(ttl=300)
+@snapshot()
 def return_refund_rate():
     try:
         days = int(request.args.get('days', 30))
         
-        # Total orders
-        total_orders_query = """
-        SELECT COUNT(*) as total FROM orders 
-        WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
-        """
-        total_orders = Database.execute_query(total_orders_query, (days,), fetch=True)[0]['total']
-        
-        # Returned orders
-        returned_orders_query = """
-        SELECT COUNT(*) as returned FROM orders 
-        WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY) AND status = 'returned'
-        """
-        returned_orders = Database.execute_query(returned_orders_query, (days,), fetch=True)[0]['returned']
-        
-        # Refunded orders
-        refunded_orders_query = """
-        SELECT COUNT(*) as refunded FROM orders 
-        WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY) AND payment_status = 'refunded'
-        """
-        refunded_orders = Database.execute_query(refunded_orders_query, (days,), fetch=True)[0]['refunded']
-        
-        # Calculate rates
-        return_rate = (returned_orders / total_orders * 100) if total_orders > 0 else 0
-        refund_rate = (refunded_orders / total_orders * 100) if total_orders > 0 else 0
-        
-        return success_response({
-            'days': days,
-            'total_orders': total_orders,
-            'returned_orders': returned_orders,
-            'refunded_orders': refunded_orders,
-            'return_rate': round(return_rate, 2),
-            'refund_rate': round(refund_rate, 2)
-        })
+        # Window totals plus order-week cohorts from one grouped scan
+        return success_response(ReturnAnalytics.rates(days))
         
     except Exception as e:
-        return error_response(str(e), 500)
\ No newline at end of file
+        return error_response(str(e), 500)
+
+@dashboard_bp.route('/dashboard/stream', methods=['GET'])
+@admin_required
+def dashboard_stream():
+    """Live counters over Server-Sent Events: a snapshot event, then a delta per write"""
+    if LiveCounters.full():
+        return error_response('Too many live dashboard streams, try again later', 503)
+    
+    # No stream_with_context: the request (and its pooled connection) is released
+    # as soon as the response starts, the generator checks out connections per query
+    return Response(LiveCounters.stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -10,7 +10,8 @@ import uuid
 
 # Import our modules
 from models import Database, SiteConfig
-from utils import (admin_required, success_response, error_response, get_request_data, ResponseFormatter)
+from page_counts import PageCount
+from utils import (admin_required, success_response, error_response, get_request_data, ResponseFormatter, Keyset)
 
 # Create blueprint
 integrations_bp = Blueprint('integrations', __name__)
@@ -325,6 +326,7 @@ def get_api_logs():
         activity_type = request.args.get('activity_type')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
+        cursor = request.args.get('cursor')
         
         offset = (page - 1) * per_page
         
@@ -351,8 +353,18 @@ def get_api_logs():
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
         # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM api_logs WHERE {where_clause}"
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        count_mode = PageCount.mode('cached')
+        total = PageCount.total("api_logs", where_clause, params, count_mode)
+        
+        # A cursor seeks past the previous page's last (created_at, id) instead of OFFSET
+        if cursor:
+            try:
+                seek_sql, seek_params = Keyset.after(cursor, 'created_at', 'DESC', "al.created_at", "al.id", nullable=True)
+            except ValueError as e:
+                return error_response(str(e), 400)
+            where_clause = f"{where_clause} AND {seek_sql}"
+            params.extend(seek_params)
+            offset = 0
         
         # Get logs
         logs_query = f"""
@@ -360,27 +372,18 @@ def get_api_logs():
         FROM api_logs al
         LEFT JOIN api_integrations ai ON al.integration_id = ai.id
         WHERE {where_clause}
-        ORDER BY al.created_at DESC
+        ORDER BY al.created_at DESC, al.id DESC
         LIMIT %s OFFSET %s
         """
-        params.extend([per_page, offset])
-        logs = Database.execute_query(logs_query, params, fetch=True)
-        
-        # Parse JSON fields
-        for log in logs:
-            if log['request_data']:
-                try:
-                    log['request_data'] = json.loads(log['request_data'])
-                except:
-                    log['request_data'] = {}
-            
-            if log['response_data']:
-                try:
-                    log['response_data'] = json.loads(log['response_data'])
-                except:
-                    log['response_data'] = {}
+        params.extend([per_page + 1, offset])
+        # Unparseable request/response bodies are returned as {}
+        logs = Database.execute_query(
+            logs_query, params, fetch=True,
+            decode=['api_logs', {'request_data': 'json_object', 'response_data': 'json_object'}]
+        )
+        logs, next_cursor = Keyset.page(logs, per_page, 'created_at', 'DESC')
         
-        return jsonify(ResponseFormatter.paginated(logs, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(logs, total, page, per_page, next_cursor, count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
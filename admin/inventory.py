@@ -8,8 +8,13 @@ import io
 
 # Import our modules
 from models import Database
+from page_counts import PageCount
+from stock_index import LowStockIndex, DEFAULT_THRESHOLD
+from leaderboards import Leaderboards, PRODUCTS_BY_UNITS
+from sales_rollup import SalesRollup, window_start
+from response_cache import cached
 from utils import (admin_required, success_response, error_response, get_request_data, 
-                   ResponseFormatter, save_image)
+                   ResponseFormatter, Keyset, save_image, stream_csv_response, use_read_replica)
 
 # Create blueprint
 inventory_bp = Blueprint('inventory', __name__)
@@ -27,6 +32,7 @@ def get_stock_levels():
         search = request.args.get('search', '').strip()
         sort_by = request.args.get('sort_by', 'name')
         sort_order = request.args.get('sort_order', 'asc')
+        cursor = request.args.get('cursor')
         
         offset = (page - 1) * per_page
         
@@ -53,19 +59,34 @@ def get_stock_levels():
         where_clause = " AND ".join(where_conditions)
         
         # Validate sort columns
-        valid_sort_columns = ['name', 'sku', 'stock_quantity', 'last_restocked', 'category_name']
-        if sort_by not in valid_sort_columns:
+        sort_columns = {
+            'name': 'p.name',
+            'sku': 'p.sku',
+            'stock_quantity': 'p.stock_quantity',
+            'last_restocked': 'p.last_restocked',
+            'category_name': 'c.name'
+        }
+        if sort_by not in sort_columns:
             sort_by = 'name'
+        sort_column = sort_columns[sort_by]
         
         sort_direction = 'ASC' if sort_order.lower() == 'asc' else 'DESC'
         
-        # Get total count
-        count_query = f"""
-        SELECT COUNT(*) as total FROM products p 
-        LEFT JOIN categories c ON p.category_id = c.id
-        WHERE {where_clause}
-        """
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        # Get total count (the filters are all on products)
+        count_mode = PageCount.mode()
+        total = PageCount.total("products p", where_clause, params, count_mode)
+        
+        # A cursor seeks past the previous page's last (sort value, id) instead of OFFSET
+        if cursor:
+            try:
+                seek_sql, seek_params = Keyset.after(
+                    cursor, sort_by, sort_direction, sort_column, "p.id", nullable=sort_by not in ('name', 'sku')
+                )
+            except ValueError as e:
+                return error_response(str(e), 400)
+            where_clause = f"{where_clause} AND {seek_sql}"
+            params.extend(seek_params)
+            offset = 0
         
         # Get stock levels with movement data
         stock_query = f"""
@@ -87,25 +108,18 @@ def get_stock_levels():
         FROM products p
         LEFT JOIN categories c ON p.category_id = c.id
         WHERE {where_clause}
-        ORDER BY 
-            CASE WHEN '{sort_by}' = 'category_name' THEN c.name
-                 WHEN '{sort_by}' = 'name' THEN p.name
-                 WHEN '{sort_by}' = 'sku' THEN p.sku
-                 ELSE NULL END {sort_direction},
-            CASE WHEN '{sort_by}' = 'stock_quantity' THEN p.stock_quantity
-                 ELSE NULL END {sort_direction},
-            CASE WHEN '{sort_by}' = 'last_restocked' THEN p.last_restocked
-                 ELSE NULL END {sort_direction}
+        ORDER BY {sort_column} {sort_direction}, p.id {sort_direction}
         LIMIT %s OFFSET %s
         """
-        params.extend([per_page, offset])
+        params.extend([per_page + 1, offset])
         
-        stock_levels = Database.execute_query(stock_query, params, fetch=True)
+        stock_levels = Database.execute_query(
+            stock_query, params, fetch=True, decode=['products', {'movement_30d': 'int'}]
+        )
+        stock_levels, next_cursor = Keyset.page(stock_levels, per_page, sort_by, sort_direction)
         
-        # Convert decimals to float and add computed fields
+        # Add computed fields
         for item in stock_levels:
-            item['price'] = float(item['price'])
-            item['stock_value'] = float(item['stock_value'])
             item['movement_30d'] = item['movement_30d'] or 0
             item['sales_30d'] = item['sales_30d'] or 0
             
@@ -116,7 +130,7 @@ def get_stock_levels():
             else:
                 item['days_of_stock'] = 999
         
-        return jsonify(ResponseFormatter.paginated(stock_levels, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(stock_levels, total, page, per_page, next_cursor, count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -157,8 +171,8 @@ def get_stock_movements():
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
         # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM stock_movements sm WHERE {where_clause}"
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        count_mode = PageCount.mode('cached')
+        total = PageCount.total("stock_movements sm", where_clause, params, count_mode)
         
         # Get movements
         movements_query = f"""
@@ -195,7 +209,7 @@ def get_stock_movements():
             else:
                 movement['description'] = f"{movement['quantity_change']} units"
         
-        return jsonify(ResponseFormatter.paginated(movements, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(movements, total, page, per_page, count=count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -221,36 +235,41 @@ def adjust_stock():
         
         current_admin = get_jwt_identity()
         
-        # Get current product stock
-        product = Database.execute_query(
-            "SELECT stock_quantity, name FROM products WHERE id = %s",
-            (product_id,), fetch=True
-        )
-        
-        if not product:
-            return error_response('Product not found', 404)
-        
-        current_stock = product[0]['stock_quantity']
-        new_stock = current_stock + quantity_change
-        
-        if new_stock < 0:
-            return error_response('Cannot reduce stock below zero', 400)
-        
-        # Update product stock
-        Database.execute_query(
-            "UPDATE products SET stock_quantity = %s, last_restocked = %s WHERE id = %s",
-            (new_stock, datetime.now(), product_id)
-        )
+        with Database.transaction():
+            # Get current product stock (row locked until commit)
+            product = Database.execute_query(
+                "SELECT stock_quantity, name FROM products WHERE id = %s FOR UPDATE",
+                (product_id,), fetch=True
+            )
+            
+            if not product:
+                return error_response('Product not found', 404)
+            
+            current_stock = product[0]['stock_quantity']
+            new_stock = current_stock + quantity_change
+            
+            if new_stock < 0:
+                return error_response('Cannot reduce stock below zero', 400)
+            
+            # Update product stock
+            Database.execute_query(
+                "UPDATE products SET stock_quantity = %s, last_restocked = %s WHERE id = %s",
+                (new_stock, datetime.now(), product_id)
+            )
+            
+            # Record stock movement
+            movement_id = record_stock_movement(
+                product_id=product_id,
+                movement_type='adjustment',
+                quantity_change=quantity_change,
+                reference_type='manual_adjustment',
+                admin_id=current_admin['id'],
+                notes=f"{reason}. {notes}".strip()
+            )
+            
+            stock_changes = LowStockIndex.sync([product_id])
         
-        # Record stock movement
-        movement_id = record_stock_movement(
-            product_id=product_id,
-            movement_type='adjustment',
-            quantity_change=quantity_change,
-            reference_type='manual_adjustment',
-            admin_id=current_admin['id'],
-            notes=f"{reason}. {notes}".strip()
-        )
+        LowStockIndex.publish(stock_changes)
         
         return success_response({
             'movement_id': movement_id,
@@ -291,8 +310,8 @@ def get_suppliers():
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
         # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM suppliers s WHERE {where_clause}"
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        count_mode = PageCount.mode()
+        total = PageCount.total("suppliers s", where_clause, params, count_mode)
         
         # Get suppliers with stats
         suppliers_query = f"""
@@ -310,20 +329,12 @@ def get_suppliers():
         """
         params.extend([per_page, offset])
         
-        suppliers = Database.execute_query(suppliers_query, params, fetch=True)
+        suppliers = Database.execute_query(suppliers_query, params, fetch=True, decode='suppliers')
         
-        # Parse JSON fields and convert decimals
         for supplier in suppliers:
-            if supplier.get('address'):
-                try:
-                    supplier['address'] = json.loads(supplier['address'])
-                except:
-                    supplier['address'] = {}
-            
-            supplier['total_spent'] = float(supplier['total_spent'])
             supplier['time_since_last_order'] = get_time_ago(supplier['last_order_date']) if supplier['last_order_date'] else 'Never'
         
-        return jsonify(ResponseFormatter.paginated(suppliers, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(suppliers, total, page, per_page, count=count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -395,13 +406,10 @@ def get_purchase_orders():
         
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
-        # Get total count
-        count_query = f"""
-        SELECT COUNT(*) as total FROM purchase_orders po 
-        LEFT JOIN suppliers s ON po.supplier_id = s.id
-        WHERE {where_clause}
-        """
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        # Get total count (suppliers only needs joining when the search filters on it)
+        count_mode = PageCount.mode()
+        count_from = "purchase_orders po LEFT JOIN suppliers s ON po.supplier_id = s.id" if search else "purchase_orders po"
+        total = PageCount.total(count_from, where_clause, params, count_mode)
         
         # Get purchase orders
         orders_query = f"""
@@ -434,7 +442,7 @@ def get_purchase_orders():
             
             order['status_info'] = status_info.get(order['status'], {'label': 'Unknown', 'color': 'secondary'})
         
-        return jsonify(ResponseFormatter.paginated(orders, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(orders, total, page, per_page, count=count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -502,7 +510,7 @@ def create_purchase_order():
 
 @inventory_bp.route('/inventory/purchase-orders/<int:po_id>/receive', methods=['POST'])
 @admin_required
-def receive_purchase_order():
+def receive_purchase_order(po_id):
     try:
         from flask_jwt_extended import get_jwt_identity
         
@@ -511,42 +519,49 @@ def receive_purchase_order():
         
         current_admin = get_jwt_identity()
         
-        # Get purchase order
-        po = Database.execute_query(
-            "SELECT * FROM purchase_orders WHERE id = %s", (po_id,), fetch=True
-        )
-        
-        if not po:
-            return error_response('Purchase order not found', 404)
-        
-        # Process received items
-        for item in received_items:
-            product_id = item['product_id']
-            received_qty = int(item['received_quantity'])
+        with Database.transaction():
+            # Get purchase order
+            po = Database.execute_query(
+                "SELECT * FROM purchase_orders WHERE id = %s FOR UPDATE", (po_id,), fetch=True
+            )
             
-            if received_qty > 0:
-                # Update product stock
-                Database.execute_query(
-                    "UPDATE products SET stock_quantity = stock_quantity + %s, last_restocked = %s WHERE id = %s",
-                    (received_qty, datetime.now(), product_id)
-                )
+            if not po:
+                return error_response('Purchase order not found', 404)
+            
+            # Process received items
+            restocked_ids = []
+            for item in received_items:
+                product_id = item['product_id']
+                received_qty = int(item['received_quantity'])
                 
-                # Record stock movement
-                record_stock_movement(
-                    product_id=product_id,
-                    movement_type='restock',
-                    quantity_change=received_qty,
-                    reference_type='purchase_order',
-                    reference_id=po_id,
-                    admin_id=current_admin['id'],
-                    notes=f"Received from PO {po[0]['order_number']}"
-                )
+                if received_qty > 0:
+                    # Update product stock
+                    Database.execute_query(
+                        "UPDATE products SET stock_quantity = stock_quantity + %s, last_restocked = %s WHERE id = %s",
+                        (received_qty, datetime.now(), product_id)
+                    )
+                    
+                    # Record stock movement
+                    record_stock_movement(
+                        product_id=product_id,
+                        movement_type='restock',
+                        quantity_change=received_qty,
+                        reference_type='purchase_order',
+                        reference_id=po_id,
+                        admin_id=current_admin['id'],
+                        notes=f"Received from PO {po[0]['order_number']}"
+                    )
+                    restocked_ids.append(product_id)
+            
+            stock_changes = LowStockIndex.sync(restocked_ids)
+            
+            # Update purchase order status
+            Database.execute_query(
+                "UPDATE purchase_orders SET status = %s, received_at = %s WHERE id = %s",
+                ('received', datetime.now(), po_id)
+            )
         
-        # Update purchase order status
-        Database.execute_query(
-            "UPDATE purchase_orders SET status = %s, received_at = %s WHERE id = %s",
-            ('received', datetime.now(), po_id)
-        )
+        LowStockIndex.publish(stock_changes)
         
         return success_response(message='Purchase order received successfully')
         
@@ -557,6 +572,7 @@ def receive_purchase_order():
 
 @inventory_bp.route('/inventory/analytics/overview', methods=['GET'])
 @admin_required
+@use_read_replica
 def inventory_overview():
     try:
         days = int(request.args.get('days', 30))
@@ -586,32 +602,44 @@ def inventory_overview():
         """
         movements_trends = Database.execute_query(movements_query, (days,), fetch=True)
         
-        # Top selling products (stock depletion)
-        top_selling_query = """
-        SELECT p.id, p.name, p.sku, p.stock_quantity,
-               SUM(oi.quantity) as units_sold,
-               SUM(oi.quantity * oi.price) as revenue
-        FROM products p
-        JOIN order_items oi ON p.id = oi.product_id
-        JOIN orders o ON oi.order_id = o.id
-        WHERE o.created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
-              AND o.payment_status = 'paid'
-        GROUP BY p.id, p.name, p.sku, p.stock_quantity
-        ORDER BY units_sold DESC
-        LIMIT 10
-        """
-        top_selling = Database.execute_query(top_selling_query, (days,), fetch=True)
+        # Top selling products (stock depletion), from the leaderboard or the daily rollup
+        SalesRollup.ensure_fresh()
+        if Leaderboards.covers(days, 10):
+            top_selling_query = """
+            SELECT p.id, p.name, p.sku, p.stock_quantity,
+                   l.units as units_sold,
+                   l.revenue
+            FROM sales_leaderboards l
+            JOIN products p ON l.entity_id = p.id
+            WHERE l.board = %s AND l.window_days = %s
+            ORDER BY l.position
+            LIMIT 10
+            """
+            params = (PRODUCTS_BY_UNITS, days)
+        else:
+            top_selling_query = """
+            SELECT p.id, p.name, p.sku, p.stock_quantity,
+                   CAST(SUM(r.units_sold) AS SIGNED) as units_sold,
+                   SUM(r.revenue) as revenue
+            FROM product_sales_daily_rollup r
+            JOIN products p ON r.product_id = p.id
+            WHERE r.sales_date >= %s AND r.payment_status = 'paid'
+            GROUP BY p.id, p.name, p.sku, p.stock_quantity
+            ORDER BY units_sold DESC
+            LIMIT 10
+            """
+            params = (window_start(days),)
+        top_selling = Database.execute_query(top_selling_query, params, fetch=True)
         
         # Low stock alerts
         low_stock_query = """
-        SELECT p.id, p.name, p.sku, p.stock_quantity, p.low_stock_threshold,
+        SELECT p.id, p.name, p.sku, ls.stock_quantity, ls.low_stock_threshold,
                c.name as category_name
-        FROM products p
+        FROM product_low_stock ls
+        JOIN products p ON ls.product_id = p.id
         LEFT JOIN categories c ON p.category_id = c.id
-        WHERE p.status = 'active' 
-              AND p.stock_quantity <= COALESCE(p.low_stock_threshold, 10)
-              AND p.stock_quantity > 0
-        ORDER BY p.stock_quantity ASC
+        WHERE ls.stock_quantity > 0
+        ORDER BY ls.stock_quantity ASC
         LIMIT 20
         """
         low_stock_alerts = Database.execute_query(low_stock_query, fetch=True)
@@ -670,18 +698,14 @@ def inventory_valuation_report():
         ORDER BY stock_value DESC
         """
         
-        valuation_data = Database.execute_query(valuation_query, params, fetch=True)
+        valuation_data = Database.execute_query(valuation_query, params, fetch=True, decode='products')
         
         # Calculate totals
-        total_retail_value = sum(float(item['stock_value']) for item in valuation_data)
-        total_cost_value = sum(float(item['cost_value']) for item in valuation_data)
+        total_retail_value = sum(item['stock_value'] for item in valuation_data)
+        total_cost_value = sum(item['cost_value'] for item in valuation_data)
         
-        # Convert decimals
+        # Add margins
         for item in valuation_data:
-            item['price'] = float(item['price'])
-            item['stock_value'] = float(item['stock_value'])
-            item['avg_cost'] = float(item['avg_cost'])
-            item['cost_value'] = float(item['cost_value'])
             item['margin'] = item['stock_value'] - item['cost_value']
             item['margin_percentage'] = ((item['price'] - item['avg_cost']) / item['price'] * 100) if item['price'] > 0 else 0
         
@@ -724,16 +748,16 @@ def dead_stock_report():
         ORDER BY stock_value DESC
         """
         
+        # The report is one JSON body with its totals, so it is read in full
         dead_stock = Database.execute_query(dead_stock_query, (days_threshold,), fetch=True)
         
-        # Calculate dead stock value
-        total_dead_stock_value = sum(float(item['stock_value']) for item in dead_stock)
-        
-        # Convert decimals
+        # Convert decimals and total the dead stock value in a single pass
+        total_dead_stock_value = 0
         for item in dead_stock:
             item['price'] = float(item['price'])
             item['stock_value'] = float(item['stock_value'])
             item['days_since_last_sale'] = item['days_since_last_sale'] or 999
+            total_dead_stock_value += item['stock_value']
         
         return success_response({
             'dead_stock_items': dead_stock,
@@ -763,44 +787,44 @@ def bulk_update_inventory():
         
         current_admin = get_jwt_identity()
         updated_count = 0
+        movements = []
         
-        for update in updates:
-            product_id = update.get('product_id')
-            new_quantity = update.get('stock_quantity')
-            
-            if not product_id or new_quantity is None:
-                continue
-            
-            # Get current stock
-            current_stock = Database.execute_query(
-                "SELECT stock_quantity FROM products WHERE id = %s",
-                (product_id,), fetch=True
-            )
-            
-            if not current_stock:
-                continue
-            
-            current_qty = current_stock[0]['stock_quantity']
-            quantity_change = int(new_quantity) - current_qty
+        requested = [(update.get('product_id'), update.get('stock_quantity')) for update in updates]
+        requested = [(int(product_id), int(quantity)) for product_id, quantity in requested
+                     if product_id and quantity is not None]
+        
+        with Database.transaction():
+            # Current stock for every product in one lookup
+            stock = fetch_stock_by('id', [product_id for product_id, _ in requested])
+            new_levels = {}
             
-            if quantity_change != 0:
-                # Update product stock
-                Database.execute_query(
-                    "UPDATE products SET stock_quantity = %s, last_restocked = %s WHERE id = %s",
-                    (new_quantity, datetime.now(), product_id)
-                )
+            for product_id, new_quantity in requested:
+                if product_id not in stock:
+                    continue
                 
-                # Record stock movement
-                record_stock_movement(
-                    product_id=product_id,
-                    movement_type='adjustment',
-                    quantity_change=quantity_change,
-                    reference_type='bulk_update',
-                    admin_id=current_admin['id'],
-                    notes='Bulk inventory update'
-                )
+                quantity_change = new_quantity - stock[product_id]['stock_quantity']
                 
-                updated_count += 1
+                if quantity_change != 0:
+                    stock[product_id]['stock_quantity'] = new_levels[product_id] = new_quantity
+                    
+                    movements.append({
+                        'product_id': product_id,
+                        'movement_type': 'adjustment',
+                        'quantity_change': quantity_change,
+                        'reference_type': 'bulk_update',
+                        'admin_id': current_admin['id'],
+                        'notes': 'Bulk inventory update'
+                    })
+                    
+                    updated_count += 1
+            
+            set_stock_levels(new_levels)
+            
+            # Record all stock movements in one batch
+            record_stock_movements(movements)
+            stock_changes = LowStockIndex.sync(movement['product_id'] for movement in movements)
+        
+        LowStockIndex.publish(stock_changes)
         
         return success_response({
             'updated_count': updated_count,
@@ -834,56 +858,66 @@ def import_inventory():
         
         imported_count = 0
         errors = []
+        movements = []
         
+        parsed = []
+        total_rows = 0
         for row_num, row in enumerate(csv_reader, start=2):
+            total_rows += 1
             try:
                 sku = row.get('sku', '').strip()
                 stock_quantity = int(row.get('stock_quantity', 0))
                 
                 if not sku:
-                    errors.append(f"Row {row_num}: SKU is required")
+                    errors.append((row_num, "SKU is required"))
                     continue
                 
-                # Find product by SKU
-                product = Database.execute_query(
-                    "SELECT id, stock_quantity FROM products WHERE sku = %s",
-                    (sku,), fetch=True
-                )
+                parsed.append((row_num, sku, stock_quantity))
                 
+            except Exception as e:
+                errors.append((row_num, str(e)))
+        
+        with Database.transaction():
+            # Find every product by SKU in one lookup (SKUs compare case-insensitively)
+            products = {sku.lower(): product
+                        for sku, product in fetch_stock_by('sku', [sku for _, sku, _ in parsed]).items()}
+            new_levels = {}
+            
+            for row_num, sku, stock_quantity in parsed:
+                product = products.get(sku.lower())
                 if not product:
-                    errors.append(f"Row {row_num}: Product with SKU '{sku}' not found")
+                    errors.append((row_num, f"Product with SKU '{sku}' not found"))
                     continue
                 
-                product_id = product[0]['id']
-                current_qty = product[0]['stock_quantity']
-                quantity_change = stock_quantity - current_qty
-                
-                # Update stock
-                Database.execute_query(
-                    "UPDATE products SET stock_quantity = %s, last_restocked = %s WHERE id = %s",
-                    (stock_quantity, datetime.now(), product_id)
-                )
+                product_id = product['id']
+                quantity_change = stock_quantity - product['stock_quantity']
+                product['stock_quantity'] = new_levels[product_id] = stock_quantity
                 
-                # Record movement
+                # Queue movement for the batched insert below
                 if quantity_change != 0:
-                    record_stock_movement(
-                        product_id=product_id,
-                        movement_type='adjustment',
-                        quantity_change=quantity_change,
-                        reference_type='csv_import',
-                        admin_id=current_admin['id'],
-                        notes='CSV import update'
-                    )
+                    movements.append({
+                        'product_id': product_id,
+                        'movement_type': 'adjustment',
+                        'quantity_change': quantity_change,
+                        'reference_type': 'csv_import',
+                        'admin_id': current_admin['id'],
+                        'notes': 'CSV import update'
+                    })
                 
                 imported_count += 1
-                
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
+            
+            set_stock_levels(new_levels)
+            
+            # Record all stock movements in one batch
+            record_stock_movements(movements)
+            stock_changes = LowStockIndex.sync(movement['product_id'] for movement in movements)
+        
+        LowStockIndex.publish(stock_changes)
         
         return success_response({
             'imported_count': imported_count,
-            'total_rows': row_num - 1,
-            'errors': errors[:10]  # Limit errors shown
+            'total_rows': total_rows,
+            'errors': [f"Row {row_num}: {message}" for row_num, message in sorted(errors)[:10]]  # Limit errors shown
         }, f'Import completed. {imported_count} products updated')
         
     except Exception as e:
@@ -917,43 +951,31 @@ def export_inventory():
         ORDER BY p.name
         """
         
-        inventory_data = Database.execute_query(export_query, params, fetch=True)
-        
-        # Convert decimals for export
-        for item in inventory_data:
-            item['price'] = float(item['price'])
-            item['stock_value'] = float(item['stock_value'])
-        
         if format_type == 'csv':
-            # Generate CSV content
-            output = io.StringIO()
-            fieldnames = ['sku', 'name', 'category_name', 'stock_quantity', 'price', 'stock_value', 'last_restocked']
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for item in inventory_data:
-                writer.writerow({
-                    'sku': item['sku'],
-                    'name': item['name'],
-                    'category_name': item['category_name'] or '',
-                    'stock_quantity': item['stock_quantity'],
-                    'price': item['price'],
-                    'stock_value': item['stock_value'],
-                    'last_restocked': item['last_restocked'].strftime('%Y-%m-%d %H:%M:%S') if item['last_restocked'] else ''
-                })
+            # Rows are pulled from the server lazily and never held all at once
+            def csv_rows():
+                for item in Database.stream_query(export_query, params):
+                    yield {
+                        'sku': item['sku'],
+                        'name': item['name'],
+                        'category_name': item['category_name'] or '',
+                        'stock_quantity': item['stock_quantity'],
+                        'price': float(item['price']),
+                        'stock_value': float(item['stock_value']),
+                        'last_restocked': item['last_restocked'].strftime('%Y-%m-%d %H:%M:%S') if item['last_restocked'] else ''
+                    }
             
-            csv_content = output.getvalue()
-            output.close()
-            
-            return success_response({
-                'format': 'csv',
-                'filename': f'inventory_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
-                'content': csv_content,
-                'total_records': len(inventory_data)
-            })
+            fieldnames = ['sku', 'name', 'category_name', 'stock_quantity', 'price', 'stock_value', 'last_restocked']
+            filename = f'inventory_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+            return stream_csv_response(csv_rows(), fieldnames, filename)
         
         else:
-            # Return JSON format
+            # Return JSON format - one body, so the rows are read in full
+            inventory_data = Database.execute_query(export_query, params, fetch=True)
+            for item in inventory_data:
+                item['price'] = float(item['price'])
+                item['stock_value'] = float(item['stock_value'])
+            
             return success_response({
                 'format': 'json',
                 'data': inventory_data,
@@ -1063,6 +1085,61 @@ def record_stock_movement(product_id, movement_type, quantity_change, reference_
     except Exception as e:
         return None
 
+def fetch_stock_by(column, keys, chunk_size=1000):
+    """Map each key (product id or sku) to its product's id and stock_quantity, one IN query per chunk.
+    
+    The rows are locked (FOR UPDATE) until the caller's transaction ends,
+    so the levels written back and the movements recorded against them
+    cannot race a concurrent adjustment.
+    """
+    keys = sorted(set(keys))  # lock in index order across chunks
+    products = {}
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        placeholders = ','.join(['%s'] * len(chunk))
+        rows = Database.execute_query(
+            f"SELECT id, sku, stock_quantity FROM products WHERE {column} IN ({placeholders}) FOR UPDATE",
+            tuple(chunk), fetch=True
+        )
+        for row in rows:
+            products[row[column]] = {'id': row['id'], 'stock_quantity': row['stock_quantity']}
+    return products
+
+def set_stock_levels(levels, chunk_size=500):
+    """Set stock_quantity for many products ({product_id: quantity}), one CASE update per chunk"""
+    items = list(levels.items())
+    restocked_at = datetime.now()
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        cases = ' '.join(['WHEN %s THEN %s'] * len(chunk))
+        placeholders = ','.join(['%s'] * len(chunk))
+        Database.execute_query(
+            f"""UPDATE products SET stock_quantity = CASE id {cases} END, last_restocked = %s
+                WHERE id IN ({placeholders})""",
+            tuple(value for item in chunk for value in item) + (restocked_at,) + tuple(key for key, _ in chunk)
+        )
+
+def record_stock_movements(movements):
+    """Record many stock movements with one batched insert.
+    
+    Each movement is a dict taking the same keys as record_stock_movement.
+    Errors propagate so the caller's transaction rolls back the stock
+    changes along with their audit trail.
+    """
+    movement_query = """
+    INSERT INTO stock_movements (product_id, movement_type, quantity_change, reference_type,
+                               reference_id, supplier_id, admin_id, notes, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    
+    created_at = datetime.now()
+    return Database.execute_many(movement_query, [
+        (m['product_id'], m['movement_type'], m['quantity_change'], m['reference_type'],
+         m.get('reference_id'), m.get('supplier_id'), m.get('admin_id'), m.get('notes', ''),
+         created_at)
+        for m in movements
+    ], return_ids=True)
+
 def generate_po_number():
     """Generate unique purchase order number"""
     timestamp = datetime.now().strftime('%Y%m%d')
@@ -1097,6 +1174,7 @@ def get_time_ago(timestamp):
 
 @inventory_bp.route('/inventory/stats', methods=['GET'])
 @admin_required
+@cached(ttl=60)
 def get_inventory_stats():
     try:
         # Overall inventory statistics
@@ -1161,24 +1239,41 @@ def get_inventory_stats():
 @admin_required
 def get_low_stock_alerts():
     try:
-        threshold = int(request.args.get('threshold', 10))
-        
-        alerts_query = """
-        SELECT p.id, p.name, p.sku, p.stock_quantity, p.low_stock_threshold,
-               p.price, c.name as category_name,
-               (SELECT SUM(oi.quantity) FROM order_items oi 
-                JOIN orders o ON oi.order_id = o.id 
-                WHERE oi.product_id = p.id AND o.created_at >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-                AND o.payment_status = 'paid') as sales_last_30d
-        FROM products p
-        LEFT JOIN categories c ON p.category_id = c.id
-        WHERE p.status = 'active' 
-              AND p.stock_quantity <= COALESCE(p.low_stock_threshold, %s)
-              AND p.stock_quantity >= 0
-        ORDER BY p.stock_quantity ASC, sales_last_30d DESC
-        """
+        # Listed products come from the low-stock index (per-product thresholds,
+        # default 10); another ?threshold= default is applied to products directly
+        threshold = int(request.args.get('threshold', DEFAULT_THRESHOLD))
+        
+        if threshold == DEFAULT_THRESHOLD:
+            alerts_query = """
+            SELECT p.id, p.name, p.sku, ls.stock_quantity, ls.low_stock_threshold,
+                   p.price, c.name as category_name,
+                   (SELECT CAST(SUM(r.units_sold) AS SIGNED) FROM product_sales_daily_rollup r
+                    WHERE r.product_id = p.id AND r.sales_date >= %s
+                    AND r.payment_status = 'paid') as sales_last_30d
+            FROM product_low_stock ls
+            JOIN products p ON ls.product_id = p.id
+            LEFT JOIN categories c ON p.category_id = c.id
+            ORDER BY ls.stock_quantity ASC, sales_last_30d DESC
+            """
+            params = (window_start(30),)
+        else:
+            alerts_query = """
+            SELECT p.id, p.name, p.sku, p.stock_quantity, p.low_stock_threshold,
+                   p.price, c.name as category_name,
+                   (SELECT CAST(SUM(r.units_sold) AS SIGNED) FROM product_sales_daily_rollup r
+                    WHERE r.product_id = p.id AND r.sales_date >= %s
+                    AND r.payment_status = 'paid') as sales_last_30d
+            FROM products p
+            LEFT JOIN categories c ON p.category_id = c.id
+            WHERE p.status = 'active'
+                  AND p.stock_quantity <= COALESCE(p.low_stock_threshold, %s)
+                  AND p.stock_quantity >= 0
+            ORDER BY p.stock_quantity ASC, sales_last_30d DESC
+            """
+            params = (window_start(30), threshold)
         
-        alerts = Database.execute_query(alerts_query, (threshold,), fetch=True)
+        SalesRollup.ensure_fresh()
+        alerts = Database.execute_query(alerts_query, params, fetch=True)
         
         # Add urgency levels and recommendations
         for alert in alerts:
@@ -1215,4 +1310,36 @@ def get_low_stock_alerts():
         })
         
     except Exception as e:
-        return error_response(str(e), 500)
\ No newline at end of file
+        return error_response(str(e), 500)
+
+@inventory_bp.route('/inventory/alerts/history', methods=['GET'])
+@admin_required
+def get_stock_alert_history():
+    """Threshold crossings recorded by the low-stock index, newest first.
+    
+    Live alerts are pushed as 'alert' events on /dashboard/stream; clients
+    that reconnect pass ?after_id= to catch up on what they missed.
+    """
+    try:
+        after_id = int(request.args.get('after_id', 0))
+        limit = min(int(request.args.get('limit', 50)), 200)
+        
+        history_query = """
+        SELECT sa.id, sa.product_id, p.name, p.sku, sa.alert_type,
+               sa.stock_quantity, sa.low_stock_threshold, sa.created_at
+        FROM stock_alerts sa
+        LEFT JOIN products p ON sa.product_id = p.id
+        WHERE sa.id > %s
+        ORDER BY sa.id DESC
+        LIMIT %s
+        """
+        
+        alerts = Database.execute_query(history_query, (after_id, limit), fetch=True)
+        
+        return success_response({
+            'alerts': alerts,
+            'last_id': alerts[0]['id'] if alerts else after_id
+        })
+        
+    except Exception as e:
+        return error_response(str(e), 500)
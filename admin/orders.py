@@ -1,16 +1,32 @@
-from flask import Blueprint, request
+from flask import Blueprint, request, jsonify
 import json
 from datetime import datetime, timedelta
 import uuid
 
 # Import our modules
 from models import Database, Order
+from order_search import OrderSearch
+from page_counts import PageCount
+from customer_metrics import CustomerMetrics
+import live_counters
+from leaderboards import Leaderboards, CUSTOMERS_BY_SPEND
+from sales_rollup import SalesRollup, window_start
 from utils import (admin_required, success_response, error_response, get_request_data, 
-                   ResponseFormatter)
+                   ResponseFormatter, Keyset, stream_csv_response, stream_xlsx_response, use_read_replica)
 
 # Create blueprint
 orders_bp = Blueprint('orders', __name__)
 
+# Order list columns; the large text/JSON ones are only selected when requested with ?include=
+ORDER_LIST_COLUMNS = [
+    'id', 'order_number', 'customer_id', 'total_amount', 'subtotal', 'shipping_cost', 'tax_amount',
+    'discount_amount', 'status', 'payment_status', 'payment_method', 'coupon_code',
+    'item_count', 'notes_count', 'created_at', 'updated_at'
+]
+ORDER_LIST_OPTIONAL_COLUMNS = ['shipping_address', 'billing_address', 'tracking_info', 'notes']
+ORDER_EXPORT_FIELDS = ['order_number', 'created_at', 'status', 'payment_status', 'total_amount',
+                      'customer_name', 'customer_email']
+
 # ======================= ORDER MANAGEMENT ROUTES =======================
 
 @orders_bp.route('/orders', methods=['GET'])
@@ -19,107 +35,144 @@ def get_orders():
     try:
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
-        status = request.args.get('status')
-        payment_status = request.args.get('payment_status')
-        search = request.args.get('search', '').strip()
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        customer_id = request.args.get('customer_id')
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'desc')
+        cursor = request.args.get('cursor')
+        include = request.args.get('include')  # comma-separated optional columns; omitted = all
         
         offset = (page - 1) * per_page
         
-        # Build WHERE conditions
-        where_conditions = []
-        params = []
+        if include is None:
+            columns = ORDER_LIST_COLUMNS + ORDER_LIST_OPTIONAL_COLUMNS
+        else:
+            included = [name.strip() for name in include.split(',') if name.strip()]
+            unknown = [name for name in included if name not in ORDER_LIST_OPTIONAL_COLUMNS]
+            if unknown:
+                return error_response(f"Unknown include field(s): {', '.join(unknown)}", 400)
+            columns = ORDER_LIST_COLUMNS + [name for name in ORDER_LIST_OPTIONAL_COLUMNS if name in included]
         
-        if status:
-            where_conditions.append("o.status = %s")
-            params.append(status)
-            
-        if payment_status:
-            where_conditions.append("o.payment_status = %s")
-            params.append(payment_status)
-            
-        if customer_id:
-            where_conditions.append("o.customer_id = %s")
-            params.append(customer_id)
-            
-        if search:
-            where_conditions.append("(o.order_number LIKE %s OR c.name LIKE %s OR c.email LIKE %s)")
-            search_param = f"%{search}%"
-            params.extend([search_param, search_param, search_param])
-            
-        if start_date:
-            where_conditions.append("DATE(o.created_at) >= %s")
-            params.append(start_date)
-            
-        if end_date:
-            where_conditions.append("DATE(o.created_at) <= %s")
-            params.append(end_date)
+        # Build WHERE conditions
+        where_conditions, params = order_filter_conditions(request.args)
         
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
-        # Validate sort columns
+        # Validate sort columns (status, payment_status and created_at may hold NULL)
         valid_sort_columns = ['order_number', 'total_amount', 'status', 'payment_status', 'created_at']
+        nullable_sort_columns = ['status', 'payment_status', 'created_at']
         if sort_by not in valid_sort_columns:
             sort_by = 'created_at'
         
         sort_direction = 'ASC' if sort_order.lower() == 'asc' else 'DESC'
         
-        # Get total count
-        count_query = f"""
-        SELECT COUNT(*) as total FROM orders o 
-        LEFT JOIN customers c ON o.customer_id = c.id 
-        WHERE {where_clause}
-        """
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        # status/payment_status are ENUMs: order and seek on their position, not the label
+        enum_sort = sort_by in ('status', 'payment_status')
+        sort_column = Keyset.enum_position(f"o.{sort_by}") if enum_sort else f"o.{sort_by}"
+        select_columns = [f'o.{column}' for column in columns]
+        if enum_sort:
+            select_columns.append(f"{sort_column} as keyset_position")
+        
+        # Get total count (the filters are all on orders)
+        count_mode = PageCount.mode('cached')
+        total = PageCount.total("orders o", where_clause, params, count_mode)
+        
+        # A cursor seeks past the previous page's last (sort value, id) instead of OFFSET
+        if cursor:
+            try:
+                seek_sql, seek_params = Keyset.after(
+                    cursor, sort_by, sort_direction, sort_column, "o.id", nullable=sort_by in nullable_sort_columns
+                )
+            except ValueError as e:
+                return error_response(str(e), 400)
+            where_clause = f"{where_clause} AND {seek_sql}"
+            params.extend(seek_params)
+            offset = 0
         
         # Get orders with customer info
         orders_query = f"""
-        SELECT o.*, c.name as customer_name, c.email as customer_email, c.phone as customer_phone,
-               (SELECT COUNT(*) FROM order_items oi WHERE oi.order_id = o.id) as item_count,
-               (SELECT COUNT(*) FROM order_notes on WHERE on.order_id = o.id) as notes_count
+        SELECT {', '.join(select_columns)},
+               c.name as customer_name, c.email as customer_email, c.phone as customer_phone
         FROM orders o
         LEFT JOIN customers c ON o.customer_id = c.id
         WHERE {where_clause}
-        ORDER BY o.{sort_by} {sort_direction}
+        ORDER BY {sort_column} {sort_direction}, o.id {sort_direction}
         LIMIT %s OFFSET %s
         """
-        params.extend([per_page, offset])
-        orders = Database.execute_query(orders_query, params, fetch=True)
+        params.extend([per_page + 1, offset])
+        orders = Database.execute_query(orders_query, params, fetch=True, decode='orders')
+        orders, next_cursor = Keyset.page(
+            orders, per_page, sort_by, sort_direction,
+            sort_key='keyset_position' if enum_sort else None, strip_sort_key=enum_sort
+        )
+        
+        return jsonify(ResponseFormatter.paginated(orders, total, page, per_page, next_cursor, count_mode))
+        
+    except Exception as e:
+        return error_response(str(e), 500)
+
+def order_filter_conditions(filters):
+    """WHERE conditions and params for the order list filters (query args or an export's filters dict)"""
+    where_conditions = []
+    params = []
+    
+    if filters.get('status'):
+        where_conditions.append("o.status = %s")
+        params.append(filters['status'])
+        
+    if filters.get('payment_status'):
+        where_conditions.append("o.payment_status = %s")
+        params.append(filters['payment_status'])
+        
+    if filters.get('customer_id'):
+        where_conditions.append("o.customer_id = %s")
+        params.append(filters['customer_id'])
+        
+    search = (filters.get('search') or '').strip()
+    if search:
+        search_condition, search_params = OrderSearch.condition(search)
+        where_conditions.append(search_condition)
+        params.extend(search_params)
+        
+    # Day bounds as created_at ranges so idx_orders_created_at applies
+    if filters.get('start_date'):
+        where_conditions.append("o.created_at >= %s")
+        params.append(filters['start_date'])
+        
+    if filters.get('end_date'):
+        where_conditions.append("o.created_at < DATE_ADD(%s, INTERVAL 1 DAY)")
+        params.append(filters['end_date'])
+    
+    return where_conditions, params
+
+@orders_bp.route('/orders/search', methods=['GET'])
+@admin_required
+def search_orders():
+    try:
+        query = request.args.get('q', '').strip()
+        limit = min(int(request.args.get('limit', 20)), 100)
+        
+        if not query:
+            return error_response('q is required', 400)
+        
+        # Ranked order ids from the search index, then one primary-key fetch for their rows
+        hits = OrderSearch.search(query, limit)
+        if not hits:
+            return success_response({'query': query, 'orders': []})
         
-        # Parse JSON fields and format data
+        scores = {hit['order_id']: hit['score'] for hit in hits}
+        placeholders = ','.join(['%s'] * len(scores))
+        orders_query = f"""
+        SELECT {', '.join(f'o.{column}' for column in ORDER_LIST_COLUMNS)},
+               c.name as customer_name, c.email as customer_email, c.phone as customer_phone
+        FROM orders o
+        LEFT JOIN customers c ON o.customer_id = c.id
+        WHERE o.id IN ({placeholders})
+        """
+        orders = Database.execute_query(orders_query, list(scores), fetch=True, decode='orders')
         for order in orders:
-            # Parse addresses
-            if order['shipping_address']:
-                try:
-                    order['shipping_address'] = json.loads(order['shipping_address'])
-                except:
-                    order['shipping_address'] = {}
-                    
-            if order['billing_address']:
-                try:
-                    order['billing_address'] = json.loads(order['billing_address'])
-                except:
-                    order['billing_address'] = {}
-            
-            # Parse tracking info
-            if order.get('tracking_info'):
-                try:
-                    order['tracking_info'] = json.loads(order['tracking_info'])
-                except:
-                    order['tracking_info'] = {}
-            
-            # Convert decimal to float
-            order['total_amount'] = float(order['total_amount'])
-            if order.get('shipping_cost'):
-                order['shipping_cost'] = float(order['shipping_cost'])
-            if order.get('tax_amount'):
-                order['tax_amount'] = float(order['tax_amount'])
+            order['score'] = round(scores[order['id']], 4)
+        orders.sort(key=lambda order: (-order['score'], -order['id']))
         
-        return jsonify(ResponseFormatter.paginated(orders, total, page, per_page))
+        return success_response({'query': query, 'orders': orders})
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -135,7 +188,7 @@ def get_order(order_id):
         LEFT JOIN customers c ON o.customer_id = c.id
         WHERE o.id = %s
         """
-        order_result = Database.execute_query(order_query, (order_id,), fetch=True)
+        order_result = Database.execute_query(order_query, (order_id,), fetch=True, decode='orders')
         
         if not order_result:
             return error_response('Order not found', 404)
@@ -152,15 +205,18 @@ def get_order(order_id):
         WHERE oi.order_id = %s
         ORDER BY oi.id
         """
-        items = Database.execute_query(items_query, (order_id,), fetch=True)
+        items = Database.execute_query(
+            items_query, (order_id,), fetch=True,
+            decode=['order_items', {'product_images': 'json_list'}]
+        )
         
         # Get order notes
         notes_query = """
-        SELECT on.*, a.name as admin_name
-        FROM order_notes on
-        LEFT JOIN admins a ON on.admin_id = a.id
-        WHERE on.order_id = %s
-        ORDER BY on.created_at ASC
+        SELECT n.*, a.name as admin_name
+        FROM order_notes n
+        LEFT JOIN admins a ON n.admin_id = a.id
+        WHERE n.order_id = %s
+        ORDER BY n.created_at ASC
         """
         notes = Database.execute_query(notes_query, (order_id,), fetch=True)
         
@@ -172,48 +228,14 @@ def get_order(order_id):
         """
         status_history = Database.execute_query(status_history_query, (order_id,), fetch=True)
         
-        # Parse JSON fields
-        if order['shipping_address']:
-            try:
-                order['shipping_address'] = json.loads(order['shipping_address'])
-            except:
-                order['shipping_address'] = {}
-                
-        if order['billing_address']:
-            try:
-                order['billing_address'] = json.loads(order['billing_address'])
-            except:
-                order['billing_address'] = {}
-        
-        if order.get('tracking_info'):
-            try:
-                order['tracking_info'] = json.loads(order['tracking_info'])
-            except:
-                order['tracking_info'] = {}
-        
-        # Parse product images and convert prices
+        # Keep only the first product image
         for item in items:
-            if item['product_images']:
-                try:
-                    images = json.loads(item['product_images'])
-                    item['product_image'] = images[0]['url'] if images else ''
-                except:
-                    item['product_image'] = ''
-            else:
+            images = item.pop('product_images')
+            try:
+                item['product_image'] = images[0]['url'] if images else ''
+            except (KeyError, IndexError, TypeError):
                 item['product_image'] = ''
-            
-            item['price'] = float(item['price'])
-            item['total'] = float(item['price']) * int(item['quantity'])
-            del item['product_images']  # Remove full images array
-        
-        # Convert decimal amounts to float
-        order['total_amount'] = float(order['total_amount'])
-        if order.get('shipping_cost'):
-            order['shipping_cost'] = float(order['shipping_cost'])
-        if order.get('tax_amount'):
-            order['tax_amount'] = float(order['tax_amount'])
-        if order.get('discount_amount'):
-            order['discount_amount'] = float(order['discount_amount'])
+            item['total'] = item['price'] * int(item['quantity'])
         
         order['items'] = items
         order['notes'] = notes
@@ -256,35 +278,45 @@ def create_order():
         discount_amount = float(data.get('discount_amount', 0))
         total_amount = subtotal + shipping_cost + tax_amount - discount_amount
         
-        # Create order
-        order_query = """
-        INSERT INTO orders (order_number, customer_id, total_amount, subtotal, shipping_cost, 
-                          tax_amount, discount_amount, status, payment_status, payment_method,
-                          shipping_address, billing_address, notes, coupon_code, created_at)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        order_id = Database.execute_query(order_query, (
-            order_number, customer_id, total_amount, subtotal, shipping_cost,
-            tax_amount, discount_amount, data.get('status', 'pending'),
-            data.get('payment_status', 'pending'), data.get('payment_method'),
-            json.dumps(shipping_address), json.dumps(billing_address),
-            data.get('notes', ''), data.get('coupon_code'), datetime.now()
-        ))
-        
-        # Create order items
-        for item in items:
+        # Order, items and history are written atomically on one connection
+        with Database.transaction():
+            # Create order
+            order_query = """
+            INSERT INTO orders (order_number, customer_id, total_amount, subtotal, shipping_cost, 
+                              tax_amount, discount_amount, status, payment_status, payment_method,
+                              shipping_address, billing_address, notes, coupon_code, item_count, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            
+            order_id = Database.execute_query(order_query, (
+                order_number, customer_id, total_amount, subtotal, shipping_cost,
+                tax_amount, discount_amount, data.get('status', 'pending'),
+                data.get('payment_status', 'pending'), data.get('payment_method'),
+                json.dumps(shipping_address), json.dumps(billing_address),
+                data.get('notes', ''), data.get('coupon_code'), len(items), datetime.now()
+            ))
+            
+            # Create order items
             item_query = """
             INSERT INTO order_items (order_id, product_id, variant_id, quantity, price, created_at)
             VALUES (%s, %s, %s, %s, %s, %s)
             """
-            Database.execute_query(item_query, (
-                order_id, item['product_id'], item.get('variant_id'),
-                item['quantity'], item['price'], datetime.now()
-            ))
+            created_at = datetime.now()
+            Database.execute_many(item_query, [
+                (order_id, item['product_id'], item.get('variant_id'),
+                 item['quantity'], item['price'], created_at)
+                for item in items
+            ])
+            
+            # Create initial status history entry
+            add_status_history(order_id, 'pending', 'Order created')
+            
+            OrderSearch.index_orders([order_id])
+            
+            if data.get('payment_status') == 'paid':
+                CustomerMetrics.refresh_customers([customer_id])
         
-        # Create initial status history entry
-        add_status_history(order_id, 'pending', 'Order created')
+        live_counters.order_created(total_amount, data.get('status', 'pending'), data.get('payment_status', 'pending'))
         
         return success_response({'id': order_id, 'order_number': order_number}, 'Order created successfully')
         
@@ -299,12 +331,19 @@ def generate_order_number():
 
 def add_status_history(order_id, status, note=''):
     """Add order status history entry"""
+    add_status_history_bulk([order_id], status, note)
+
+def add_status_history_bulk(order_ids, status, note=''):
+    """Add the same status history entry to many orders in one batched insert"""
     try:
         history_query = """
         INSERT INTO order_status_history (order_id, status, note, created_at)
         VALUES (%s, %s, %s, %s)
         """
-        Database.execute_query(history_query, (order_id, status, note, datetime.now()))
+        created_at = datetime.now()
+        Database.execute_many(history_query, [
+            (order_id, status, note, created_at) for order_id in order_ids
+        ])
     except:
         pass  # Don't fail order creation if status history fails
 
@@ -336,6 +375,7 @@ def update_order_status(order_id):
         # Add status history
         history_note = note or f"Status changed from {old_status} to {new_status}"
         add_status_history(order_id, new_status, history_note)
+        live_counters.order_status_changed(old_status, new_status)
         
         # TODO: Send email notification to customer
         
@@ -363,6 +403,11 @@ def update_payment_status(order_id):
         # Update payment status
         query = "UPDATE orders SET payment_status = %s, updated_at = %s WHERE id = %s"
         Database.execute_query(query, (new_payment_status, datetime.now(), order_id))
+        live_counters.payment_status_changed(order[0], new_payment_status)
+        
+        # Lifetime spend only counts paid orders
+        if 'paid' in (order[0]['payment_status'], new_payment_status):
+            CustomerMetrics.refresh_customers([order[0]['customer_id']])
         
         # Add note
         note = f"Payment status changed to {new_payment_status}"
@@ -383,11 +428,11 @@ def update_payment_status(order_id):
 def get_order_notes(order_id):
     try:
         notes_query = """
-        SELECT on.*, a.name as admin_name
-        FROM order_notes on
-        LEFT JOIN admins a ON on.admin_id = a.id
-        WHERE on.order_id = %s
-        ORDER BY on.created_at DESC
+        SELECT n.*, a.name as admin_name
+        FROM order_notes n
+        LEFT JOIN admins a ON n.admin_id = a.id
+        WHERE n.order_id = %s
+        ORDER BY n.created_at DESC
         """
         notes = Database.execute_query(notes_query, (order_id,), fetch=True)
         
@@ -425,12 +470,18 @@ def add_order_note_endpoint(order_id):
         return error_response(str(e), 500)
 
 def add_order_note(order_id, note, admin_id=None, is_internal=True):
-    """Add order note"""
+    """Add order note and bump the order's notes_count"""
     note_query = """
     INSERT INTO order_notes (order_id, admin_id, note, is_internal, created_at)
     VALUES (%s, %s, %s, %s, %s)
     """
-    return Database.execute_query(note_query, (order_id, admin_id, note, is_internal, datetime.now()))
+    with Database.transaction():
+        note_id = Database.execute_query(note_query, (order_id, admin_id, note, is_internal, datetime.now()))
+        # A counter bump is not an order change: keep updated_at (and the rollup marks that follow it)
+        Database.execute_query(
+            "UPDATE orders SET notes_count = notes_count + 1, updated_at = updated_at WHERE id = %s", (order_id,)
+        )
+    return note_id
 
 # ======================= BULK OPERATIONS =======================
 
@@ -470,59 +521,86 @@ def bulk_update_orders():
         params.extend(order_ids)
         
         query = f"UPDATE orders SET {', '.join(update_fields)} WHERE id IN ({id_placeholders})"
-        Database.execute_query(query, params)
+        with Database.transaction():
+            Database.execute_query(query, params)
+            
+            # Add status history for every order if status was updated
+            if 'status' in updates:
+                add_status_history_bulk(order_ids, updates['status'], 'Bulk status update')
+            
+            if 'payment_status' in updates:
+                CustomerMetrics.refresh_orders(order_ids)
         
-        # Add status history for each order if status was updated
-        if 'status' in updates:
-            for order_id in order_ids:
-                add_status_history(order_id, updates['status'], 'Bulk status update')
+        # Per-order deltas are unknown here - recount
+        live_counters.resync()
         
         return success_response(message=f'{len(order_ids)} orders updated successfully')
         
     except Exception as e:
         return error_response(str(e), 500)
 
+@orders_bp.route('/orders/export', methods=['GET'])
+@admin_required
+def export_orders():
+    """Stream the orders matching get_orders' filters (?format=csv|xlsx)"""
+    try:
+        where_conditions, params = order_filter_conditions(request.args)
+        return order_export_response(where_conditions, params, request.args.get('format', 'csv'))
+        
+    except Exception as e:
+        return error_response(str(e), 500)
+
 @orders_bp.route('/orders/bulk-export', methods=['POST'])
 @admin_required
 def bulk_export_orders():
     try:
         data = get_request_data()
         order_ids = data.get('order_ids', [])
-        export_format = data.get('format', 'csv')  # csv, excel
+        filters = data.get('filters', {})  # same keys as the get_orders query args
+        export_format = data.get('format', 'csv')  # csv, xlsx
         
-        if not order_ids:
-            return error_response('Order IDs are required', 400)
-        
-        # Get order data for export
-        id_placeholders = ','.join(['%s'] * len(order_ids))
-        
-        export_query = f"""
-        SELECT o.order_number, o.created_at, o.status, o.payment_status, o.total_amount,
-               c.name as customer_name, c.email as customer_email
-        FROM orders o
-        LEFT JOIN customers c ON o.customer_id = c.id
-        WHERE o.id IN ({id_placeholders})
-        ORDER BY o.created_at DESC
-        """
-        
-        orders = Database.execute_query(export_query, order_ids, fetch=True)
-        
-        # Convert decimal to float for export
-        for order in orders:
-            order['total_amount'] = float(order['total_amount'])
+        if not order_ids and not filters:
+            return error_response('Order IDs or filters are required', 400)
         
-        # TODO: Generate actual file based on format
-        # For now, return data structure
+        where_conditions, params = order_filter_conditions(filters)
+        if order_ids:
+            where_conditions.append(f"o.id IN ({','.join(['%s'] * len(order_ids))})")
+            params.extend(order_ids)
         
-        return success_response({
-            'format': export_format,
-            'order_count': len(orders),
-            'data': orders
-        }, 'Export data prepared successfully')
+        return order_export_response(where_conditions, params, export_format)
         
     except Exception as e:
         return error_response(str(e), 500)
 
+def order_export_response(where_conditions, params, export_format):
+    """Chunked CSV/XLSX download of the matching orders.
+    
+    Rows come from an unbuffered cursor and are encoded as they arrive, so
+    a worker's memory does not grow with the export size.
+    """
+    if export_format == 'excel':
+        export_format = 'xlsx'
+    if export_format not in ('csv', 'xlsx'):
+        return error_response('format must be csv or xlsx', 400)
+    
+    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+    export_query = f"""
+    SELECT o.order_number, o.created_at, o.status, o.payment_status, o.total_amount,
+           c.name as customer_name, c.email as customer_email
+    FROM orders o
+    LEFT JOIN customers c ON o.customer_id = c.id
+    WHERE {where_clause}
+    ORDER BY o.created_at DESC, o.id DESC
+    """
+    
+    # DECIMALs stay exact: CSV writes their text, XLSX stores them as numbers
+    order_rows = Database.stream_query(export_query, params)
+    filename = f'orders_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{export_format}'
+    
+    if export_format == 'csv':
+        return stream_csv_response(order_rows, ORDER_EXPORT_FIELDS, filename)
+    return stream_xlsx_response(order_rows, ORDER_EXPORT_FIELDS, filename, sheet_name='Orders')
+
 # ======================= ORDER TRACKING =======================
 
 @orders_bp.route('/orders/<int:order_id>/tracking', methods=['GET'])
@@ -656,6 +734,9 @@ def process_refund(order_id):
             "UPDATE orders SET payment_status = %s, updated_at = %s WHERE id = %s",
             (new_payment_status, datetime.now(), order_id)
         )
+        live_counters.payment_status_changed(order[0], new_payment_status)
+        if order[0]['payment_status'] == 'paid':
+            CustomerMetrics.refresh_customers([order[0]['customer_id']])
         
         # Add note
         add_order_note(order_id, f'Refund of ₹{refund_amount} initiated - {refund_reason}', is_internal=True)
@@ -669,49 +750,45 @@ def process_refund(order_id):
 
 @orders_bp.route('/orders/analytics/summary', methods=['GET'])
 @admin_required
+@use_read_replica
 def get_orders_analytics():
     try:
         days = int(request.args.get('days', 30))
         
+        SalesRollup.ensure_fresh()
+        since = window_start(days)
+        
         # Order status distribution
         status_query = """
-        SELECT status, COUNT(*) as count, SUM(total_amount) as total_amount
-        FROM orders
-        WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
+        SELECT status, CAST(SUM(order_count) AS SIGNED) as count, SUM(total_amount) as total_amount
+        FROM sales_daily_rollup
+        WHERE sales_date >= %s
         GROUP BY status
         ORDER BY count DESC
         """
-        status_data = Database.execute_query(status_query, (days,), fetch=True)
+        status_data = Database.execute_query(status_query, (since,), fetch=True, decode=True)
         
         # Payment status distribution
         payment_query = """
-        SELECT payment_status, COUNT(*) as count, SUM(total_amount) as total_amount
-        FROM orders
-        WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
+        SELECT payment_status, CAST(SUM(order_count) AS SIGNED) as count, SUM(total_amount) as total_amount
+        FROM sales_daily_rollup
+        WHERE sales_date >= %s
         GROUP BY payment_status
         ORDER BY count DESC
         """
-        payment_data = Database.execute_query(payment_query, (days,), fetch=True)
+        payment_data = Database.execute_query(payment_query, (since,), fetch=True, decode=True)
         
         # Daily order trends
         trends_query = """
-        SELECT DATE(created_at) as date, 
-               COUNT(*) as order_count,
+        SELECT sales_date as date, 
+               CAST(SUM(order_count) AS SIGNED) as order_count,
                SUM(total_amount) as total_revenue
-        FROM orders
-        WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
-        GROUP BY DATE(created_at)
+        FROM sales_daily_rollup
+        WHERE sales_date >= %s
+        GROUP BY sales_date
         ORDER BY date
         """
-        trends_data = Database.execute_query(trends_query, (days,), fetch=True)
-        
-        # Convert decimals to float
-        for item in status_data:
-            item['total_amount'] = float(item['total_amount'])
-        for item in payment_data:
-            item['total_amount'] = float(item['total_amount'])
-        for item in trends_data:
-            item['total_revenue'] = float(item['total_revenue'])
+        trends_data = Database.execute_query(trends_query, (since,), fetch=True, decode=True)
         
         return success_response({
             'days': days,
@@ -725,29 +802,40 @@ def get_orders_analytics():
 
 @orders_bp.route('/orders/analytics/top-customers', methods=['GET'])
 @admin_required
+@use_read_replica
 def get_top_customers():
     try:
         limit = int(request.args.get('limit', 10))
         days = int(request.args.get('days', 30))
         
-        top_customers_query = """
-        SELECT c.id, c.name, c.email,
-               COUNT(o.id) as order_count,
-               SUM(o.total_amount) as total_spent
-        FROM customers c
-        JOIN orders o ON c.id = o.customer_id
-        WHERE o.created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
-              AND o.payment_status = 'paid'
-        GROUP BY c.id, c.name, c.email
-        ORDER BY total_spent DESC
-        LIMIT %s
-        """
-        
-        top_customers = Database.execute_query(top_customers_query, (days, limit), fetch=True)
+        SalesRollup.ensure_fresh()
+        if Leaderboards.covers(days, limit):
+            top_customers_query = """
+            SELECT c.id, c.name, c.email,
+                   l.order_count,
+                   l.revenue as total_spent
+            FROM sales_leaderboards l
+            JOIN customers c ON l.entity_id = c.id
+            WHERE l.board = %s AND l.window_days = %s
+            ORDER BY l.position
+            LIMIT %s
+            """
+            params = (CUSTOMERS_BY_SPEND, days, limit)
+        else:
+            top_customers_query = """
+            SELECT c.id, c.name, c.email,
+                   CAST(SUM(r.order_count) AS SIGNED) as order_count,
+                   SUM(r.total_spent) as total_spent
+            FROM customer_sales_daily_rollup r
+            JOIN customers c ON r.customer_id = c.id
+            WHERE r.sales_date >= %s AND r.payment_status = 'paid'
+            GROUP BY c.id, c.name, c.email
+            ORDER BY total_spent DESC
+            LIMIT %s
+            """
+            params = (window_start(days), limit)
         
-        # Convert decimal to float
-        for customer in top_customers:
-            customer['total_spent'] = float(customer['total_spent'])
+        top_customers = Database.execute_query(top_customers_query, params, fetch=True, decode=True)
         
         return success_response({
             'days': days,
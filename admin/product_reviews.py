@@ -1,5 +1,4 @@
 from flask import Blueprint, request, jsonify
-import json
 from datetime import datetime, timedelta
 import uuid
 import re
@@ -7,8 +6,12 @@ import os
 
 # Import our modules
 from models import Database
+from page_counts import PageCount
+from db_async import AsyncDatabase
+from response_cache import cached
+from snapshots import snapshot
 from utils import (admin_required, success_response, error_response, get_request_data, 
-                   ResponseFormatter, save_image)
+                   ResponseFormatter, Keyset, save_image, stream_csv_response, use_read_replica)
 
 # Create blueprint
 product_reviews_bp = Blueprint('product_reviews', __name__)
@@ -31,6 +34,7 @@ def get_product_reviews():
         sort_order = request.args.get('sort_order', 'desc')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
+        cursor = request.args.get('cursor')
         
         offset = (page - 1) * per_page
         
@@ -77,20 +81,39 @@ def get_product_reviews():
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
         # Validate sort columns
-        valid_sort_columns = ['rating', 'created_at', 'helpfulness_score', 'product_name', 'customer_name']
-        if sort_by not in valid_sort_columns:
+        sort_columns = {
+            'rating': 'pr.rating',
+            'created_at': 'pr.created_at',
+            'helpfulness_score': 'pr.helpfulness_score',
+            'product_name': 'p.name',
+            'customer_name': 'c.name'
+        }
+        if sort_by not in sort_columns:
             sort_by = 'created_at'
+        sort_column = sort_columns[sort_by]
         
         sort_direction = 'ASC' if sort_order.lower() == 'asc' else 'DESC'
         
-        # Get total count
-        count_query = f"""
-        SELECT COUNT(*) as total FROM product_reviews pr 
-        LEFT JOIN customers c ON pr.customer_id = c.id
-        LEFT JOIN products p ON pr.product_id = p.id
-        WHERE {where_clause}
-        """
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        # Get total count (customers/products only need joining when the search filters on them)
+        count_mode = PageCount.mode()
+        count_from = "product_reviews pr"
+        if search:
+            count_from += " LEFT JOIN customers c ON pr.customer_id = c.id LEFT JOIN products p ON pr.product_id = p.id"
+        total = PageCount.total(count_from, where_clause, params, count_mode)
+        
+        # A cursor seeks past the previous page's last (sort value, id) instead of OFFSET
+        if cursor:
+            try:
+                # Product/customer may be missing (LEFT JOIN) and helpfulness_score is nullable
+                seek_sql, seek_params = Keyset.after(
+                    cursor, sort_by, sort_direction, sort_column, "pr.id",
+                    nullable=sort_by not in ('rating', 'created_at')
+                )
+            except ValueError as e:
+                return error_response(str(e), 400)
+            where_clause = f"{where_clause} AND {seek_sql}"
+            params.extend(seek_params)
+            offset = 0
         
         # Get reviews with related data
         reviews_query = f"""
@@ -110,49 +133,23 @@ def get_product_reviews():
         LEFT JOIN customers c ON pr.customer_id = c.id
         LEFT JOIN products p ON pr.product_id = p.id
         WHERE {where_clause}
-        ORDER BY 
-            CASE WHEN '{sort_by}' = 'product_name' THEN p.name
-                 WHEN '{sort_by}' = 'customer_name' THEN c.name
-                 ELSE NULL END {sort_direction},
-            CASE WHEN '{sort_by}' = 'rating' THEN pr.rating
-                 WHEN '{sort_by}' = 'helpfulness_score' THEN pr.helpfulness_score
-                 ELSE NULL END {sort_direction},
-            CASE WHEN '{sort_by}' = 'created_at' THEN pr.created_at
-                 ELSE NULL END {sort_direction}
+        ORDER BY {sort_column} {sort_direction}, pr.id {sort_direction}
         LIMIT %s OFFSET %s
         """
-        params.extend([per_page, offset])
-        reviews = Database.execute_query(reviews_query, params, fetch=True)
+        params.extend([per_page + 1, offset])
+        reviews = Database.execute_query(
+            reviews_query, params, fetch=True,
+            decode=['product_reviews', {'product_images': 'json_list'}]
+        )
+        reviews, next_cursor = Keyset.page(reviews, per_page, sort_by, sort_direction)
         
-        # Parse JSON fields and add computed data
+        # Add computed data
         for review in reviews:
-            # Parse review images
-            if review.get('review_images'):
-                try:
-                    review['review_images'] = json.loads(review['review_images'])
-                except:
-                    review['review_images'] = []
-            else:
-                review['review_images'] = []
-            
-            # Parse review videos
-            if review.get('review_videos'):
-                try:
-                    review['review_videos'] = json.loads(review['review_videos'])
-                except:
-                    review['review_videos'] = []
-            else:
-                review['review_videos'] = []
-            
-            # Parse product images for thumbnail
-            if review.get('product_images'):
-                try:
-                    product_images = json.loads(review['product_images'])
-                    review['product_thumbnail'] = product_images[0]['url'] if product_images else ''
-                except:
-                    review['product_thumbnail'] = ''
-                del review['product_images']  # Remove full images array
-            else:
+            # Keep only the first product image as thumbnail
+            product_images = review.pop('product_images', None)
+            try:
+                review['product_thumbnail'] = product_images[0]['url'] if product_images else ''
+            except (KeyError, IndexError, TypeError):
                 review['product_thumbnail'] = ''
             
             # Add review summary
@@ -170,7 +167,7 @@ def get_product_reviews():
             # Add quality score
             review['quality_score'] = calculate_review_quality_score(review)
         
-        return jsonify(ResponseFormatter.paginated(reviews, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(reviews, total, page, per_page, next_cursor, count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -198,26 +195,13 @@ def get_product_review(review_id):
         WHERE pr.id = %s
         """
         
-        review_result = Database.execute_query(review_query, (review_id,), fetch=True)
+        review_result = Database.execute_query(review_query, (review_id,), fetch=True, decode='product_reviews')
         
         if not review_result:
             return error_response('Review not found', 404)
         
         review = review_result[0]
         
-        # Parse JSON fields
-        if review.get('review_images'):
-            try:
-                review['review_images'] = json.loads(review['review_images'])
-            except:
-                review['review_images'] = []
-        
-        if review.get('review_videos'):
-            try:
-                review['review_videos'] = json.loads(review['review_videos'])
-            except:
-                review['review_videos'] = []
-        
         # Get helpfulness votes
         helpfulness_query = """
         SELECT 
@@ -476,7 +460,9 @@ def bulk_review_action():
 
 @product_reviews_bp.route('/product-reviews/analytics/dashboard', methods=['GET'])
 @admin_required
-def review_analytics_dashboard():
+@snapshot()
+@use_read_replica
+async def review_analytics_dashboard():
     try:
         days = int(request.args.get('days', 30))
         
@@ -493,11 +479,6 @@ def review_analytics_dashboard():
             SUM(CASE WHEN created_at >= DATE_SUB(NOW(), INTERVAL %s DAY) THEN 1 ELSE 0 END) as recent_reviews
         FROM product_reviews
         """
-        stats = Database.execute_query(stats_query, (days,), fetch=True)[0]
-        
-        # Convert average rating to float
-        if stats['average_rating']:
-            stats['average_rating'] = round(float(stats['average_rating']), 2)
         
         # Rating distribution
         rating_distribution_query = """
@@ -507,7 +488,6 @@ def review_analytics_dashboard():
         GROUP BY rating
         ORDER BY rating DESC
         """
-        rating_distribution = Database.execute_query(rating_distribution_query, fetch=True)
         
         # Review trends (last 30 days)
         trends_query = """
@@ -520,12 +500,6 @@ def review_analytics_dashboard():
         GROUP BY DATE(created_at)
         ORDER BY date
         """
-        trends = Database.execute_query(trends_query, (days,), fetch=True)
-        
-        # Convert avg_rating to float
-        for trend in trends:
-            if trend['avg_rating']:
-                trend['avg_rating'] = round(float(trend['avg_rating']), 2)
         
         # Top reviewed products
         top_products_query = """
@@ -540,12 +514,6 @@ def review_analytics_dashboard():
         ORDER BY review_count DESC
         LIMIT 10
         """
-        top_products = Database.execute_query(top_products_query, (days,), fetch=True)
-        
-        # Convert avg_rating to float
-        for product in top_products:
-            if product['avg_rating']:
-                product['avg_rating'] = round(float(product['avg_rating']), 2)
         
         # Most active reviewers
         active_reviewers_query = """
@@ -560,12 +528,24 @@ def review_analytics_dashboard():
         ORDER BY review_count DESC
         LIMIT 10
         """
-        active_reviewers = Database.execute_query(active_reviewers_query, (days,), fetch=True)
         
-        # Convert avg_rating to float
-        for reviewer in active_reviewers:
-            if reviewer['avg_rating']:
-                reviewer['avg_rating'] = round(float(reviewer['avg_rating']), 2)
+        # The five queries are independent - run them concurrently
+        stats, rating_distribution, trends, top_products, active_reviewers = await AsyncDatabase.fetch_all(
+            (stats_query, (days,)),
+            rating_distribution_query,
+            (trends_query, (days,)),
+            (top_products_query, (days,)),
+            (active_reviewers_query, (days,)),
+            decode=True
+        )
+        stats = stats[0]
+        
+        # Round average ratings
+        if stats['average_rating']:
+            stats['average_rating'] = round(stats['average_rating'], 2)
+        for row in trends + top_products + active_reviewers:
+            if row['avg_rating']:
+                row['avg_rating'] = round(row['avg_rating'], 2)
         
         return success_response({
             'days': days,
@@ -628,23 +608,10 @@ def get_moderation_queue():
         """
         params.append(limit)
         
-        pending_reviews = Database.execute_query(queue_query, params, fetch=True)
+        pending_reviews = Database.execute_query(queue_query, params, fetch=True, decode='product_reviews')
         
         # Add computed fields
         for review in pending_reviews:
-            # Parse media files
-            if review.get('review_images'):
-                try:
-                    review['review_images'] = json.loads(review['review_images'])
-                except:
-                    review['review_images'] = []
-            
-            if review.get('review_videos'):
-                try:
-                    review['review_videos'] = json.loads(review['review_videos'])
-                except:
-                    review['review_videos'] = []
-            
             # Add review summary
             if review['review_text'] and len(review['review_text']) > 100:
                 review['review_summary'] = review['review_text'][:100] + '...'
@@ -705,11 +672,8 @@ def get_potential_fake_reviews():
         where_clause = f"({' OR '.join(suspicious_criteria)})"
         
         # Get total count
-        count_query = f"""
-        SELECT COUNT(*) as total FROM product_reviews pr 
-        WHERE {where_clause}
-        """
-        total = Database.execute_query(count_query, fetch=True)[0]['total']
+        count_mode = PageCount.mode()
+        total = PageCount.total("product_reviews pr", where_clause, None, count_mode)
         
         # Get suspicious reviews
         suspicious_query = f"""
@@ -733,7 +697,7 @@ def get_potential_fake_reviews():
             review['suspicious_indicators'] = get_suspicious_indicators(review)
             review['time_ago'] = get_time_ago(review['created_at'])
         
-        return jsonify(ResponseFormatter.paginated(suspicious_reviews, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(suspicious_reviews, total, page, per_page, count=count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -789,6 +753,15 @@ def export_reviews():
         ORDER BY pr.created_at DESC
         """
         
+        if export_format == 'csv':
+            # Stream the file straight from the cursor
+            fieldnames = ['id', 'rating', 'title', 'review_text', 'is_approved', 'is_verified_purchase',
+                          'helpfulness_score', 'created_at', 'approved_at', 'customer_name',
+                          'customer_email', 'product_name', 'product_sku', 'order_number']
+            filename = f'reviews_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+            return stream_csv_response(Database.stream_query(export_query, params), fieldnames, filename)
+        
+        # Other formats are a single JSON body, so the rows are read in full
         reviews = Database.execute_query(export_query, params, fetch=True)
         
         # Generate export file (simplified for this example)
@@ -808,6 +781,7 @@ def export_reviews():
 
 @product_reviews_bp.route('/product-reviews/stats', methods=['GET'])
 @admin_required
+@cached(ttl=120)
 def get_review_stats():
     try:
         # Overall statistics
@@ -1079,10 +1053,8 @@ def get_review_reports():
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
         # Get total count
-        count_query = f"""
-        SELECT COUNT(*) as total FROM review_reports rr WHERE {where_clause}
-        """
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        count_mode = PageCount.mode()
+        total = PageCount.total("review_reports rr", where_clause, params, count_mode)
         
         # Get reports
         reports_query = f"""
@@ -1111,7 +1083,7 @@ def get_review_reports():
             else:
                 report['review_summary'] = report['review_text']
         
-        return jsonify(ResponseFormatter.paginated(reports, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(reports, total, page, per_page, count=count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -26,28 +26,7 @@ import json
 import bcrypt
 from config import Config
 
-class Database:
-    @staticmethod
-    def get_connection():
-        return mysql.connector.connect(**Config.get_db_connection_string())
-    
-    @staticmethod
-    def execute_query(query, params=None, fetch=False):
-        conn = Database.get_connection()
-        cursor = conn.cursor(dictionary=True)
-        try:
-            cursor.execute(query, params or ())
-            if fetch:
-                result = cursor.fetchall()
-                return result
-            conn.commit()
-            return cursor.lastrowid
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            cursor.close()
-            conn.close()
+from models import Database
 
 class Admin:
     @staticmethod
@@ -156,13 +135,13 @@ class Order:
         # Create order
         order_query = """
         INSERT INTO orders (customer_id, total_amount, status, payment_status, 
-                          shipping_address, created_at)
-        VALUES (%s, %s, %s, %s, %s, %s)
+                          shipping_address, item_count, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
         """
         order_id = Database.execute_query(
             order_query, 
             (customer_id, total_amount, 'pending', 'pending', 
-             json.dumps(shipping_address), datetime.now())
+             json.dumps(shipping_address), len(items), datetime.now())
         )
         
         # Create order items
@@ -174,6 +153,9 @@ class Order:
             Database.execute_query(item_query, (order_id, item['product_id'], 
                                               item['quantity'], item['price']))
         
+        from order_search import OrderSearch  # imports models
+        OrderSearch.index_orders([order_id])
+        
         return order_id
     
     @staticmethod
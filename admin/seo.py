@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 import json
 import os
 import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape as xml_escape
 from urllib.parse import urljoin, urlparse
 
 from utils.database import Database
@@ -11,6 +12,9 @@ from utils.response_formatter import ResponseFormatter, success_response, error_
 from utils.helpers import get_request_data
 from utils.validation import validate_required_fields
 from admin.auth import admin_required
+from utils import use_read_replica
+from response_cache import cached
+from page_counts import PageCount
 from admin.config import SiteConfig
 
 # Create SEO blueprint
@@ -20,6 +24,7 @@ seo_bp = Blueprint('seo', __name__)
 
 @seo_bp.route('/seo/dashboard', methods=['GET'])
 @admin_required
+@use_read_replica
 def get_seo_dashboard():
     try:
         days = int(request.args.get('days', 30))
@@ -135,8 +140,8 @@ def get_seo_pages():
         where_clause = " AND ".join(conditions)
         
         # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM seo_pages WHERE {where_clause}"
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        count_mode = PageCount.mode()
+        total = PageCount.total("seo_pages", where_clause, params, count_mode)
         
         # Get pages
         pages_query = f"""
@@ -178,7 +183,7 @@ def get_seo_pages():
             page_data['needs_audit'] = not page_data['last_audited'] or page_data['days_since_audit'] > 30
             page_data['has_issues'] = page_data['seo_score'] < 60
         
-        return jsonify(ResponseFormatter.paginated(pages, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(pages, total, page, per_page, count=count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -382,73 +387,59 @@ def generate_sitemap():
         else:
             sitemap_settings = {}
         
-        # Create XML sitemap
-        urlset = ET.Element('urlset')
-        urlset.set('xmlns', 'http://www.sitemaps.org/schemas/sitemap/0.9')
-        
-        # Add homepage
-        url_elem = ET.SubElement(urlset, 'url')
-        ET.SubElement(url_elem, 'loc').text = base_url
-        ET.SubElement(url_elem, 'lastmod').text = datetime.now().strftime('%Y-%m-%d')
-        ET.SubElement(url_elem, 'changefreq').text = 'weekly'
-        ET.SubElement(url_elem, 'priority').text = '1.0'
-        
-        # Add SEO pages
-        pages = Database.execute_query(
-            "SELECT page_url, updated_at, page_type FROM seo_pages WHERE is_indexable = 1",
-            fetch=True
-        )
+        # Write the sitemap incrementally while streaming pages from the database
+        sitemap_path = 'uploads/sitemap.xml'
+        os.makedirs(os.path.dirname(sitemap_path), exist_ok=True)
+        temp_path = sitemap_path + '.tmp'
+        
+        # Change frequency and priority by page type
+        page_type_settings = {
+            'homepage': ('daily', '1.0'),
+            'product': ('weekly', '0.8'),
+            'category': ('weekly', '0.7'),
+            'blog': ('monthly', '0.6')
+        }
         
-        for page in pages:
-            url_elem = ET.SubElement(urlset, 'url')
-            full_url = urljoin(base_url, page['page_url'])
-            ET.SubElement(url_elem, 'loc').text = full_url
+        urls_count = 0
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            f.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
             
-            if page['updated_at']:
-                ET.SubElement(url_elem, 'lastmod').text = page['updated_at'].strftime('%Y-%m-%d')
+            # Add homepage
+            f.write(sitemap_url_entry(base_url, datetime.now().strftime('%Y-%m-%d'), 'weekly', '1.0'))
+            urls_count += 1
             
-            # Set change frequency based on page type
-            if page['page_type'] == 'homepage':
-                ET.SubElement(url_elem, 'changefreq').text = 'daily'
-                ET.SubElement(url_elem, 'priority').text = '1.0'
-            elif page['page_type'] == 'product':
-                ET.SubElement(url_elem, 'changefreq').text = 'weekly'
-                ET.SubElement(url_elem, 'priority').text = '0.8'
-            elif page['page_type'] == 'category':
-                ET.SubElement(url_elem, 'changefreq').text = 'weekly'
-                ET.SubElement(url_elem, 'priority').text = '0.7'
-            elif page['page_type'] == 'blog':
-                ET.SubElement(url_elem, 'changefreq').text = 'monthly'
-                ET.SubElement(url_elem, 'priority').text = '0.6'
-            else:
-                ET.SubElement(url_elem, 'changefreq').text = 'monthly'
-                ET.SubElement(url_elem, 'priority').text = '0.5'
-        
-        # Generate XML content
-        xml_content = ET.tostring(urlset, encoding='unicode')
-        xml_declaration = '<?xml version="1.0" encoding="UTF-8"?>\n'
-        final_xml = xml_declaration + xml_content
+            # Add SEO pages
+            pages = Database.stream_query(
+                "SELECT page_url, updated_at, page_type FROM seo_pages WHERE is_indexable = 1"
+            )
+            
+            for page in pages:
+                full_url = urljoin(base_url, page['page_url'])
+                lastmod = page['updated_at'].strftime('%Y-%m-%d') if page['updated_at'] else None
+                changefreq, priority = page_type_settings.get(page['page_type'], ('monthly', '0.5'))
+                f.write(sitemap_url_entry(full_url, lastmod, changefreq, priority))
+                urls_count += 1
+            
+            f.write('</urlset>')
         
-        # Save to file
-        sitemap_path = 'uploads/sitemap.xml'
-        os.makedirs(os.path.dirname(sitemap_path), exist_ok=True)
-        with open(sitemap_path, 'w', encoding='utf-8') as f:
-            f.write(final_xml)
+        os.replace(temp_path, sitemap_path)
+        file_size = os.path.getsize(sitemap_path)
         
         # Record generation
         Database.execute_query(
             """INSERT INTO sitemap_generations (urls_count, file_path, file_size, 
                                               generation_status, generated_at)
                VALUES (%s, %s, %s, %s, %s)""",
-            (len(pages) + 1, sitemap_path, len(final_xml.encode('utf-8')), 'completed', datetime.now())
+            (urls_count, sitemap_path, file_size, 'completed', datetime.now())
         )
         
         # Update config
         SiteConfig.set_config('sitemap_last_generated', datetime.now().isoformat())
         
         return success_response({
-            'urls_count': len(pages) + 1,
-            'file_size': len(final_xml.encode('utf-8')),
+            'urls_count': urls_count,
+            'file_size': file_size,
             'file_path': sitemap_path,
             'generated_at': datetime.now().isoformat()
         }, 'Sitemap generated successfully')
@@ -456,6 +447,14 @@ def generate_sitemap():
     except Exception as e:
         return error_response(str(e), 500)
 
+def sitemap_url_entry(loc, lastmod, changefreq, priority):
+    """Serialize a single sitemap <url> element"""
+    entry = f'<url><loc>{xml_escape(loc)}</loc>'
+    if lastmod:
+        entry += f'<lastmod>{lastmod}</lastmod>'
+    entry += f'<changefreq>{changefreq}</changefreq><priority>{priority}</priority></url>'
+    return entry
+
 @seo_bp.route('/seo/sitemap/status', methods=['GET'])
 @admin_required
 def get_sitemap_status():
@@ -746,12 +745,8 @@ def get_audit_reports():
         reports = Database.execute_query(reports_query, (days, per_page, offset), fetch=True)
         
         # Get total count
-        count_query = """
-        SELECT COUNT(*) as total
-        FROM seo_audits sa
-        WHERE sa.audit_date >= DATE_SUB(NOW(), INTERVAL %s DAY)
-        """
-        total = Database.execute_query(count_query, (days,), fetch=True)[0]['total']
+        count_mode = PageCount.mode()
+        total = PageCount.total("seo_audits sa", "sa.audit_date >= DATE_SUB(NOW(), INTERVAL %s DAY)", (days,), count_mode)
         
         # Process audit results
         for report in reports:
@@ -761,7 +756,7 @@ def get_audit_reports():
                 except:
                     report['audit_results'] = {}
         
-        return jsonify(ResponseFormatter.paginated(reports, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(reports, total, page, per_page, count=count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -790,8 +785,8 @@ def get_keywords():
         where_clause = " AND ".join(conditions)
         
         # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM seo_keywords WHERE {where_clause}"
-        total = Database.execute_query(count_query, params, fetch=True)[0]['total']
+        count_mode = PageCount.mode()
+        total = PageCount.total("seo_keywords", where_clause, params, count_mode)
         
         # Get keywords with latest ranking
         keywords_query = f"""
@@ -813,7 +808,7 @@ def get_keywords():
         params.extend([per_page, offset])
         keywords = Database.execute_query(keywords_query, params, fetch=True)
         
-        return jsonify(ResponseFormatter.paginated(keywords, total, page, per_page))
+        return jsonify(ResponseFormatter.paginated(keywords, total, page, per_page, count=count_mode))
         
     except Exception as e:
         return error_response(str(e), 500)
@@ -926,6 +921,7 @@ def delete_keyword(keyword_id):
 
 @seo_bp.route('/seo/stats', methods=['GET'])
 @admin_required
+@cached(ttl=300)
 def get_seo_stats():
     try:
         # Overall SEO statistics
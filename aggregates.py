@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+
+def time_windows(now=None):
+    """Lower bounds for the standard dashboard windows.
+
+    Bounds are plain datetimes so queries compare created_at against a
+    constant (created_at >= %s) and can use the created_at indexes,
+    unlike DATE(created_at) = %s.
+    """
+    now = now or datetime.now()
+    return {
+        'today': now.replace(hour=0, minute=0, second=0, microsecond=0),
+        'week': now - timedelta(days=7),
+        'month': now - timedelta(days=30)
+    }
+
+
+class ConditionalAggregate:
+    """Compute many filtered COUNT/SUM columns over a table in a single scan"""
+
+    def __init__(self, table):
+        self.table = table
+        self._columns = []
+        self._column_params = []
+        self._where = []
+        self._where_params = []
+
+    def count(self, alias, condition=None, params=()):
+        """COUNT of rows matching condition (all rows when None)"""
+        if condition is None:
+            self._columns.append(f"COUNT(*) AS {alias}")
+        else:
+            self._columns.append(f"COUNT(CASE WHEN {condition} THEN 1 END) AS {alias}")
+            self._column_params.extend(params)
+        return self
+
+    def sum(self, alias, expression, condition=None, params=()):
+        """SUM of expression over rows matching condition, 0 when none match"""
+        if condition is None:
+            self._columns.append(f"COALESCE(SUM({expression}), 0) AS {alias}")
+        else:
+            self._columns.append(f"COALESCE(SUM(CASE WHEN {condition} THEN {expression} END), 0) AS {alias}")
+            self._column_params.extend(params)
+        return self
+
+    def scalar(self, alias, subquery, params=()):
+        """Uncorrelated scalar subquery over another table, answered in the same statement"""
+        self._columns.append(f"({subquery}) AS {alias}")
+        self._column_params.extend(params)
+        return self
+
+    def where(self, condition, params=()):
+        """Restrict the scan - use an indexed range such as the widest window"""
+        self._where.append(condition)
+        self._where_params.extend(params)
+        return self
+
+    def query(self):
+        """(sql, params) for the aggregate; the result is a single row"""
+        sql = f"SELECT {', '.join(self._columns)} FROM {self.table}"
+        if self._where:
+            sql += " WHERE " + " AND ".join(self._where)
+        return sql, tuple(self._column_params) + tuple(self._where_params)
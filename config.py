@@ -14,6 +14,55 @@ class Config:
     DB_NAME = os.environ.get('DB_NAME') or 'ecommerce_db'
     DB_PORT = int(os.environ.get('DB_PORT') or 3306)
     
+    # Connection pool
+    DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE') or 2)
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE') or 10)
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT') or 10)  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 3600)  # max connection age in seconds
+    DB_POOL_PING_INTERVAL = int(os.environ.get('DB_POOL_PING_INTERVAL') or 30)  # ping idle connections older than this
+    
+    # Read replica (optional - analytics reads are routed here when DB_REPLICA_HOST is set)
+    DB_REPLICA_HOST = os.environ.get('DB_REPLICA_HOST')
+    DB_REPLICA_PORT = int(os.environ.get('DB_REPLICA_PORT') or DB_PORT)
+    DB_REPLICA_USER = os.environ.get('DB_REPLICA_USER') or DB_USER
+    DB_REPLICA_PASSWORD = os.environ.get('DB_REPLICA_PASSWORD') or DB_PASSWORD
+    DB_REPLICA_BLUEPRINTS = [
+        name.strip() for name in (os.environ.get('DB_REPLICA_BLUEPRINTS') or 'dashboard').split(',') if name.strip()
+    ]  # blueprints whose read queries all go to the replica
+    
+    # Query instrumentation
+    DB_SLOW_QUERY_MS = float(os.environ.get('DB_SLOW_QUERY_MS') or 200)  # log statements slower than this
+    DB_QUERY_STATS_HEADERS = (os.environ.get('DB_QUERY_STATS_HEADERS') or 'true').lower() == 'true'
+    DB_N_PLUS_ONE_MODE = os.environ.get('DB_N_PLUS_ONE_MODE') or 'off'  # off, warn or raise
+    DB_N_PLUS_ONE_THRESHOLD = int(os.environ.get('DB_N_PLUS_ONE_THRESHOLD') or 10)
+    
+    # Prepared statements (opt-in per query with execute_query(..., prepared=True))
+    DB_PREPARED_STATEMENTS = (os.environ.get('DB_PREPARED_STATEMENTS') or 'true').lower() == 'true'
+    DB_PREPARED_CACHE_SIZE = int(os.environ.get('DB_PREPARED_CACHE_SIZE') or 64)  # per pooled connection
+    
+    # Sales rollups
+    SALES_ROLLUP_MAX_LAG = int(os.environ.get('SALES_ROLLUP_MAX_LAG') or 60)  # seconds before reports refresh the rollup
+    ROLLUP_SAFETY_LAG = int(os.environ.get('ROLLUP_SAFETY_LAG') or 300)  # seconds a high-water mark trails NOW() (longest write transaction)
+    
+    # Response cache for dashboard/stats endpoints
+    RESPONSE_CACHE_ENABLED = (os.environ.get('RESPONSE_CACHE_ENABLED') or 'true').lower() == 'true'
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND') or 'memory'  # memory or redis
+    RESPONSE_CACHE_REDIS_URL = os.environ.get('RESPONSE_CACHE_REDIS_URL') or 'redis://localhost:6379/0'
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES') or 512)  # memory backend only
+    
+    # Dashboard snapshots precomputed by a background thread in each app process
+    DASHBOARD_SNAPSHOTS_ENABLED = (os.environ.get('DASHBOARD_SNAPSHOTS_ENABLED') or 'true').lower() == 'true'
+    DASHBOARD_SNAPSHOT_INTERVAL = int(os.environ.get('DASHBOARD_SNAPSHOT_INTERVAL') or 300)  # seconds between refreshes
+    
+    # Live dashboard counters pushed over Server-Sent Events
+    LIVE_COUNTERS_RESEED_SECONDS = int(os.environ.get('LIVE_COUNTERS_RESEED_SECONDS') or 60)  # recount (picks up other processes' writes)
+    LIVE_STREAM_MAX_SUBSCRIBERS = int(os.environ.get('LIVE_STREAM_MAX_SUBSCRIBERS') or 20)  # per process; each stream holds a worker thread
+    LIVE_STREAM_MAX_SECONDS = int(os.environ.get('LIVE_STREAM_MAX_SECONDS') or 300)  # streams then close and EventSource reconnects
+    
+    # Paginated list totals (?count=exact|cached|estimate|none overrides per request)
+    PAGINATION_COUNT_DEFAULT = os.environ.get('PAGINATION_COUNT_DEFAULT') or 'exact'
+    PAGINATION_COUNT_TTL = int(os.environ.get('PAGINATION_COUNT_TTL') or 60)  # seconds a cached total is reused
+    
     # JWT
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-change-in-production'
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hour
@@ -40,4 +89,28 @@ class Config:
             'database': Config.DB_NAME,
             'port': Config.DB_PORT,
             'autocommit': True
+        }
+    
+    @staticmethod
+    def get_db_replica_connection_string():
+        if not Config.DB_REPLICA_HOST:
+            return None
+        return {
+            'host': Config.DB_REPLICA_HOST,
+            'user': Config.DB_REPLICA_USER,
+            'password': Config.DB_REPLICA_PASSWORD,
+            'database': Config.DB_NAME,
+            'port': Config.DB_REPLICA_PORT,
+            'autocommit': True
+        }
+    
+    @staticmethod
+    def get_db_pool_settings():
+        return {
+            'min_size': Config.DB_POOL_MIN_SIZE,
+            'max_size': Config.DB_POOL_MAX_SIZE,
+            'timeout': Config.DB_POOL_TIMEOUT,
+            'recycle': Config.DB_POOL_RECYCLE,
+            'ping_interval': Config.DB_POOL_PING_INTERVAL,
+            'prepared_cache_size': Config.DB_PREPARED_CACHE_SIZE
         }
\ No newline at end of file
@@ -0,0 +1,75 @@
+import argparse
+
+from models import Database
+
+VIP_SPEND = 50000
+REGULAR_SPEND = 10000
+SEGMENTS = ('VIP', 'regular', 'new')
+
+
+class CustomerMetrics:
+    """Lifetime paid-order metrics and segment per customer, kept in customer_metrics.
+
+    A customer's row is recomputed from their paid orders (idx_orders_customer)
+    whenever one of their orders is created paid or changes payment status,
+    so segment filters are an indexed WHERE instead of a GROUP BY over all
+    orders. Customers without a row have no paid orders yet: segment 'new'.
+    """
+
+    @staticmethod
+    def segment_filter(segment, alias='m'):
+        """(condition, params) selecting a segment on a LEFT JOINed customer_metrics"""
+        if segment == 'new':
+            return f"({alias}.segment = 'new' OR {alias}.customer_id IS NULL)", []
+        return f"{alias}.segment = %s", [segment]
+
+    @staticmethod
+    def _upsert(where, params):
+        Database.execute_query(f"""
+        INSERT INTO customer_metrics
+            (customer_id, order_count, total_spent, avg_order_value, first_order_date, last_order_date, segment)
+        SELECT c.id, COUNT(o.id), COALESCE(SUM(o.total_amount), 0), COALESCE(AVG(o.total_amount), 0),
+               MIN(o.created_at), MAX(o.created_at),
+               CASE
+                   WHEN COALESCE(SUM(o.total_amount), 0) >= {VIP_SPEND} THEN 'VIP'
+                   WHEN COALESCE(SUM(o.total_amount), 0) >= {REGULAR_SPEND} THEN 'regular'
+                   ELSE 'new'
+               END
+        FROM customers c
+        LEFT JOIN orders o ON o.customer_id = c.id AND o.payment_status = 'paid'
+        WHERE {where}
+        GROUP BY c.id
+        ON DUPLICATE KEY UPDATE order_count = VALUES(order_count), total_spent = VALUES(total_spent),
+            avg_order_value = VALUES(avg_order_value), first_order_date = VALUES(first_order_date),
+            last_order_date = VALUES(last_order_date), segment = VALUES(segment)
+        """, params)
+
+    @staticmethod
+    def refresh_customers(customer_ids):
+        """Recompute the metrics of the given customers"""
+        customer_ids = list(set(customer_ids))
+        if customer_ids:
+            CustomerMetrics._upsert(f"c.id IN ({','.join(['%s'] * len(customer_ids))})", customer_ids)
+
+    @staticmethod
+    def refresh_orders(order_ids):
+        """Recompute the metrics of the customers who placed the given orders"""
+        order_ids = list(set(order_ids))
+        if order_ids:
+            CustomerMetrics._upsert(
+                f"c.id IN (SELECT customer_id FROM orders WHERE id IN ({','.join(['%s'] * len(order_ids))}))",
+                order_ids
+            )
+
+    @staticmethod
+    def rebuild():
+        """Recompute every customer (initial population)"""
+        CustomerMetrics._upsert('1=1', [])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Maintain the customer_metrics table')
+    parser.add_argument('command', choices=['rebuild'])
+    parser.parse_args()
+    CustomerMetrics.rebuild()
+    print('customer_metrics rebuilt')
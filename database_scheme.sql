@@ -2531,4 +2531,167 @@ INSERT INTO site_config (config_key, value) VALUES
 CREATE INDEX idx_seo_pages_composite ON seo_pages(page_type, is_indexable, seo_score);
 CREATE INDEX idx_keyword_rankings_composite ON seo_keyword_rankings(keyword_id, tracked_date DESC, position);
 CREATE INDEX idx_seo_issues_composite ON seo_issues(status, severity, detected_at);
-CREATE INDEX idx_content_analysis_composite ON seo_content_analysis(page_id, analyzed_at DESC);
\ No newline at end of file
+CREATE INDEX idx_content_analysis_composite ON seo_content_analysis(page_id, analyzed_at DESC);
+
+-- Sales Rollup Schema
+-- Pre-aggregated daily sales, refreshed incrementally by sales_rollup.py
+
+-- Lets the incremental refresh find orders changed since the last run
+CREATE INDEX idx_orders_updated_at ON orders(updated_at);
+
+-- Daily order totals by status, payment status and payment method
+CREATE TABLE sales_daily_rollup (
+    sales_date DATE NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    payment_status VARCHAR(20) NOT NULL,
+    payment_method VARCHAR(50) NOT NULL DEFAULT '', -- '' when the order has no payment method
+    order_count INT NOT NULL DEFAULT 0,
+    total_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (sales_date, status, payment_status, payment_method),
+    INDEX idx_payment_status_date (payment_status, sales_date)
+);
+
+-- Daily units and revenue per product
+CREATE TABLE product_sales_daily_rollup (
+    sales_date DATE NOT NULL,
+    product_id INT NOT NULL,
+    payment_status VARCHAR(20) NOT NULL,
+    units_sold INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (sales_date, product_id, payment_status),
+    INDEX idx_product_date (product_id, sales_date)
+);
+
+-- High-water marks for incrementally refreshed rollups
+CREATE TABLE rollup_state (
+    name VARCHAR(50) PRIMARY KEY,
+    high_water_mark TIMESTAMP NULL,
+    refreshed_at TIMESTAMP NULL
+);
+
+INSERT INTO rollup_state (name) VALUES ('sales_daily');
+
+-- Revenue Time-Series Schema
+-- Chart buckets maintained by revenue_series.py
+
+-- Orders per 15-minute UTC bucket; folds exactly into local hours/days of any timezone
+CREATE TABLE revenue_quarter_hour_rollup (
+    bucket_start BIGINT PRIMARY KEY, -- epoch seconds, multiple of 900
+    order_count INT NOT NULL DEFAULT 0,
+    paid_order_count INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0 -- paid orders only
+);
+
+-- Daily totals in the site timezone, one series per timezone
+CREATE TABLE revenue_local_daily_rollup (
+    timezone VARCHAR(64) NOT NULL,
+    bucket_date DATE NOT NULL,
+    order_count INT NOT NULL DEFAULT 0,
+    paid_order_count INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (timezone, bucket_date)
+);
+
+INSERT INTO rollup_state (name) VALUES ('revenue_series');
+
+-- Leaderboard Schema
+-- Daily spend per customer, maintained with the sales rollups
+CREATE TABLE customer_sales_daily_rollup (
+    sales_date DATE NOT NULL,
+    customer_id INT NOT NULL,
+    payment_status VARCHAR(20) NOT NULL,
+    order_count INT NOT NULL DEFAULT 0,
+    total_spent DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (sales_date, customer_id, payment_status),
+    INDEX idx_customer_date (customer_id, sales_date)
+);
+
+-- Top-N products/customers per window, rebuilt by leaderboards.py
+CREATE TABLE sales_leaderboards (
+    board VARCHAR(30) NOT NULL, -- product_units, product_revenue, customer_spend
+    window_days SMALLINT NOT NULL,
+    position SMALLINT NOT NULL,
+    entity_id INT NOT NULL, -- product or customer id
+    units INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    order_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (board, window_days, position)
+);
+
+-- Low-Stock Index Schema
+-- Active products at or below their threshold, maintained by stock_index.py
+CREATE TABLE product_low_stock (
+    product_id INT PRIMARY KEY,
+    stock_quantity INT NOT NULL,
+    low_stock_threshold INT NOT NULL,
+    stock_margin INT NOT NULL, -- stock_quantity - low_stock_threshold, <= 0 while listed
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_stock_margin (stock_margin),
+    INDEX idx_stock_quantity (stock_quantity)
+);
+
+-- One row per threshold crossing (entering the index, or reaching zero while listed)
+CREATE TABLE stock_alerts (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    product_id INT NOT NULL,
+    alert_type VARCHAR(20) NOT NULL, -- low_stock, out_of_stock
+    stock_quantity INT NOT NULL,
+    low_stock_threshold INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_product_created (product_id, created_at)
+);
+
+-- Dashboard Snapshot Schema
+-- Precomputed analytics responses, refreshed by snapshots.py
+CREATE TABLE dashboard_snapshots (
+    name VARCHAR(150) PRIMARY KEY, -- view module.function
+    payload MEDIUMTEXT NOT NULL, -- JSON response body
+    computed_at DATETIME NOT NULL
+);
+
+-- Return/refund analytics bound returns and refunds by the report window
+CREATE INDEX idx_order_returns_created_at ON order_returns(created_at);
+CREATE INDEX idx_order_refunds_created_at ON order_refunds(created_at);
+
+-- Customer Metrics Schema
+-- Lifetime paid-order metrics and segment per customer, maintained by customer_metrics.py
+CREATE TABLE customer_metrics (
+    customer_id INT PRIMARY KEY,
+    order_count INT NOT NULL DEFAULT 0,
+    total_spent DECIMAL(14,2) NOT NULL DEFAULT 0,
+    avg_order_value DECIMAL(12,2) NOT NULL DEFAULT 0,
+    first_order_date TIMESTAMP NULL,
+    last_order_date TIMESTAMP NULL,
+    segment VARCHAR(10) NOT NULL DEFAULT 'new', -- VIP (>= 50000), regular (>= 10000), new
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_segment_spent (segment, total_spent),
+    FOREIGN KEY (customer_id) REFERENCES customers(id) ON DELETE CASCADE
+);
+
+-- Keyset pagination seeks on (sort column, id); InnoDB secondary indexes end in the primary key
+CREATE INDEX idx_blog_comments_created_at ON blog_comments(created_at);
+CREATE INDEX idx_coupons_created_at ON coupons(created_at);
+CREATE INDEX idx_products_name ON products(name);
+CREATE INDEX idx_orders_total_amount ON orders(total_amount);
+
+-- Per-order line and note counts for the admin order list, maintained by order creation and add_order_note
+ALTER TABLE orders
+    ADD COLUMN item_count INT NOT NULL DEFAULT 0,
+    ADD COLUMN notes_count INT NOT NULL DEFAULT 0;
+
+UPDATE orders o SET
+    item_count = (SELECT COUNT(*) FROM order_items oi WHERE oi.order_id = o.id),
+    notes_count = (SELECT COUNT(*) FROM order_notes n WHERE n.order_id = o.id),
+    updated_at = updated_at;
+
+-- Order search: order number prefix lookups plus a FULLTEXT document of customer name/email/phone
+-- and shipping city/postal code, maintained by order_search.OrderSearch (python order_search.py rebuild)
+CREATE TABLE order_search_index (
+    order_id INT PRIMARY KEY,
+    order_number VARCHAR(50),
+    document TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE,
+    INDEX idx_order_search_number (order_number),
+    FULLTEXT INDEX ft_order_search_document (document)
+);
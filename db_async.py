@@ -0,0 +1,95 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from models import Database
+
+
+class AsyncDatabase:
+    """asyncio interface to Database for async Flask views.
+
+    mysql-connector 8.1 has no asyncio driver, so each statement runs on a
+    worker pool sized to the connection pool and checks out its own pooled
+    connection. Awaiting several independent queries together (see
+    fetch_all) overlaps them on the server, so the view pays roughly one
+    round trip instead of the sum. Statements keep the caller's request
+    context (replica routing, query stats, decode=) but never join a
+    Database.transaction() - use the sync API for multi-statement writes.
+    
+    Workers draw from the same pool as the request, so the request's own
+    bound connection is handed back before each hop; otherwise a burst of
+    requests each holding one connection while waiting for several more
+    would exhaust the pool and time out together. Do not await these
+    inside Database.transaction(), whose connection cannot be released.
+    """
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    @staticmethod
+    def get_executor():
+        """Lazily create the worker pool - one thread per pooled connection"""
+        if AsyncDatabase._executor is None:
+            with AsyncDatabase._executor_lock:
+                if AsyncDatabase._executor is None:
+                    AsyncDatabase._executor = ThreadPoolExecutor(
+                        max_workers=Config.DB_POOL_MAX_SIZE, thread_name_prefix='db-async'
+                    )
+        return AsyncDatabase._executor
+
+    @staticmethod
+    async def run(func, *args, **kwargs):
+        """Await a blocking Database call on the worker pool"""
+        Database.release_request_connection()
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, AsyncDatabase._call_isolated, func, args, kwargs)
+        return await loop.run_in_executor(AsyncDatabase.get_executor(), call)
+
+    @staticmethod
+    def _call_isolated(func, args, kwargs):
+        Database._local.isolated = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            Database._local.isolated = False
+
+    # ======================= QUERY EXECUTION =======================
+
+    @staticmethod
+    async def execute_query(query, params=None, fetch=False, prepared=False, decode=None):
+        """Async Database.execute_query on a connection of its own"""
+        return await AsyncDatabase.run(
+            Database.execute_query, query, params, fetch=fetch, prepared=prepared, decode=decode
+        )
+
+    @staticmethod
+    async def fetch_all(*queries, decode=None):
+        """Run independent reads concurrently; each item is SQL or (SQL, params).
+
+        Results come back in the same order as the queries.
+        """
+        tasks = []
+        for item in queries:
+            query, params = (item, None) if isinstance(item, str) else item
+            tasks.append(AsyncDatabase.execute_query(query, params, fetch=True, decode=decode))
+        return await asyncio.gather(*tasks)
+
+    @staticmethod
+    async def stream_query(query, params=None, batch_size=1000, batches=False, decode=None):
+        """Async generator over Database.stream_query, one batch per worker hop"""
+        rows_iter = Database.stream_query(query, params, batch_size=batch_size, batches=True, decode=decode)
+        try:
+            while True:
+                rows = await AsyncDatabase.run(next, rows_iter, None)
+                if rows is None:
+                    break
+                if batches:
+                    yield rows
+                else:
+                    for row in rows:
+                        yield row
+        finally:
+            await AsyncDatabase.run(rows_iter.close)
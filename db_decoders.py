@@ -0,0 +1,149 @@
+import json
+import threading
+from decimal import Decimal
+
+# MySQL field type codes (mysql.connector.constants.FieldType)
+_DECIMAL_TYPES = (0, 246)  # DECIMAL, NEWDECIMAL
+_JSON_TYPE = 245
+
+
+# ======================= VALUE CONVERTERS =======================
+
+def to_float(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def to_int(value):
+    return int(value) if isinstance(value, (Decimal, str)) else value
+
+
+def _json_loader(default, empty):
+    """Build a JSON column converter; default on bad JSON, empty on NULL/''"""
+    def load(value):
+        if not value:
+            return empty() if callable(empty) else empty
+        if isinstance(value, (bytes, bytearray)):
+            value = value.decode('utf-8')
+        if not isinstance(value, str):
+            return value  # driver already decoded it
+        try:
+            return json.loads(value)
+        except ValueError:
+            return default()
+    return load
+
+
+CONVERTERS = {
+    'float': to_float,
+    'int': to_int,
+    'json': _json_loader(lambda: None, lambda: None),
+    'json_object': _json_loader(dict, None),
+    'json_list': _json_loader(list, list)
+}
+
+
+# ======================= COLUMN REGISTRY =======================
+
+# table -> {column: converter name}. Aliased columns (e.g. p.images AS
+# product_images) are passed to decode= as an extra {alias: converter} dict.
+TABLE_COLUMNS = {
+    'orders': {
+        'total_amount': 'float', 'subtotal': 'float', 'shipping_cost': 'float',
+        'tax_amount': 'float', 'discount_amount': 'float',
+        'shipping_address': 'json_object', 'billing_address': 'json_object',
+        'tracking_info': 'json_object'
+    },
+    'order_items': {'price': 'float'},
+    'order_returns': {'return_amount': 'float'},
+    'order_refunds': {'refund_amount': 'float'},
+    'products': {
+        'price': 'float', 'sale_price': 'float', 'weight': 'float',
+        'average_rating': 'float', 'images': 'json_list', 'tags': 'json_list'
+    },
+    'product_variants': {'price_adjustment': 'float'},
+    'categories': {'discount_rules': 'json_object', 'page_customization': 'json_object'},
+    'blog_posts': {'categories': 'json_list', 'tags': 'json_list', 'meta_data': 'json_object'},
+    'blog_newsletter_subscribers': {'preferences': 'json_object'},
+    'product_reviews': {
+        'review_images': 'json_list', 'review_videos': 'json_list', 'helpfulness_score': 'float'
+    },
+    'coupons': {
+        'value': 'float', 'minimum_amount': 'float', 'maximum_amount': 'float',
+        'max_discount_amount': 'float', 'buy_x_get_y_config': 'json_object'
+    },
+    'flash_sales': {'discount_value': 'float', 'max_discount_amount': 'float'},
+    'suppliers': {'address': 'json_object'},
+    'purchase_orders': {'total_amount': 'float'},
+    'api_integrations': {'configuration': 'json_object'},
+    'api_logs': {'request_data': 'json', 'response_data': 'json', 'response_time': 'float'}
+}
+
+
+# ======================= ROW DECODER =======================
+
+_decoder_cache = {}  # (spec key, result shape) -> decoder
+_decoder_lock = threading.Lock()
+
+
+def _spec_key(decode):
+    """Hashable key for a decode= argument (table name, dict or a list of them)"""
+    if decode is True:
+        return ()  # decode by MySQL column type only
+    if isinstance(decode, (str, dict)):
+        decode = [decode]
+    return tuple(
+        tuple(sorted(part.items())) if isinstance(part, dict) else part
+        for part in decode
+    )
+
+
+def _column_converters(spec_key):
+    columns = {}
+    for part in spec_key:
+        if isinstance(part, str):
+            mapping = TABLE_COLUMNS.get(part)
+            if mapping is None:
+                raise ValueError(f"No column decoders registered for table '{part}'")
+            columns.update(mapping)
+        else:
+            columns.update(dict(part))
+    return columns
+
+
+def _compile(spec_key, description):
+    """Resolve every column of a result shape to its converter once"""
+    columns = _column_converters(spec_key)
+    plan = []
+    for column in description:
+        name, type_code = column[0], column[1]
+        converter = columns.get(name)
+        if converter is None:
+            # Unregistered columns still decode by their MySQL type
+            if type_code in _DECIMAL_TYPES:
+                converter = 'float'
+            elif type_code == _JSON_TYPE:
+                converter = 'json'
+            else:
+                continue
+        plan.append((name, CONVERTERS[converter]))
+    plan = tuple(plan)
+
+    def decode_rows(rows):
+        for row in rows:
+            for name, convert in plan:
+                row[name] = convert(row[name])
+        return rows
+    return decode_rows
+
+
+def row_decoder(decode, description):
+    """Cached decoder for the columns in a cursor description"""
+    spec_key = _spec_key(decode)
+    shape = tuple((column[0], column[1]) for column in description)
+    key = (spec_key, shape)
+    decoder = _decoder_cache.get(key)
+    if decoder is None:
+        decoder = _compile(spec_key, description)
+        with _decoder_lock:
+            _decoder_cache[key] = decoder
+    return decoder
@@ -0,0 +1,231 @@
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+import traceback
+from contextlib import contextmanager
+
+from flask import g, has_app_context, has_request_context, request
+
+from config import Config
+
+slow_query_logger = logging.getLogger('db.slow_query')
+n_plus_one_logger = logging.getLogger('db.n_plus_one')
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*\?\s*,)*\s*\?\s*\)', re.IGNORECASE)
+_PLACEHOLDER = re.compile(r'%s|%\(\w+\)s')
+
+# Frames from these files are skipped when reporting where a query came from
+_INTERNAL_FILES = ('db_instrumentation.py', 'db_pool.py', 'models.py', 'contextlib.py')
+
+_local = threading.local()
+
+
+class NPlusOneError(Exception):
+    """Raised when the same statement runs too many times in one request"""
+    pass
+
+
+def compact_sql(query, max_length=500):
+    """Collapse whitespace so multi-line SQL fits on one log line"""
+    sql = _WHITESPACE.sub(' ', query).strip()
+    return sql if len(sql) <= max_length else sql[:max_length] + '...'
+
+
+def fingerprint(query):
+    """Normalize SQL so statements differing only in literals compare equal"""
+    sql = _STRING_LITERAL.sub('?', query)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip().lower()
+
+
+def call_site():
+    """First stack frame outside the database layer, as 'file:line in function'"""
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        if os.path.basename(frame.filename) not in _INTERNAL_FILES:
+            return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return None
+
+
+class QueryStats:
+    """Query counters for a single request"""
+
+    def __init__(self, keep_slowest=5):
+        self.keep_slowest = keep_slowest
+        self.count = 0
+        self.total_time = 0.0
+        self.rows = 0
+        self._slowest = []  # min-heap of (elapsed, seq, sql)
+        self.fingerprints = {}  # fingerprint -> executions
+        self.reported = set()  # fingerprints already flagged as N+1
+        self._lock = threading.Lock()  # AsyncDatabase workers record concurrently
+
+    def record(self, query, elapsed, rows=0):
+        """Add one statement, returning (fingerprint, executions so far)"""
+        key = fingerprint(query)
+        with self._lock:
+            return self._record(query, key, elapsed, rows)
+
+    def _record(self, query, key, elapsed, rows):
+        self.count += 1
+        self.total_time += elapsed
+        self.rows += rows or 0
+        entry = (elapsed, self.count, query)
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, entry)
+        elif elapsed > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+        self.fingerprints[key] = self.fingerprints.get(key, 0) + 1
+        return key, self.fingerprints[key]
+
+    def slowest(self):
+        return [
+            {'sql': compact_sql(sql), 'ms': round(elapsed * 1000, 2)}
+            for elapsed, _, sql in sorted(self._slowest, reverse=True)
+        ]
+
+    def summary(self):
+        return {
+            'queries': self.count,
+            'db_time_ms': round(self.total_time * 1000, 2),
+            'rows': self.rows,
+            'slowest': self.slowest()
+        }
+
+
+def start_request_stats():
+    """Attach fresh query stats to the current request"""
+    g.db_stats = QueryStats()
+
+
+def current_stats():
+    stats = g.get('db_stats') if has_app_context() else None
+    if stats is None:
+        guard = getattr(_local, 'guard', None)
+        stats = guard['stats'] if guard else None
+    return stats
+
+
+def n_plus_one_settings():
+    """(mode, threshold) for the detector - an active guard overrides Config"""
+    guard = getattr(_local, 'guard', None)
+    if guard:
+        return guard['mode'], guard['threshold']
+    return Config.DB_N_PLUS_ONE_MODE, Config.DB_N_PLUS_ONE_THRESHOLD
+
+
+def check_n_plus_one(stats, key, executions):
+    """Warn about or raise on a fingerprint that ran more than threshold times"""
+    mode, threshold = n_plus_one_settings()
+    if mode not in ('warn', 'raise') or executions <= threshold or key in stats.reported:
+        return
+    stats.reported.add(key)
+
+    violation = {
+        'event': 'n_plus_one',
+        'executions': executions,
+        'threshold': threshold,
+        'sql': compact_sql(key),
+        'call_site': call_site(),
+        'endpoint': request.endpoint if has_request_context() else None
+    }
+    guard = getattr(_local, 'guard', None)
+    if guard:
+        guard['violations'].append(violation)
+
+    n_plus_one_logger.warning(json.dumps(violation))
+    if mode == 'raise':
+        raise NPlusOneError(
+            f"Query ran {executions} times (threshold {threshold}) at {violation['call_site']}: {violation['sql']}"
+        )
+
+
+@contextmanager
+def n_plus_one_guard(threshold=None, mode='raise'):
+    """Fail a block of code that repeats the same query more than threshold times.
+    
+    Works inside and outside requests, so a pytest fixture can wrap a test:
+    
+        @pytest.fixture
+        def no_n_plus_one():
+            with n_plus_one_guard(threshold=5):
+                yield
+    
+    Violations are re-raised on exit even if a blueprint's error handler
+    swallowed the NPlusOneError and returned a 500.
+    """
+    previous = getattr(_local, 'guard', None)
+    guard = {
+        'mode': mode,
+        'threshold': Config.DB_N_PLUS_ONE_THRESHOLD if threshold is None else threshold,
+        'stats': QueryStats(),
+        'violations': []
+    }
+    _local.guard = guard
+    try:
+        yield guard['violations']
+    finally:
+        _local.guard = previous
+
+    if guard['violations'] and mode == 'raise':
+        raise NPlusOneError(
+            'N+1 queries detected:\n' + '\n'.join(
+                f"  {v['executions']}x at {v['call_site']}: {v['sql']}" for v in guard['violations']
+            )
+        )
+
+
+def record_query(query, elapsed, rows=0):
+    """Record one finished statement and log it if it crossed the slow threshold"""
+    stats = current_stats()
+    if stats is not None:
+        key, executions = stats.record(query, elapsed, rows)
+        check_n_plus_one(stats, key, executions)
+
+    if elapsed * 1000 >= Config.DB_SLOW_QUERY_MS:
+        slow_query_logger.warning(json.dumps({
+            'event': 'slow_query',
+            'duration_ms': round(elapsed * 1000, 2),
+            'rows': rows,
+            'sql': compact_sql(query),
+            'endpoint': request.endpoint if has_request_context() else None,
+            'path': request.path if has_request_context() else None
+        }))
+
+
+def log_slow_request(stats, response):
+    """Log a request whose statements together crossed the slow threshold, with its slowest ones"""
+    if stats.total_time * 1000 < Config.DB_SLOW_QUERY_MS:
+        return
+    slow_query_logger.warning(json.dumps({
+        'event': 'slow_request',
+        'endpoint': request.endpoint if has_request_context() else None,
+        'path': request.path if has_request_context() else None,
+        'status': response.status_code,
+        **stats.summary()
+    }))
+
+
+def add_stats_headers(response):
+    """Expose the request's query stats as Server-Timing / X-DB-* headers (and log slow requests)"""
+    stats = current_stats()
+    if stats is None:
+        return response
+    log_slow_request(stats, response)
+    if not Config.DB_QUERY_STATS_HEADERS:
+        return response
+
+    db_time_ms = round(stats.total_time * 1000, 2)
+    response.headers.add('Server-Timing', f'db;dur={db_time_ms};desc="{stats.count} queries"')
+    response.headers['X-DB-Queries'] = str(stats.count)
+    response.headers['X-DB-Time'] = str(db_time_ms)
+    response.headers['X-DB-Rows'] = str(stats.rows)
+    return response
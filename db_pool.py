@@ -0,0 +1,300 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+import mysql.connector
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection frees up within the wait timeout"""
+    pass
+
+
+class StatementCache:
+    """LRU cache of server-side prepared cursors for a single connection"""
+
+    def __init__(self, conn, capacity):
+        self.conn = conn
+        self.capacity = max(int(capacity), 1)
+        self._cursors = OrderedDict()  # sql text -> prepared cursor
+
+    def get(self, sql):
+        """Return (cursor, hit, evicted) for sql, preparing it on a miss"""
+        cursor = self._cursors.get(sql)
+        if cursor is not None:
+            self._cursors.move_to_end(sql)
+            return cursor, True, 0
+
+        evicted = 0
+        while len(self._cursors) >= self.capacity:
+            _, old_cursor = self._cursors.popitem(last=False)
+            self._close_cursor(old_cursor)
+            evicted += 1
+
+        # The statement is prepared on the server on first execute and
+        # stays prepared for as long as the cursor is kept open
+        cursor = self.conn.cursor(prepared=True, dictionary=True)
+        self._cursors[sql] = cursor
+        return cursor, False, evicted
+
+    def discard(self, sql):
+        cursor = self._cursors.pop(sql, None)
+        if cursor is not None:
+            self._close_cursor(cursor)
+
+    def close(self):
+        while self._cursors:
+            _, cursor = self._cursors.popitem()
+            self._close_cursor(cursor)
+
+    def __len__(self):
+        return len(self._cursors)
+
+    @staticmethod
+    def _close_cursor(cursor):
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of MySQL connections"""
+
+    def __init__(self, connect_args, min_size=2, max_size=10, timeout=10,
+                 recycle=3600, ping_interval=30, prepared_cache_size=64, name='primary'):
+        self.connect_args = connect_args
+        self.max_size = max(int(max_size), 1)
+        self.min_size = min(max(int(min_size), 0), self.max_size)
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+        self.prepared_cache_size = prepared_cache_size
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, returned_at), most recently used on the right
+        self._born = {}  # id(conn) -> created_at
+        self._statements = {}  # id(conn) -> StatementCache
+        self._size = 0
+        self._in_use = 0
+        self._warmed = False
+
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'created': 0,
+            'recycled': 0,
+            'discarded': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0,
+            'prepared_hits': 0,
+            'prepared_misses': 0,
+            'prepared_evictions': 0
+        }
+
+    # ======================= CHECKOUT / CHECKIN =======================
+
+    def acquire(self, timeout=None):
+        """Check a connection out of the pool, waiting up to timeout seconds"""
+        if not self._warmed:
+            self._warm_up()
+
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve a slot, connect outside the lock
+                    self._size += 1
+                    conn, returned_at = None, None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f"No connection available in pool '{self.name}' after {timeout}s "
+                        f"({self._in_use} in use, max {self.max_size})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            self._in_use += 1
+            wait_time = time.monotonic() - started
+            self._stats['checkouts'] += 1
+            self._stats['total_wait'] += wait_time
+            self._stats['max_wait'] = max(self._stats['max_wait'], wait_time)
+            if waited:
+                self._stats['waits'] += 1
+
+        try:
+            if conn is None:
+                return self._connect()
+            if not self._is_usable(conn, returned_at):
+                self._close(conn)
+                with self._cond:
+                    self._size += 1
+                return self._connect()
+            return conn
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, closing it if broken or too old"""
+        if not discard:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        if discard or self._is_expired(conn):
+            self._close(conn)
+            with self._cond:
+                self._in_use -= 1
+                if discard:
+                    self._stats['discarded'] += 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def prepared_cursor(self, conn, sql):
+        """Cached prepared cursor for sql on a checked-out connection"""
+        cache = self._statements.get(id(conn))
+        if cache is None:
+            cache = StatementCache(conn, self.prepared_cache_size)
+            self._statements[id(conn)] = cache
+
+        cursor, hit, evicted = cache.get(sql)
+        with self._cond:
+            self._stats['prepared_hits' if hit else 'prepared_misses'] += 1
+            self._stats['prepared_evictions'] += evicted
+        return cursor
+
+    def discard_prepared(self, conn, sql):
+        """Drop a prepared statement after an error left its cursor unusable"""
+        cache = self._statements.get(id(conn))
+        if cache is not None:
+            cache.discard(sql)
+
+    def close_all(self):
+        """Close every idle connection; checked-out ones close on release"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _ in idle:
+            self._close(conn)
+        with self._cond:
+            self._warmed = False
+            self._cond.notify_all()
+
+    def stats(self):
+        """Snapshot of pool usage and wait times"""
+        with self._cond:
+            checkouts = self._stats['checkouts']
+            return {
+                'name': self.name,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'checkouts': checkouts,
+                'waits': self._stats['waits'],
+                'timeouts': self._stats['timeouts'],
+                'created': self._stats['created'],
+                'recycled': self._stats['recycled'],
+                'discarded': self._stats['discarded'],
+                'avg_wait_ms': round(self._stats['total_wait'] / checkouts * 1000, 3) if checkouts else 0,
+                'max_wait_ms': round(self._stats['max_wait'] * 1000, 3),
+                'prepared_statements': sum(len(cache) for cache in list(self._statements.values())),
+                'prepared_hits': self._stats['prepared_hits'],
+                'prepared_misses': self._stats['prepared_misses'],
+                'prepared_evictions': self._stats['prepared_evictions']
+            }
+
+    # ======================= INTERNALS =======================
+
+    def _warm_up(self):
+        """Open min_size connections the first time the pool is used"""
+        with self._cond:
+            if self._warmed:
+                return
+            self._warmed = True
+            missing = max(self.min_size - self._size, 0)
+            self._size += missing
+
+        opened = 0
+        try:
+            for _ in range(missing):
+                conn = self._connect()
+                with self._cond:
+                    self._idle.append((conn, time.monotonic()))
+                    self._cond.notify()
+                opened += 1
+        except Exception:
+            # Database not reachable yet - give the slots back and connect on demand
+            with self._cond:
+                self._size -= missing - opened
+                self._warmed = False
+
+    def _connect(self):
+        conn = mysql.connector.connect(**self.connect_args)
+        with self._cond:
+            self._born[id(conn)] = time.monotonic()
+            self._stats['created'] += 1
+        return conn
+
+    def _close(self, conn):
+        with self._cond:
+            self._born.pop(id(conn), None)
+            cache = self._statements.pop(id(conn), None)
+            self._size -= 1
+        if cache is not None:
+            cache.close()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_expired(self, conn):
+        born = self._born.get(id(conn))
+        if born is None or not self.recycle:
+            return False
+        if time.monotonic() - born > self.recycle:
+            with self._cond:
+                self._stats['recycled'] += 1
+            return True
+        return False
+
+    def _is_usable(self, conn, returned_at):
+        """Validate an idle connection before handing it out"""
+        if self._is_expired(conn):
+            return False
+        # Only ping connections that sat idle long enough to have been dropped
+        if returned_at is not None and time.monotonic() - returned_at < self.ping_interval:
+            return True
+        try:
+            if conn.is_connected():
+                return True
+        except Exception:
+            pass
+        with self._cond:
+            self._stats['discarded'] += 1
+        return False
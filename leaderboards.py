@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+from datetime import date, timedelta
+
+from config import Config
+from models import Database
+
+logger = logging.getLogger('leaderboards')
+
+STATE_NAME = 'leaderboards'
+
+PRODUCTS_BY_UNITS = 'product_units'
+PRODUCTS_BY_REVENUE = 'product_revenue'
+CUSTOMERS_BY_SPEND = 'customer_spend'
+
+
+class Leaderboards:
+    """Top-N products and customers for the standard 7/30/90 day windows.
+
+    Rankings are stored in sales_leaderboards and recomputed from the daily
+    rollups (never order_items). SalesRollup.refresh() only records the
+    newest day it rebuilt (mark_changed); refresh() then rebuilds the
+    windows that day falls in - e.g. after an order becomes paid - and every
+    window once a day so old days drop out. refresh() runs off the request
+    path, from the snapshot scheduler thread (ensure_fresh) or
+    `python sales_rollup.py refresh`. Reads for other windows or longer
+    lists fall back to summing the rollups directly.
+    """
+    WINDOWS = (7, 30, 90)
+    SIZE = 100  # entries kept per board and window
+
+    _last_refresh = 0.0
+    _refresh_lock = threading.Lock()
+
+    # board -> (source rollup, entity column, aggregated columns, ranking)
+    _BOARDS = {
+        PRODUCTS_BY_UNITS: (
+            'product_sales_daily_rollup', 'product_id',
+            'SUM(units_sold) AS units, SUM(revenue) AS revenue, 0 AS order_count', 'units DESC, revenue DESC'
+        ),
+        PRODUCTS_BY_REVENUE: (
+            'product_sales_daily_rollup', 'product_id',
+            'SUM(units_sold) AS units, SUM(revenue) AS revenue, 0 AS order_count', 'revenue DESC, units DESC'
+        ),
+        CUSTOMERS_BY_SPEND: (
+            'customer_sales_daily_rollup', 'customer_id',
+            '0 AS units, SUM(total_spent) AS revenue, SUM(order_count) AS order_count', 'revenue DESC, order_count DESC'
+        )
+    }
+
+    @staticmethod
+    def covers(days, limit):
+        """True when a stored board can answer a top-limit query over days"""
+        return days in Leaderboards.WINDOWS and 0 < limit <= Leaderboards.SIZE
+
+    @staticmethod
+    def mark_changed(days):
+        """Record that rollup days were rebuilt; keeps the newest one (high_water_mark).
+
+        One statement, run inside SalesRollup.refresh()'s transaction.
+        """
+        if not days:
+            return
+        newest = max(days)
+        Database.execute_query(
+            """INSERT INTO rollup_state (name, high_water_mark) VALUES (%s, %s)
+               ON DUPLICATE KEY UPDATE high_water_mark = GREATEST(COALESCE(high_water_mark, VALUES(high_water_mark)),
+                                                                 VALUES(high_water_mark))""",
+            (STATE_NAME, newest)
+        )
+
+    @staticmethod
+    def refresh(rebuild_all=False):
+        """Rebuild the windows holding a changed day, or all of them once the date rolled over.
+
+        Returns the windows rebuilt. A day changed during the rebuild stays
+        marked and is picked up by the next refresh.
+        """
+        state = Database.execute_query(
+            "SELECT high_water_mark, refreshed_at FROM rollup_state WHERE name = %s", (STATE_NAME,), fetch=True
+        )
+        changed = state[0]['high_water_mark'] if state else None
+        built_on = state[0]['refreshed_at'].date() if state and state[0]['refreshed_at'] else None
+
+        today = date.today()
+        if rebuild_all or built_on != today:
+            windows = Leaderboards.WINDOWS
+        elif changed is not None:
+            # Windows are nested, so the newest changed day decides which ones it reaches
+            windows = tuple(days for days in Leaderboards.WINDOWS if changed.date() >= today - timedelta(days=days))
+        else:
+            windows = ()
+
+        with Database.transaction():
+            if windows:
+                Leaderboards.rebuild(windows)
+            if windows or changed is not None:
+                Database.execute_query(
+                    """INSERT INTO rollup_state (name, refreshed_at) VALUES (%s, NOW())
+                       ON DUPLICATE KEY UPDATE refreshed_at = NOW(),
+                           high_water_mark = IF(high_water_mark <=> %s, NULL, high_water_mark)""",
+                    (STATE_NAME, changed)
+                )
+        return windows
+
+    @staticmethod
+    def ensure_fresh(max_lag=None):
+        """Refresh at most once per max_lag seconds per process; failures are logged"""
+        max_lag = Config.SALES_ROLLUP_MAX_LAG if max_lag is None else max_lag
+        if time.monotonic() - Leaderboards._last_refresh < max_lag:
+            return
+        if not Leaderboards._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            Leaderboards.refresh()
+        except Exception as e:
+            logger.warning('Leaderboard refresh skipped: %s', e)
+        finally:
+            Leaderboards._last_refresh = time.monotonic()
+            Leaderboards._refresh_lock.release()
+
+    @staticmethod
+    def rebuild(windows=WINDOWS):
+        """Recompute every board for the given windows from the daily rollups"""
+        placeholders = ','.join(['%s'] * len(windows))
+        Database.execute_query(
+            f"DELETE FROM sales_leaderboards WHERE window_days IN ({placeholders})", tuple(windows)
+        )
+        for board, (table, entity, columns, ranking) in Leaderboards._BOARDS.items():
+            for days in windows:
+                Database.execute_query(f"""
+                INSERT INTO sales_leaderboards (board, window_days, position, entity_id, units, revenue, order_count)
+                SELECT %s, %s, ROW_NUMBER() OVER (ORDER BY {ranking}, entity_id), entity_id, units, revenue, order_count
+                FROM (
+                    SELECT {entity} AS entity_id, {columns}
+                    FROM {table}
+                    WHERE sales_date >= %s AND payment_status = 'paid'
+                    GROUP BY {entity}
+                    ORDER BY {ranking}, {entity}
+                    LIMIT %s
+                ) ranked
+                """, (board, days, date.today() - timedelta(days=days), Leaderboards.SIZE))
@@ -0,0 +1,266 @@
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import date
+
+from aggregates import ConditionalAggregate, time_windows
+from config import Config
+from models import Database
+
+logger = logging.getLogger('live_counters')
+
+
+class LiveCounters:
+    """Dashboard counters kept current by write hooks and pushed over SSE.
+
+    Counters are seeded from the database when the first subscriber
+    connects, after midnight, and every LIVE_COUNTERS_RESEED_SECONDS while
+    anyone is subscribed; between seeds the order, payment, stock and
+    customer write paths adjust them in memory and every change is pushed
+    to subscribers as a delta. Counters live in this process only, so the
+    periodic re-seed is what brings in writes handled by other app
+    processes.
+
+    A seed reads all counts in one transaction (a single read view).
+    Deltas reported while it runs are replayed on the new totals instead
+    of being lost; only a write whose hook fires after the seed starts but
+    that committed before its first read can be counted twice, until the
+    next re-seed.
+    """
+    HEARTBEAT_SECONDS = 15
+    QUEUE_SIZE = 100
+
+    _counters = None
+    _day = None
+    _seeded_at = 0.0
+    _pending = None  # deltas applied while a seed runs, replayed on its totals
+    _lock = threading.Lock()
+    _seed_lock = threading.Lock()  # one seed at a time
+    _subscribers = set()
+
+    # ======================= STATE =======================
+
+    @staticmethod
+    def _seed():
+        today = time_windows()['today']
+        orders = (ConditionalAggregate('orders')
+                  .where('created_at >= %s', (today,))
+                  .count('orders_today')
+                  .sum('revenue_today', 'total_amount', "payment_status = 'paid'"))
+        pending = ConditionalAggregate('orders').where("status = 'pending'").count('pending_orders')
+        customers = ConditionalAggregate('customers').where('created_at >= %s', (today,)).count('new_customers_today')
+        products = (ConditionalAggregate('product_low_stock')
+                    .count('low_stock')
+                    .count('out_of_stock', 'stock_quantity = 0'))
+
+        counters = {}
+        with Database.transaction():  # one read view for every count
+            for aggregate in (orders, pending, customers, products):
+                query, params = aggregate.query()
+                counters.update(Database.execute_query(query, params, fetch=True, decode=True)[0])
+        return counters
+
+    @staticmethod
+    def _reseed():
+        """Recount from the database and install the totals; call with _seed_lock held"""
+        with LiveCounters._lock:
+            LiveCounters._pending = []
+        try:
+            counters = LiveCounters._seed()
+            with LiveCounters._lock:
+                for changes in LiveCounters._pending:
+                    for name, delta in changes.items():
+                        counters[name] = counters.get(name, 0) + delta
+                LiveCounters._counters = counters
+                LiveCounters._day = date.today()
+                LiveCounters._seeded_at = time.monotonic()
+                return LiveCounters._rounded(counters)
+        finally:
+            with LiveCounters._lock:
+                LiveCounters._pending = None
+
+    @staticmethod
+    def _current():
+        """Rounded counters if they are from today and recently seeded, else None"""
+        with LiveCounters._lock:
+            if (LiveCounters._counters is not None and LiveCounters._day == date.today()
+                    and time.monotonic() - LiveCounters._seeded_at < Config.LIVE_COUNTERS_RESEED_SECONDS):
+                return LiveCounters._rounded(LiveCounters._counters)
+        return None
+
+    @staticmethod
+    def snapshot():
+        """Current counters, seeding them on first use, after the day rolls over and when due"""
+        counters = LiveCounters._current()
+        if counters is not None:
+            return counters
+        with LiveCounters._seed_lock:
+            counters = LiveCounters._current()  # another subscriber may have just seeded
+            return counters if counters is not None else LiveCounters._reseed()
+
+    @staticmethod
+    def apply(**changes):
+        """Add deltas to the counters and push them to subscribers"""
+        changes = {name: delta for name, delta in changes.items() if delta}
+        if not changes:
+            return
+        with LiveCounters._lock:
+            if LiveCounters._pending is not None:
+                LiveCounters._pending.append(changes)
+            if LiveCounters._counters is None:
+                return  # nobody has subscribed yet
+            if LiveCounters._day != date.today():
+                LiveCounters._counters = None  # today's counters restart - subscribers re-seed
+                return
+            for name, delta in changes.items():
+                LiveCounters._counters[name] = LiveCounters._counters.get(name, 0) + delta
+            event = {'changes': changes, 'counters': LiveCounters._rounded(LiveCounters._counters)}
+        LiveCounters._publish('delta', event)
+
+    @staticmethod
+    def resync(force=True):
+        """Recount from the database and push the totals.
+
+        force=True after a write whose deltas are unknown (bulk updates);
+        otherwise only when a re-seed is due and no other thread is seeding.
+        """
+        if LiveCounters._counters is None:
+            return
+        if not force and LiveCounters._current() is not None:
+            return
+        if not LiveCounters._seed_lock.acquire(blocking=force):
+            return
+        try:
+            counters = LiveCounters._reseed()
+        finally:
+            LiveCounters._seed_lock.release()
+        LiveCounters._publish('delta', {'changes': {}, 'counters': counters})
+
+    @staticmethod
+    def alert(alert):
+        """Push a one-off alert (e.g. a product crossing its low-stock threshold)"""
+        LiveCounters._publish('alert', alert)
+
+    @staticmethod
+    def _publish(name, data):
+        with LiveCounters._lock:
+            subscribers = list(LiveCounters._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((name, data))
+            except queue.Full:
+                pass  # slow client - it gets the totals with the next delta
+
+    @staticmethod
+    def _rounded(counters):
+        return {name: round(value, 2) if isinstance(value, float) else value for name, value in counters.items()}
+
+    # ======================= SUBSCRIBERS =======================
+
+    @staticmethod
+    def full():
+        """True when this process already serves LIVE_STREAM_MAX_SUBSCRIBERS streams"""
+        with LiveCounters._lock:
+            return len(LiveCounters._subscribers) >= Config.LIVE_STREAM_MAX_SUBSCRIBERS
+
+    @staticmethod
+    def stream():
+        """SSE generator: a snapshot event, then delta and alert events as they happen.
+
+        Each stream holds a worker thread, so a process serves at most
+        LIVE_STREAM_MAX_SUBSCRIBERS of them, each for at most
+        LIVE_STREAM_MAX_SECONDS; the browser's EventSource then reconnects.
+        """
+        subscriber = queue.Queue(maxsize=LiveCounters.QUEUE_SIZE)
+        with LiveCounters._lock:
+            if len(LiveCounters._subscribers) >= Config.LIVE_STREAM_MAX_SUBSCRIBERS:
+                subscriber = None
+            else:
+                LiveCounters._subscribers.add(subscriber)
+        if subscriber is None:
+            yield 'retry: 30000\n\n' + LiveCounters._event('error', {'error': 'Too many live dashboard streams'})
+            return
+        try:
+            deadline = time.monotonic() + Config.LIVE_STREAM_MAX_SECONDS
+            yield 'retry: 1000\n\n' + LiveCounters._event('snapshot', LiveCounters.snapshot())
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                LiveCounters.resync(force=False)  # pushes fresh totals to every subscriber when due
+                try:
+                    name, data = subscriber.get(timeout=min(LiveCounters.HEARTBEAT_SECONDS, remaining))
+                except queue.Empty:
+                    if LiveCounters._counters is None or LiveCounters._day != date.today():
+                        yield LiveCounters._event('snapshot', LiveCounters.snapshot())
+                    else:
+                        yield ': keepalive\n\n'
+                    continue
+                yield LiveCounters._event(name, data)
+        finally:
+            with LiveCounters._lock:
+                LiveCounters._subscribers.discard(subscriber)
+
+    @staticmethod
+    def _event(name, data):
+        return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+# ======================= WRITE HOOKS =======================
+# Called after the write has committed; a failing hook never fails the write.
+
+def _safe(hook):
+    def wrapper(*args, **kwargs):
+        try:
+            hook(*args, **kwargs)
+        except Exception as e:
+            logger.warning('Live counter hook %s failed: %s', hook.__name__, e)
+    wrapper.__name__ = hook.__name__
+    return wrapper
+
+
+@_safe
+def order_created(total_amount, status='pending', payment_status='pending'):
+    LiveCounters.apply(
+        orders_today=1,
+        revenue_today=float(total_amount) if payment_status == 'paid' else 0,
+        pending_orders=1 if status == 'pending' else 0
+    )
+
+
+@_safe
+def order_status_changed(old_status, new_status):
+    if old_status != new_status:
+        LiveCounters.apply(pending_orders=(new_status == 'pending') - (old_status == 'pending'))
+
+
+@_safe
+def payment_status_changed(order, new_payment_status):
+    """order is the orders row as it was before the update"""
+    if order['created_at'].date() != date.today():
+        return
+    was_paid = order['payment_status'] == 'paid'
+    is_paid = new_payment_status == 'paid'
+    if was_paid != is_paid:
+        amount = float(order['total_amount'])
+        LiveCounters.apply(revenue_today=amount if is_paid else -amount)
+
+
+@_safe
+def stock_index_changed(result):
+    """result is LowStockIndex.sync()'s summary"""
+    LiveCounters.apply(low_stock=result['low_stock'], out_of_stock=result['out_of_stock'])
+    for alert in result['alerts']:
+        LiveCounters.alert(alert)
+
+
+@_safe
+def customer_created():
+    LiveCounters.apply(new_customers_today=1)
+
+
+@_safe
+def resync():
+    LiveCounters.resync()
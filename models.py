@@ -15,33 +15,357 @@ class Product:
             json.dumps(data.get('tags', [])), data.get('meta_title', ''),
             data.get('meta_description', ''))
 import mysql.connector
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
 from datetime import datetime, timedelta
 import json
 import bcrypt
+from flask import g, has_app_context, has_request_context, request
 from config import Config
+from db_pool import ConnectionPool
+from db_instrumentation import record_query
+from db_decoders import row_decoder
 
 class Database:
+    _pool = None
+    _replica_pool = None
+    _pool_lock = threading.Lock()
+    _local = threading.local()  # connection state outside a Flask app context
+    
+    @staticmethod
+    def get_pool():
+        """Lazily create the process-wide connection pool"""
+        if Database._pool is None:
+            with Database._pool_lock:
+                if Database._pool is None:
+                    Database._pool = ConnectionPool(
+                        Config.get_db_connection_string(), **Config.get_db_pool_settings()
+                    )
+        return Database._pool
+    
+    @staticmethod
+    def get_replica_pool():
+        """Pool for the read replica, or None when no replica is configured"""
+        replica_args = Config.get_db_replica_connection_string()
+        if not replica_args:
+            return None
+        if Database._replica_pool is None:
+            with Database._pool_lock:
+                if Database._replica_pool is None:
+                    Database._replica_pool = ConnectionPool(
+                        replica_args, name='replica', **Config.get_db_pool_settings()
+                    )
+        return Database._replica_pool
+    
+    @staticmethod
+    def _pool_for(replica=False):
+        return Database.get_replica_pool() if replica else Database.get_pool()
+    
     @staticmethod
     def get_connection():
-        return mysql.connector.connect(**Config.get_db_connection_string())
+        return Database.get_pool().acquire()
+    
+    @staticmethod
+    def release_connection(conn, discard=False, replica=False):
+        Database._pool_for(replica).release(conn, discard=discard)
+    
+    @staticmethod
+    def pool_stats():
+        return Database.get_pool().stats()
+    
+    @staticmethod
+    def replica_pool_stats():
+        replica_pool = Database.get_replica_pool()
+        return replica_pool.stats() if replica_pool else None
+    
+    # ======================= READ REPLICA ROUTING =======================
+    
+    @staticmethod
+    def reads_from_replica():
+        """Routing policy for read queries in the current request.
+        
+        Reads go to the replica when one is configured and the request's
+        blueprint is listed in Config.DB_REPLICA_BLUEPRINTS or the view is
+        decorated with use_read_replica - unless the request is inside a
+        transaction or has already written (read-your-writes).
+        """
+        if not Config.DB_REPLICA_HOST or not has_app_context():
+            return False
+        if g.get('db_primary_only') or g.get('db_tx_depth', 0) > 0:
+            return False
+        if g.get('db_read_replica'):
+            return True
+        return has_request_context() and request.blueprint in Config.DB_REPLICA_BLUEPRINTS
     
     @staticmethod
-    def execute_query(query, params=None, fetch=False):
-        conn = Database.get_connection()
-        cursor = conn.cursor(dictionary=True)
+    def use_primary():
+        """Pin the rest of the request to the primary (called automatically after a write)"""
+        if has_app_context():
+            g.db_primary_only = True
+    
+    # ======================= CONNECTION SCOPE =======================
+    
+    @staticmethod
+    def _state():
+        """Per-request state (Flask g) or per-thread state for scripts/jobs"""
+        return g if has_app_context() else Database._local
+    
+    @staticmethod
+    def _isolated():
+        """True on AsyncDatabase workers, which never share the request's connection"""
+        return getattr(Database._local, 'isolated', False)
+    
+    @staticmethod
+    def _checkout(replica=False):
+        """Return (connection, owned, replica). Owned connections go back to the pool after one query."""
+        isolated = Database._isolated()
+        if replica:
+            conn = None if isolated else g.get('db_replica_conn')
+            if conn is None:
+                try:
+                    conn = Database.get_replica_pool().acquire()
+                except Exception:
+                    # Replica unavailable - serve the rest of the request from the primary
+                    Database.use_primary()
+                    return Database._checkout()
+                if isolated:
+                    return conn, True, True
+                g.db_replica_conn = conn
+            return conn, False, True
+        
+        if isolated:
+            return Database.get_connection(), True, False
+        state = Database._state()
+        conn = getattr(state, 'db_conn', None)
+        if conn is not None:
+            return conn, False, False
+        if has_app_context():
+            # Bind one connection to the request; released in close_request_connection
+            state.db_conn = Database.get_connection()
+            return state.db_conn, False, False
+        return Database.get_connection(), True, False
+    
+    @staticmethod
+    def _drop_bound_connection(replica=False):
+        """Discard a broken request/transaction connection so the next query gets a fresh one"""
+        state = Database._state()
+        attr = 'db_replica_conn' if replica else 'db_conn'
+        conn = getattr(state, attr, None)
+        if conn is not None:
+            setattr(state, attr, None)
+            Database.release_connection(conn, discard=True, replica=replica)
+    
+    @staticmethod
+    def in_transaction():
+        if Database._isolated():
+            return False
+        return getattr(Database._state(), 'db_tx_depth', 0) > 0
+    
+    @staticmethod
+    @contextmanager
+    def transaction():
+        """Run every Database call in the block on one connection with a single commit.
+        
+        Nested blocks join the outermost transaction. Any exception rolls the
+        whole unit back and is re-raised.
+        """
+        state = Database._state()
+        depth = getattr(state, 'db_tx_depth', 0)
+        if depth > 0:
+            state.db_tx_depth = depth + 1
+            try:
+                yield state.db_conn
+            finally:
+                state.db_tx_depth -= 1
+            return
+        
+        bound = getattr(state, 'db_conn', None)
+        conn = bound if bound is not None else Database.get_connection()
+        state.db_conn = conn
+        state.db_tx_depth = 1
+        broken = False
         try:
+            conn.start_transaction()
+            yield conn
+            conn.commit()
+        except Exception as e:
+            broken = Database._is_connection_error(e)
+            if not broken:
+                conn.rollback()
+            raise
+        finally:
+            state.db_tx_depth = 0
+            if broken:
+                Database._drop_bound_connection()
+            elif not has_app_context():
+                # Outside a request the connection only lives as long as the transaction
+                state.db_conn = None
+                Database.release_connection(conn)
+    
+    @staticmethod
+    def close_request_connection(exc=None):
+        """Teardown hook: hand the request's connections back to their pools"""
+        g.pop('db_tx_depth', None)
+        Database.release_request_connection()
+    
+    @staticmethod
+    def release_request_connection():
+        """Return the request's bound connections to their pools; the next query binds a new one.
+        
+        AsyncDatabase calls this before checking out worker connections so a
+        request never holds one connection while waiting for more. A no-op
+        inside a transaction.
+        """
+        if not has_app_context() or Database.in_transaction():
+            return
+        conn = g.pop('db_conn', None)
+        replica_conn = g.pop('db_replica_conn', None)
+        if conn is not None:
+            Database.release_connection(conn)
+        if replica_conn is not None:
+            Database.release_connection(replica_conn, replica=True)
+    
+    # ======================= QUERY EXECUTION =======================
+    
+    @staticmethod
+    def execute_query(query, params=None, fetch=False, prepared=False, decode=None):
+        """Run a single statement.
+        
+        prepared=True executes through a server-side prepared statement that
+        stays cached on the pooled connection (keyed by SQL text), so hot
+        lookups skip re-parsing. Only use it for fixed SQL strings.
+        
+        decode converts fetched rows by column: a table name registered in
+        db_decoders.TABLE_COLUMNS, a {column: converter} dict for aliases,
+        or a list of both. DECIMAL and JSON columns not listed are decoded
+        by their MySQL type; decode=True decodes by type alone.
+        """
+        prepared = prepared and Config.DB_PREPARED_STATEMENTS
+        replica = fetch and Database.reads_from_replica()
+        if not fetch:
+            Database.use_primary()
+        conn, owned, replica = Database._checkout(replica)
+        pool = Database._pool_for(replica)
+        cursor = None
+        broken = False
+        try:
+            if prepared:
+                cursor = pool.prepared_cursor(conn, query)
+            else:
+                cursor = conn.cursor(dictionary=True)
+            started = time.perf_counter()
             cursor.execute(query, params or ())
             if fetch:
                 result = cursor.fetchall()
+                record_query(query, time.perf_counter() - started, len(result))
+                if decode and result:
+                    result = row_decoder(decode, cursor.description)(result)
                 return result
-            conn.commit()
+            if not Database.in_transaction():
+                conn.commit()
+            record_query(query, time.perf_counter() - started, cursor.rowcount)
             return cursor.lastrowid
         except Exception as e:
-            conn.rollback()
+            broken = Database._is_connection_error(e)
+            if prepared and not broken:
+                pool.discard_prepared(conn, query)
+            if not broken and not Database.in_transaction():
+                conn.rollback()
             raise e
         finally:
-            cursor.close()
-            conn.close()
+            if cursor is not None and not prepared:
+                cursor.close()
+            if owned:
+                Database.release_connection(conn, discard=broken, replica=replica)
+            elif broken and (replica or not Database.in_transaction()):
+                Database._drop_bound_connection(replica)
+    
+    @staticmethod
+    def stream_query(query, params=None, batch_size=1000, batches=False, decode=None):
+        """Yield rows lazily from an unbuffered cursor instead of fetchall().
+        
+        Rows are read from the server batch_size at a time, so memory stays
+        flat for any result size. Set batches=True to receive lists of rows.
+        The stream uses its own pooled connection (an unbuffered result ties
+        up the connection until fully read) and releases it when the
+        iterator is exhausted or closed. Abandoned streams discard the
+        connection rather than draining the remaining rows. Follows the same
+        replica routing and decode= handling as execute_query.
+        """
+        pool = Database.get_replica_pool() if Database.reads_from_replica() else Database.get_pool()
+        conn = pool.acquire()
+        cursor = None
+        exhausted = False
+        broken = False
+        db_time = 0.0  # time spent waiting on the server, not in the consumer
+        row_count = 0
+        try:
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            started = time.perf_counter()
+            cursor.execute(query, params or ())
+            db_time += time.perf_counter() - started
+            decode_rows = row_decoder(decode, cursor.description) if decode else None
+            while True:
+                started = time.perf_counter()
+                rows = cursor.fetchmany(batch_size)
+                db_time += time.perf_counter() - started
+                if not rows:
+                    break
+                row_count += len(rows)
+                if decode_rows:
+                    rows = decode_rows(rows)
+                if batches:
+                    yield rows
+                else:
+                    yield from rows
+            exhausted = True
+        except Exception as e:
+            broken = Database._is_connection_error(e)
+            raise
+        finally:
+            record_query(query, db_time, row_count)
+            if cursor is not None and exhausted:
+                cursor.close()
+            pool.release(conn, discard=broken or not exhausted)
+    
+    @staticmethod
+    def execute_many(query, rows, chunk_size=500, return_ids=False):
+        """Run one parameterized statement for many rows on a single connection.
+        
+        INSERT ... VALUES statements are sent as multi-row inserts of up to
+        chunk_size rows each, all inside one transaction. Returns the total
+        affected row count, or the generated ids when return_ids is set
+        (assumes auto_increment_increment = 1).
+        """
+        rows = iter(rows)
+        affected = 0
+        ids = []
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return ids if return_ids else affected
+        
+        with Database.transaction() as conn:
+            cursor = conn.cursor()
+            try:
+                while chunk:
+                    started = time.perf_counter()
+                    cursor.executemany(query, chunk)
+                    record_query(query, time.perf_counter() - started, cursor.rowcount)
+                    affected += cursor.rowcount
+                    if return_ids and cursor.lastrowid:
+                        ids.extend(range(cursor.lastrowid, cursor.lastrowid + len(chunk)))
+                    chunk = list(islice(rows, chunk_size))
+            finally:
+                cursor.close()
+        return ids if return_ids else affected
+    
+    @staticmethod
+    def _is_connection_error(error):
+        """Errors after which the connection must not go back to the pool"""
+        return isinstance(error, (mysql.connector.errors.OperationalError,
+                                  mysql.connector.errors.InterfaceError))
 
 class Admin:
     @staticmethod
@@ -56,7 +380,7 @@ class Admin:
     @staticmethod
     def get_admin_by_email(email):
         query = "SELECT * FROM admins WHERE email = %s AND is_active = 1"
-        result = Database.execute_query(query, (email,), fetch=True)
+        result = Database.execute_query(query, (email,), fetch=True, prepared=True)
         return result[0] if result else None
     
     @staticmethod
@@ -126,7 +450,7 @@ class Product:
         LEFT JOIN categories c ON p.category_id = c.id 
         WHERE p.id = %s
         """
-        result = Database.execute_query(query, (product_id,), fetch=True)
+        result = Database.execute_query(query, (product_id,), fetch=True, prepared=True)
         return result[0] if result else None
 
 class Category:
@@ -154,13 +478,13 @@ class Order:
         # Create order
         order_query = """
         INSERT INTO orders (customer_id, total_amount, status, payment_status, 
-                          shipping_address, created_at)
-        VALUES (%s, %s, %s, %s, %s, %s)
+                          shipping_address, item_count, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
         """
         order_id = Database.execute_query(
             order_query, 
             (customer_id, total_amount, 'pending', 'pending', 
-             json.dumps(shipping_address), datetime.now())
+             json.dumps(shipping_address), len(items), datetime.now())
         )
         
         # Create order items
@@ -172,6 +496,9 @@ class Order:
             Database.execute_query(item_query, (order_id, item['product_id'], 
                                               item['quantity'], item['price']))
         
+        from order_search import OrderSearch  # imports models
+        OrderSearch.index_orders([order_id])
+        
         return order_id
     
     @staticmethod
@@ -198,7 +525,7 @@ class SiteConfig:
     @staticmethod
     def get_config(key):
         query = "SELECT value FROM site_config WHERE config_key = %s"
-        result = Database.execute_query(query, (key,), fetch=True)
+        result = Database.execute_query(query, (key,), fetch=True, prepared=True)
         return result[0]['value'] if result else None
     
     @staticmethod
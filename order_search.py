@@ -0,0 +1,123 @@
+import argparse
+import re
+
+from models import Database
+
+MIN_TERM_LENGTH = 3  # innodb_ft_min_token_size; shorter terms are not indexed
+RESULT_LIMIT = 50
+REBUILD_BATCH = 10000
+
+EXACT_NUMBER_SCORE = 100
+NUMBER_PREFIX_SCORE = 50
+
+
+class OrderSearch:
+    """Search index over orders for support lookups.
+
+    order_search_index holds one row per order: the order number (B-tree,
+    for exact/prefix matches) and a FULLTEXT document with the order number
+    tokens, customer name, email and phone (as typed, all digits, and the
+    last 10 digits) and the shipping city and postal code. Rows are rewritten
+    from orders + customers when an order is created or a customer's
+    contact details change, so a lookup is two index probes instead of
+    leading-wildcard LIKEs across the order/customer join.
+    """
+
+    DOCUMENT = """
+    CONCAT_WS(' ',
+        o.order_number, c.name, c.email, c.phone,
+        REGEXP_REPLACE(COALESCE(c.phone, ''), '[^0-9]', ''),
+        RIGHT(REGEXP_REPLACE(COALESCE(c.phone, ''), '[^0-9]', ''), 10),
+        JSON_UNQUOTE(JSON_EXTRACT(o.shipping_address, '$.city')),
+        JSON_UNQUOTE(COALESCE(JSON_EXTRACT(o.shipping_address, '$.postal_code'),
+                              JSON_EXTRACT(o.shipping_address, '$.pincode'))))
+    """
+
+    # ======================= INDEXING =======================
+
+    @staticmethod
+    def _upsert(where, params):
+        Database.execute_query(f"""
+        INSERT INTO order_search_index (order_id, order_number, document)
+        SELECT o.id, o.order_number, {OrderSearch.DOCUMENT}
+        FROM orders o
+        LEFT JOIN customers c ON o.customer_id = c.id
+        WHERE {where}
+        ON DUPLICATE KEY UPDATE order_number = VALUES(order_number), document = VALUES(document)
+        """, params)
+
+    @staticmethod
+    def index_orders(order_ids):
+        """(Re)index the given orders"""
+        order_ids = list(set(order_ids))
+        if order_ids:
+            OrderSearch._upsert(f"o.id IN ({','.join(['%s'] * len(order_ids))})", order_ids)
+
+    @staticmethod
+    def index_customers(customer_ids):
+        """Reindex every order of the given customers (after a name/email/phone change)"""
+        customer_ids = list(set(customer_ids))
+        if customer_ids:
+            OrderSearch._upsert(f"o.customer_id IN ({','.join(['%s'] * len(customer_ids))})", customer_ids)
+
+    @staticmethod
+    def rebuild(batch_size=REBUILD_BATCH):
+        """Index every order in primary-key batches (initial population)"""
+        max_id = Database.execute_query("SELECT COALESCE(MAX(id), 0) as max_id FROM orders", fetch=True)[0]['max_id']
+        for start in range(0, max_id, batch_size):
+            OrderSearch._upsert("o.id > %s AND o.id <= %s", (start, start + batch_size))
+
+    # ======================= QUERYING =======================
+
+    @staticmethod
+    def fulltext_query(text):
+        """Boolean-mode query requiring every term as a prefix; None if no term is indexable"""
+        terms = [term for term in re.findall(r'\w+', text) if len(term) >= MIN_TERM_LENGTH]
+        return ' '.join(f'+{term}*' for term in terms) or None
+
+    @staticmethod
+    def _hits(text):
+        """(sql, params) of a derived table of (order_id, score) matches"""
+        text = text.strip()
+        number_prefix = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        sql = f"""
+        SELECT order_id, CASE WHEN order_number = %s THEN {EXACT_NUMBER_SCORE} ELSE {NUMBER_PREFIX_SCORE} END as score
+        FROM order_search_index WHERE order_number LIKE %s
+        """
+        params = [text, number_prefix]
+
+        query = OrderSearch.fulltext_query(text)
+        if query:
+            sql += """
+            UNION ALL
+            SELECT order_id, MATCH(document) AGAINST (%s IN BOOLEAN MODE) as score
+            FROM order_search_index WHERE MATCH(document) AGAINST (%s IN BOOLEAN MODE)
+            """
+            params.extend([query, query])
+        return sql, params
+
+    @staticmethod
+    def condition(text, id_column='o.id'):
+        """(condition, params) restricting a listing to orders matching text"""
+        hits_sql, params = OrderSearch._hits(text)
+        return f"{id_column} IN (SELECT hits.order_id FROM ({hits_sql}) hits)", params
+
+    @staticmethod
+    def search(text, limit=RESULT_LIMIT):
+        """Best matches first: exact order number, order-number prefix, then full-text relevance"""
+        hits_sql, params = OrderSearch._hits(text)
+        return Database.execute_query(f"""
+        SELECT hits.order_id, SUM(hits.score) as score
+        FROM ({hits_sql}) hits
+        GROUP BY hits.order_id
+        ORDER BY score DESC, hits.order_id DESC
+        LIMIT %s
+        """, params + [limit], fetch=True, decode=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Maintain the order_search_index table')
+    parser.add_argument('command', choices=['rebuild'])
+    parser.parse_args()
+    OrderSearch.rebuild()
+    print('order_search_index rebuilt')
@@ -0,0 +1,70 @@
+import hashlib
+import json
+
+from flask import request
+
+from config import Config
+from models import Database
+from response_cache import ResponseCache
+
+COUNT_MODES = ('exact', 'cached', 'estimate', 'none')
+
+
+class PageCount:
+    """Total row count of a paginated listing, by a per-request strategy.
+
+    exact     COUNT(*) over the listing's FROM/WHERE.
+    cached    the exact count, reused per (FROM, WHERE, params) for
+              PAGINATION_COUNT_TTL seconds from the response-cache backend.
+    estimate  the optimizer's row estimate from EXPLAIN; no rows are read.
+    none      no count at all: total and pages are null, clients page with
+              next_cursor until it is absent.
+    """
+
+    @staticmethod
+    def mode(default=None):
+        """The request's ?count= strategy, else the endpoint's (or configured) default"""
+        default = default or Config.PAGINATION_COUNT_DEFAULT
+        mode = request.args.get('count', default)
+        return mode if mode in COUNT_MODES else default
+
+    @staticmethod
+    def total(from_sql, where_clause, params, mode='exact'):
+        if mode == 'none':
+            return None
+        if mode == 'estimate':
+            return PageCount.estimate(from_sql, where_clause, params)
+        if mode == 'cached':
+            return PageCount.cached(from_sql, where_clause, params)
+        return PageCount.exact(from_sql, where_clause, params)
+
+    @staticmethod
+    def exact(from_sql, where_clause, params):
+        query = f"SELECT COUNT(*) as total FROM {from_sql} WHERE {where_clause}"
+        return Database.execute_query(query, params, fetch=True)[0]['total']
+
+    @staticmethod
+    def cached(from_sql, where_clause, params):
+        digest = hashlib.sha1(
+            json.dumps([from_sql, where_clause, list(params or [])], default=str).encode()
+        ).hexdigest()
+        key = f"page-count:{digest}"
+        backend = ResponseCache.get_backend()
+        entry = backend.get(key)
+        if entry is not None:
+            return entry['total']
+        total = PageCount.exact(from_sql, where_clause, params)
+        backend.set(key, {'total': total}, Config.PAGINATION_COUNT_TTL)
+        return total
+
+    @staticmethod
+    def estimate(from_sql, where_clause, params):
+        """Rows the optimizer expects the outer query to produce (InnoDB statistics)"""
+        plan = Database.execute_query(f"EXPLAIN SELECT 1 FROM {from_sql} WHERE {where_clause}", params, fetch=True)
+        estimate = None
+        for step in plan:
+            if step.get('id') != 1 or step.get('rows') is None:
+                continue  # subqueries, or a plan step without an estimate
+            rows = step['rows'] * float(step.get('filtered') or 100) / 100
+            estimate = rows if estimate is None else estimate * rows
+        return int(round(estimate)) if estimate is not None else 0
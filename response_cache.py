@@ -0,0 +1,235 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, copy_current_request_context, current_app, make_response, request
+
+from config import Config
+
+logger = logging.getLogger('response_cache')
+
+
+# ======================= BACKENDS =======================
+
+class MemoryCacheBackend:
+    """In-process LRU cache; entries expire at their own deadline"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max(int(max_entries), 1)
+        self._entries = OrderedDict()  # key -> (entry, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires_at = item
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, ttl):
+        with self._lock:
+            self._entries[key] = (entry, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def acquire_lock(self, key, ttl):
+        # Single-flight within the process is handled by ResponseCache
+        return True
+
+    def release_lock(self, key):
+        pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCacheBackend:
+    """Shared cache over the Redis protocol.
+
+    Only GET/SET (with PX and NX)/DEL/SCAN are used, so any Redis-compatible
+    server works. Pass an existing client, or a URL to connect with redis-py.
+    """
+
+    def __init__(self, url=None, client=None, prefix='response-cache:'):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError('RESPONSE_CACHE_BACKEND=redis requires the redis package')
+            client = redis.Redis.from_url(url or 'redis://localhost:6379/0')
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, entry, ttl):
+        self.client.set(self.prefix + key, json.dumps(entry), px=max(int(ttl * 1000), 1))
+
+    def acquire_lock(self, key, ttl):
+        """Cross-process single flight: only one worker recomputes a key"""
+        return bool(self.client.set(self.prefix + 'lock:' + key, '1', nx=True, px=max(int(ttl * 1000), 1)))
+
+    def release_lock(self, key):
+        self.client.delete(self.prefix + 'lock:' + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+
+# ======================= CACHE =======================
+
+class ResponseCache:
+    """TTL cache for GET handlers with single-flight fills and stale-while-revalidate"""
+    _backend = None
+    _backend_lock = threading.Lock()
+    _inflight = {}  # key -> threading.Event set when the leader finishes
+    _inflight_lock = threading.Lock()
+
+    LOCK_TTL = 30  # seconds a cross-process fill lock may be held
+    WAIT_TIMEOUT = 10  # seconds followers wait for the leader
+
+    @staticmethod
+    def get_backend():
+        if ResponseCache._backend is None:
+            with ResponseCache._backend_lock:
+                if ResponseCache._backend is None:
+                    if Config.RESPONSE_CACHE_BACKEND == 'redis':
+                        ResponseCache._backend = RedisCacheBackend(Config.RESPONSE_CACHE_REDIS_URL)
+                    else:
+                        ResponseCache._backend = MemoryCacheBackend(Config.RESPONSE_CACHE_MAX_ENTRIES)
+        return ResponseCache._backend
+
+    @staticmethod
+    def set_backend(backend):
+        """Swap the backend (e.g. a Redis stand-in)"""
+        ResponseCache._backend = backend
+
+    @staticmethod
+    def clear():
+        ResponseCache.get_backend().clear()
+
+    @staticmethod
+    def request_key():
+        """Route + normalized query args; argument order and repeats don't matter"""
+        args = sorted((name, value) for name in request.args for value in sorted(request.args.getlist(name)))
+        query = '&'.join(f"{name}={value}" for name, value in args)
+        return f"{request.method}:{request.path}?{query}"
+
+    @staticmethod
+    def fill(key, compute, ttl, stale_ttl):
+        """Compute and store an entry; concurrent callers for the same key wait for one fill"""
+        with ResponseCache._inflight_lock:
+            event = ResponseCache._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = ResponseCache._inflight[key] = threading.Event()
+
+        backend = ResponseCache.get_backend()
+        if not leader:
+            event.wait(ResponseCache.WAIT_TIMEOUT)
+            entry = backend.get(key)
+            return entry if entry is not None else ResponseCache._compute(key, compute, ttl, stale_ttl)
+
+        try:
+            if not backend.acquire_lock(key, ResponseCache.LOCK_TTL):
+                # Another process is filling this key - give it a chance to finish
+                deadline = time.time() + ResponseCache.WAIT_TIMEOUT
+                while time.time() < deadline:
+                    entry = backend.get(key)
+                    if entry is not None and entry['fresh_until'] > time.time():
+                        return entry
+                    time.sleep(0.05)
+                return ResponseCache._compute(key, compute, ttl, stale_ttl)
+            try:
+                return ResponseCache._compute(key, compute, ttl, stale_ttl)
+            finally:
+                backend.release_lock(key)
+        finally:
+            with ResponseCache._inflight_lock:
+                ResponseCache._inflight.pop(key, None)
+            event.set()
+
+    @staticmethod
+    def _compute(key, compute, ttl, stale_ttl):
+        response = compute()
+        now = time.time()
+        entry = {
+            'body': response.get_data(as_text=True),
+            'status': response.status_code,
+            'mimetype': response.mimetype,
+            'fresh_until': now + ttl,
+            'stale_until': now + ttl + stale_ttl
+        }
+        if response.status_code == 200:
+            ResponseCache.get_backend().set(key, entry, ttl + stale_ttl)
+        return entry
+
+    @staticmethod
+    def revalidate_in_background(key, compute, ttl, stale_ttl):
+        """Refresh a stale entry on a worker thread unless a fill is already running"""
+        with ResponseCache._inflight_lock:
+            if key in ResponseCache._inflight:
+                return
+
+        @copy_current_request_context
+        def refresh():
+            try:
+                ResponseCache.fill(key, compute, ttl, stale_ttl)
+            except Exception as e:
+                logger.warning('Background refresh of %s failed: %s', key, e)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    @staticmethod
+    def to_response(entry, state):
+        response = Response(entry['body'], status=entry['status'], mimetype=entry['mimetype'])
+        response.headers['X-Cache'] = state
+        return response
+
+
+def cached(ttl=30, stale_ttl=None):
+    """Cache a GET handler's response for ttl seconds.
+
+    Entries are shared by every admin and keyed by route + normalized query
+    args. For stale_ttl seconds after expiry (default: ttl) the old response
+    is served while one background request recomputes it. ?fresh=1 skips
+    the cache. Place below admin_required so authentication still runs on
+    every request.
+    """
+    stale_ttl = ttl if stale_ttl is None else stale_ttl
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not Config.RESPONSE_CACHE_ENABLED or request.method != 'GET' or request.args.get('fresh') == '1':
+                return current_app.ensure_sync(f)(*args, **kwargs)
+
+            key = ResponseCache.request_key()
+
+            def compute():
+                return make_response(current_app.ensure_sync(f)(*args, **kwargs))
+
+            entry = ResponseCache.get_backend().get(key)
+            now = time.time()
+            if entry is not None and entry['fresh_until'] > now:
+                return ResponseCache.to_response(entry, 'HIT')
+            if entry is not None and entry['stale_until'] > now:
+                ResponseCache.revalidate_in_background(key, compute, ttl, stale_ttl)
+                return ResponseCache.to_response(entry, 'STALE')
+
+            return ResponseCache.to_response(ResponseCache.fill(key, compute, ttl, stale_ttl), 'MISS')
+        return decorated_function
+    return decorator
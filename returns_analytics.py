@@ -0,0 +1,70 @@
+from models import Database
+from sales_rollup import window_start
+
+
+class ReturnAnalytics:
+    """Return and refund rates, overall and by order-week cohort.
+
+    One grouped pass over the window's orders, joined to per-order return
+    and refund totals, produces every cohort row; WITH ROLLUP adds the
+    window totals as an extra row of the same scan.
+    """
+
+    @staticmethod
+    def _rate(part, total):
+        return round(part / total * 100, 2) if total > 0 else 0
+
+    @staticmethod
+    def rates(days=30):
+        since = window_start(days)
+
+        # Returns/refunds are created after their order, so the window bounds them too
+        query = """
+        SELECT DATE(o.created_at - INTERVAL WEEKDAY(o.created_at) DAY) as cohort_week,
+               GROUPING(DATE(o.created_at - INTERVAL WEEKDAY(o.created_at) DAY)) as is_total,
+               COUNT(*) as total_orders,
+               COUNT(CASE WHEN o.status = 'returned' OR r.order_id IS NOT NULL THEN 1 END) as returned_orders,
+               COUNT(CASE WHEN o.payment_status IN ('refunded', 'partially_refunded')
+                          OR f.order_id IS NOT NULL THEN 1 END) as refunded_orders,
+               COALESCE(SUM(r.return_amount), 0) as return_amount,
+               COALESCE(SUM(f.refund_amount), 0) as refund_amount
+        FROM orders o
+        LEFT JOIN (
+            SELECT order_id, SUM(return_amount) as return_amount
+            FROM order_returns
+            WHERE created_at >= %s AND status <> 'rejected'
+            GROUP BY order_id
+        ) r ON r.order_id = o.id
+        LEFT JOIN (
+            SELECT order_id, SUM(refund_amount) as refund_amount
+            FROM order_refunds
+            WHERE created_at >= %s AND status = 'processed'
+            GROUP BY order_id
+        ) f ON f.order_id = o.id
+        WHERE o.created_at >= %s
+        GROUP BY DATE(o.created_at - INTERVAL WEEKDAY(o.created_at) DAY) WITH ROLLUP
+        """
+        rows = Database.execute_query(query, (since, since, since), fetch=True, decode=True)
+
+        totals = {'total_orders': 0, 'returned_orders': 0, 'refunded_orders': 0,
+                  'return_amount': 0, 'refund_amount': 0}
+        cohorts = []
+        for row in rows:
+            entry = {
+                'total_orders': row['total_orders'],
+                'returned_orders': row['returned_orders'],
+                'refunded_orders': row['refunded_orders'],
+                'return_amount': round(row['return_amount'], 2),
+                'refund_amount': round(row['refund_amount'], 2),
+                'return_rate': ReturnAnalytics._rate(row['returned_orders'], row['total_orders']),
+                'refund_rate': ReturnAnalytics._rate(row['refunded_orders'], row['total_orders'])
+            }
+            if row['is_total']:
+                totals = entry
+            else:
+                cohorts.append({'week_start': str(row['cohort_week']), **entry})
+
+        totals.setdefault('return_rate', 0)
+        totals.setdefault('refund_rate', 0)
+        cohorts.sort(key=lambda cohort: cohort['week_start'])
+        return {'days': days, **totals, 'cohorts': cohorts}
@@ -0,0 +1,293 @@
+import argparse
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from config import Config
+from models import Database, SiteConfig
+from rollup_state import RollupState
+
+logger = logging.getLogger('revenue_series')
+
+STATE_NAME = 'revenue_series'
+BUCKET_SECONDS = 900  # every UTC offset in use is a multiple of 15 minutes
+DAY_SECONDS = 86400
+BACKFILL_DAYS = 31  # UTC days rebuilt per backfill transaction
+DEFAULT_TIMEZONE = 'Asia/Kolkata'  # same default as /config/currency-timezone
+
+
+def site_timezone():
+    """The store's timezone from the currency-timezone settings"""
+    name = SiteConfig.get_config('timezone') or DEFAULT_TIMEZONE
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning('Unknown site timezone %r, using %s', name, DEFAULT_TIMEZONE)
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def local_day_bounds(start, end, tz):
+    """Epoch seconds of local midnight on start and on the day after end"""
+    first = datetime.combine(start, datetime.min.time(), tzinfo=tz)
+    last = datetime.combine(end + timedelta(days=1), datetime.min.time(), tzinfo=tz)
+    return int(first.timestamp()), int(last.timestamp())
+
+
+class RevenueSeries:
+    """Revenue and order counts bucketed for charts.
+
+    Orders are pre-bucketed twice:
+      revenue_quarter_hour_rollup  15-minute UTC buckets (epoch seconds), the
+                                   source for hourly series and for rebuilding
+      revenue_local_daily_rollup   days in the site timezone, the source for
+                                   daily/weekly/monthly series
+
+    Because buckets are UTC quarter hours, they fold into local hours and days
+    exactly for any timezone. refresh() follows orders.updated_at like
+    SalesRollup, once backfill() has built the buckets; a site timezone that
+    has no daily rows yet is built from the quarter-hour table by
+    backfill(local_only=True).
+    """
+    GRANULARITIES = ('hourly', 'daily', 'weekly', 'monthly')
+    MAX_HOURLY_DAYS = 92
+
+    _last_refresh = 0.0
+    _refresh_lock = threading.Lock()
+
+    # ======================= REFRESH =======================
+
+    @staticmethod
+    def refresh():
+        """Rebuild the buckets of orders changed since the last refresh; returns UTC days rebuilt.
+
+        A no-op until backfill() has built the buckets.
+        """
+        tz = site_timezone()
+        with Database.transaction():
+            since = RollupState.lock(STATE_NAME)
+            if since is None:
+                logger.info('Revenue series not backfilled yet (python revenue_series.py backfill)')
+                return 0
+
+            timezone_built = bool(Database.execute_query(
+                "SELECT name FROM rollup_state WHERE name = %s", (RevenueSeries._timezone_state(tz),), fetch=True
+            ))
+            if not timezone_built:
+                logger.warning('No daily revenue buckets for %s yet (python revenue_series.py backfill --local-only)',
+                               tz.key)
+
+            new_mark = max(RollupState.safe_mark(), since)
+            if new_mark == since:
+                return 0  # nothing written since the last refresh
+            days_query, days_params = RollupState.changed_orders(
+                "UNIX_TIMESTAMP(created_at) DIV 86400 AS utc_day", since, new_mark
+            )
+            days = sorted(int(row['utc_day']) for row in Database.execute_query(days_query, days_params, fetch=True))
+
+            for first, last in RevenueSeries._runs(days):
+                start, end = first * DAY_SECONDS, (last + 1) * DAY_SECONDS
+                RevenueSeries._rebuild_buckets(start, end)
+                if timezone_built:
+                    RevenueSeries._rebuild_local_days(tz, start, end)
+
+            RollupState.save(STATE_NAME, new_mark)
+        return len(days)
+
+    @staticmethod
+    def backfill(local_only=False):
+        """Build every bucket in BACKFILL_DAYS batches; returns UTC days covered.
+
+        local_only rebuilds just the site timezone's days from the existing
+        quarter-hour buckets (after the timezone setting changes).
+        """
+        tz = site_timezone()
+        mark = None if local_only else RollupState.safe_mark()
+        if local_only:
+            bounds_query = "SELECT MIN(bucket_start) AS first, MAX(bucket_start) AS last FROM revenue_quarter_hour_rollup"
+        else:
+            bounds_query = "SELECT MIN(UNIX_TIMESTAMP(created_at)) AS first, MAX(UNIX_TIMESTAMP(created_at)) AS last FROM orders"
+        bounds = Database.execute_query(bounds_query, fetch=True)[0]
+
+        days = 0
+        if bounds['first'] is not None:
+            first_day, last_day = int(bounds['first']) // DAY_SECONDS, int(bounds['last']) // DAY_SECONDS
+            days = last_day - first_day + 1
+            for day in range(first_day, last_day + 1, BACKFILL_DAYS):
+                start, end = day * DAY_SECONDS, min(day + BACKFILL_DAYS, last_day + 1) * DAY_SECONDS
+                with Database.transaction():
+                    if not local_only:
+                        RevenueSeries._rebuild_buckets(start, end)
+                    RevenueSeries._rebuild_local_days(tz, start, end)
+
+        Database.execute_query(
+            """INSERT INTO rollup_state (name, refreshed_at) VALUES (%s, NOW())
+               ON DUPLICATE KEY UPDATE refreshed_at = NOW()""",
+            (RevenueSeries._timezone_state(tz),)
+        )
+        if not local_only:
+            # Orders changed while the backfill ran have updated_at >= mark and are picked up by refresh()
+            RollupState.save(STATE_NAME, mark)
+        return days
+
+    @staticmethod
+    def ensure_fresh(max_lag=None):
+        """Refresh at most once per max_lag seconds per process; failures are logged"""
+        max_lag = Config.SALES_ROLLUP_MAX_LAG if max_lag is None else max_lag
+        if time.monotonic() - RevenueSeries._last_refresh < max_lag:
+            return
+        if not RevenueSeries._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            RevenueSeries.refresh()
+        except Exception as e:
+            logger.warning('Revenue series refresh skipped: %s', e)
+        finally:
+            RevenueSeries._last_refresh = time.monotonic()
+            RevenueSeries._refresh_lock.release()
+
+    @staticmethod
+    def _timezone_state(tz):
+        """rollup_state row recording that tz's daily buckets have been built"""
+        return f"{STATE_NAME}:{tz.key}"
+
+    @staticmethod
+    def _runs(days):
+        """Group sorted day numbers into (first, last) runs of consecutive days"""
+        runs = []
+        for day in days:
+            if runs and day == runs[-1][1] + 1:
+                runs[-1][1] = day
+            else:
+                runs.append([day, day])
+        return [tuple(run) for run in runs]
+
+    # ======================= REBUILD =======================
+
+    @staticmethod
+    def _rebuild_buckets(start, end):
+        """Recompute the quarter-hour buckets in [start, end) epoch seconds"""
+        Database.execute_query(
+            "DELETE FROM revenue_quarter_hour_rollup WHERE bucket_start >= %s AND bucket_start < %s",
+            (start, end)
+        )
+        Database.execute_query(f"""
+        INSERT INTO revenue_quarter_hour_rollup (bucket_start, order_count, paid_order_count, revenue)
+        SELECT UNIX_TIMESTAMP(created_at) DIV {BUCKET_SECONDS} * {BUCKET_SECONDS},
+               COUNT(*),
+               COUNT(CASE WHEN payment_status = 'paid' THEN 1 END),
+               COALESCE(SUM(CASE WHEN payment_status = 'paid' THEN total_amount END), 0)
+        FROM orders
+        WHERE created_at >= FROM_UNIXTIME(%s) AND created_at < FROM_UNIXTIME(%s)
+        GROUP BY 1
+        """, (start, end))
+
+    @staticmethod
+    def _rebuild_local_days(tz, start, end):
+        """Recompute every local day of tz that overlaps [start, end) epoch seconds"""
+        first = datetime.fromtimestamp(start, tz).date()
+        last = datetime.fromtimestamp(end - 1, tz).date()
+        lower, upper = local_day_bounds(first, last, tz)
+
+        rows = Database.execute_query(
+            """SELECT bucket_start, order_count, paid_order_count, revenue FROM revenue_quarter_hour_rollup
+               WHERE bucket_start >= %s AND bucket_start < %s""",
+            (lower, upper), fetch=True
+        )
+        totals = RevenueSeries._fold(rows, lambda local: local.date(), tz)
+
+        Database.execute_query(
+            "DELETE FROM revenue_local_daily_rollup WHERE timezone = %s AND bucket_date BETWEEN %s AND %s",
+            (tz.key, first, last)
+        )
+        Database.execute_many(
+            """INSERT INTO revenue_local_daily_rollup
+               (timezone, bucket_date, order_count, paid_order_count, revenue) VALUES (%s, %s, %s, %s, %s)""",
+            [(tz.key, day, *values) for day, values in totals.items()]
+        )
+
+    @staticmethod
+    def _fold(rows, key, tz=None):
+        """Sum quarter-hour rows into {key(local datetime): [orders, paid_orders, revenue]}"""
+        totals = {}
+        for row in rows:
+            local = datetime.fromtimestamp(int(row['bucket_start']), tz or timezone.utc)
+            bucket = totals.setdefault(key(local), [0, 0, 0])
+            bucket[0] += int(row['order_count'])
+            bucket[1] += int(row['paid_order_count'])
+            bucket[2] += row['revenue']
+        return totals
+
+    # ======================= SERIES =======================
+
+    @staticmethod
+    def series(granularity, start, end, tz=None):
+        """Gap-filled columnar series for local dates start..end inclusive"""
+        if granularity not in RevenueSeries.GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(RevenueSeries.GRANULARITIES)}")
+        if end < start:
+            raise ValueError('end_date must not be before start_date')
+        tz = tz or site_timezone()
+
+        if granularity == 'hourly':
+            if (end - start).days >= RevenueSeries.MAX_HOURLY_DAYS:
+                raise ValueError(f'hourly series are limited to {RevenueSeries.MAX_HOURLY_DAYS} days')
+            lower, upper = local_day_bounds(start, end, tz)
+            rows = Database.execute_query(
+                """SELECT bucket_start, order_count, paid_order_count, revenue FROM revenue_quarter_hour_rollup
+                   WHERE bucket_start >= %s AND bucket_start < %s""",
+                (lower, upper), fetch=True, decode=True
+            )
+            label = lambda local: local.replace(minute=0).isoformat(timespec='minutes')
+            totals = RevenueSeries._fold(rows, label, tz)
+            # Walk real instants so DST days get 23 or 25 hours
+            labels = OrderedDict.fromkeys(
+                label(datetime.fromtimestamp(instant, tz)) for instant in range(lower, upper, BUCKET_SECONDS)
+            )
+        else:
+            rows = Database.execute_query(
+                """SELECT bucket_date, order_count, paid_order_count, revenue FROM revenue_local_daily_rollup
+                   WHERE timezone = %s AND bucket_date BETWEEN %s AND %s""",
+                (tz.key, start, end), fetch=True, decode=True
+            )
+            label = {
+                'daily': lambda day: day.isoformat(),
+                'weekly': lambda day: (day - timedelta(days=day.weekday())).isoformat(),  # ISO week, Monday
+                'monthly': lambda day: day.strftime('%Y-%m')
+            }[granularity]
+            totals = {}
+            for row in rows:
+                bucket = totals.setdefault(label(row['bucket_date']), [0, 0, 0])
+                bucket[0] += int(row['order_count'])
+                bucket[1] += int(row['paid_order_count'])
+                bucket[2] += row['revenue']
+            labels = OrderedDict.fromkeys(label(start + timedelta(days=n)) for n in range((end - start).days + 1))
+
+        columns = {'buckets': list(labels), 'revenue': [], 'orders': [], 'paid_orders': []}
+        for name in labels:
+            orders, paid_orders, revenue = totals.get(name, (0, 0, 0))
+            columns['orders'].append(orders)
+            columns['paid_orders'].append(paid_orders)
+            columns['revenue'].append(round(revenue, 2))
+        return {
+            'granularity': granularity,
+            'timezone': tz.key,
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            **columns
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Maintain the revenue time-series buckets')
+    parser.add_argument('command', choices=['refresh', 'backfill'])
+    parser.add_argument('--local-only', action='store_true',
+                        help="backfill only the site timezone's days from the quarter-hour buckets")
+    args = parser.parse_args()
+
+    if args.command == 'refresh':
+        print(f"Rebuilt {RevenueSeries.refresh()} UTC day(s)")
+    else:
+        print(f"Rebuilt {RevenueSeries.backfill(args.local_only)} UTC day(s)")
@@ -0,0 +1,53 @@
+from config import Config
+from models import Database
+
+
+class RollupState:
+    """High-water marks (rollup_state) of the rollups that follow orders.updated_at.
+
+    updated_at is stamped when a statement runs, not when its transaction
+    commits, so a row can become visible with an updated_at older than a
+    mark already taken. Marks therefore trail NOW() by ROLLUP_SAFETY_LAG
+    seconds, and each refresh re-reads from the previous mark inclusive.
+    A mark that has not moved means no order was written since the last
+    refresh, which then does nothing (a quiet store would otherwise
+    rebuild its newest order's day on every refresh).
+    A rollup whose mark is NULL has not been backfilled and is not refreshed.
+    """
+
+    @staticmethod
+    def lock(name):
+        """Lock the rollup's state row for this refresh; returns its mark (None if not backfilled).
+
+        NOWAIT: a concurrent refresh already holding the row raises instead
+        of queueing behind it.
+        """
+        state = Database.execute_query(
+            "SELECT high_water_mark FROM rollup_state WHERE name = %s FOR UPDATE NOWAIT",
+            (name,), fetch=True
+        )
+        return state[0]['high_water_mark'] if state else None
+
+    @staticmethod
+    def safe_mark():
+        """Newest orders.updated_at a refresh may consume (never later than NOW() - the safety lag)"""
+        return Database.execute_query(
+            "SELECT LEAST(COALESCE(MAX(updated_at), NOW()), NOW() - INTERVAL %s SECOND) AS mark FROM orders",
+            (Config.ROLLUP_SAFETY_LAG,), fetch=True
+        )[0]['mark']
+
+    @staticmethod
+    def changed_orders(select, since, mark):
+        """(sql, params) selecting DISTINCT select over orders updated in [since, mark]"""
+        return f"""
+        SELECT DISTINCT {select} FROM orders
+        WHERE updated_at >= %s AND updated_at <= %s
+        """, (since, mark)
+
+    @staticmethod
+    def save(name, mark):
+        Database.execute_query(
+            """INSERT INTO rollup_state (name, high_water_mark, refreshed_at) VALUES (%s, %s, NOW())
+               ON DUPLICATE KEY UPDATE high_water_mark = VALUES(high_water_mark), refreshed_at = NOW()""",
+            (name, mark)
+        )
@@ -0,0 +1,186 @@
+import argparse
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from config import Config
+from leaderboards import Leaderboards
+from models import Database
+from rollup_state import RollupState
+
+logger = logging.getLogger('sales_rollup')
+
+STATE_NAME = 'sales_daily'
+DATES_PER_BATCH = 100
+
+
+class SalesRollup:
+    """Maintains sales_daily_rollup, product_sales_daily_rollup and customer_sales_daily_rollup.
+
+    Rows are keyed by the order's created_at date. An order changing status
+    or payment state moves its totals between buckets, so refresh() rebuilds
+    whole days: every day that has an order with updated_at at or after the
+    stored high-water mark is recomputed from orders/order_items. The first
+    build is backfill() (run from the command line), never a request.
+    """
+    _last_refresh = 0.0
+    _refresh_lock = threading.Lock()
+
+    # ======================= REFRESH =======================
+
+    @staticmethod
+    def refresh():
+        """Recompute the days touched since the last refresh; returns days rebuilt.
+
+        A no-op until backfill() has built the rollups.
+        """
+        with Database.transaction():
+            since = RollupState.lock(STATE_NAME)
+            if since is None:
+                logger.info('Sales rollup not backfilled yet (python sales_rollup.py backfill)')
+                return 0
+
+            # Inclusive bounds: orders the previous refresh left behind its mark are re-read
+            new_mark = max(RollupState.safe_mark(), since)
+            if new_mark == since:
+                return 0  # nothing written since the last refresh
+            days_query, days_params = RollupState.changed_orders("DATE(created_at) AS sales_date", since, new_mark)
+            days = sorted(row['sales_date'] for row in Database.execute_query(days_query, days_params, fetch=True))
+
+            for start in range(0, len(days), DATES_PER_BATCH):
+                SalesRollup._rebuild_days(days[start:start + DATES_PER_BATCH])
+            Leaderboards.mark_changed(days)  # boards are rebuilt off the request path
+
+            RollupState.save(STATE_NAME, new_mark)
+        return len(days)
+
+    @staticmethod
+    def ensure_fresh(max_lag=None):
+        """Refresh if this process has not done so in the last max_lag seconds.
+
+        Called by the report endpoints before reading the rollup. Failures
+        are logged rather than raised so reports still serve the last data;
+        before the first backfill() this only checks rollup_state.
+        """
+        max_lag = Config.SALES_ROLLUP_MAX_LAG if max_lag is None else max_lag
+        if time.monotonic() - SalesRollup._last_refresh < max_lag:
+            return
+        if not SalesRollup._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            SalesRollup.refresh()
+        except Exception as e:
+            logger.warning('Sales rollup refresh skipped: %s', e)
+        finally:
+            SalesRollup._last_refresh = time.monotonic()
+            SalesRollup._refresh_lock.release()
+
+    @staticmethod
+    def backfill(start=None, end=None):
+        """Rebuild the rollups month by month between start and end (inclusive dates)"""
+        mark = RollupState.safe_mark()
+        if start is None:
+            first = Database.execute_query("SELECT MIN(created_at) AS first FROM orders", fetch=True)[0]['first']
+            if first is None:
+                RollupState.save(STATE_NAME, mark)  # nothing to build, but refresh() may start
+                return 0
+            start = first.date()
+        end = end or date.today()
+
+        months = 0
+        month_start = start.replace(day=1)
+        while month_start <= end:
+            next_month = (month_start + timedelta(days=32)).replace(day=1)
+            with Database.transaction():
+                SalesRollup._rebuild_range(max(month_start, start), min(next_month, end + timedelta(days=1)))
+            months += 1
+            month_start = next_month
+
+        Leaderboards.refresh(rebuild_all=True)
+
+        # Orders changed while the backfill ran have updated_at >= mark and are picked up by refresh()
+        RollupState.save(STATE_NAME, mark)
+        return months
+
+    # ======================= REBUILD =======================
+
+    @staticmethod
+    def _rebuild_days(days):
+        """Rebuild an arbitrary sorted list of days"""
+        SalesRollup._rebuild(days[0], days[-1] + timedelta(days=1), days)
+
+    @staticmethod
+    def _rebuild_range(start, end):
+        """Rebuild every day in [start, end)"""
+        SalesRollup._rebuild(start, end)
+
+    @staticmethod
+    def _rebuild(start, end, days=None):
+        # The created_at range keeps both scans on the created_at index
+        range_params = (datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time()))
+        if days:
+            placeholders = ','.join(['%s'] * len(days))
+            delete_filter, delete_params = f"sales_date IN ({placeholders})", tuple(days)
+            order_filter = f"AND DATE(created_at) IN ({placeholders})"
+            item_filter = f"AND DATE(o.created_at) IN ({placeholders})"
+            day_params = tuple(days)
+        else:
+            delete_filter, delete_params = "sales_date >= %s AND sales_date < %s", (start, end)
+            order_filter = item_filter = ''
+            day_params = ()
+
+        Database.execute_query(f"DELETE FROM sales_daily_rollup WHERE {delete_filter}", delete_params)
+        Database.execute_query(f"DELETE FROM product_sales_daily_rollup WHERE {delete_filter}", delete_params)
+        Database.execute_query(f"DELETE FROM customer_sales_daily_rollup WHERE {delete_filter}", delete_params)
+
+        Database.execute_query(f"""
+        INSERT INTO sales_daily_rollup
+            (sales_date, status, payment_status, payment_method, order_count, total_amount)
+        SELECT DATE(created_at), status, payment_status, COALESCE(payment_method, ''),
+               COUNT(*), SUM(total_amount)
+        FROM orders
+        WHERE created_at >= %s AND created_at < %s {order_filter}
+        GROUP BY DATE(created_at), status, payment_status, COALESCE(payment_method, '')
+        """, range_params + day_params)
+
+        Database.execute_query(f"""
+        INSERT INTO product_sales_daily_rollup
+            (sales_date, product_id, payment_status, units_sold, revenue)
+        SELECT DATE(o.created_at), oi.product_id, o.payment_status,
+               SUM(oi.quantity), SUM(oi.quantity * oi.price)
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        WHERE o.created_at >= %s AND o.created_at < %s {item_filter}
+        GROUP BY DATE(o.created_at), oi.product_id, o.payment_status
+        """, range_params + day_params)
+
+        Database.execute_query(f"""
+        INSERT INTO customer_sales_daily_rollup
+            (sales_date, customer_id, payment_status, order_count, total_spent)
+        SELECT DATE(created_at), customer_id, payment_status, COUNT(*), SUM(total_amount)
+        FROM orders
+        WHERE created_at >= %s AND created_at < %s {order_filter}
+        GROUP BY DATE(created_at), customer_id, payment_status
+        """, range_params + day_params)
+
+
+def window_start(days):
+    """First rollup day covered by a 'last N days' report"""
+    return date.today() - timedelta(days=days)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Maintain the daily sales rollup tables')
+    parser.add_argument('command', choices=['refresh', 'backfill'])
+    parser.add_argument('--start', help='backfill from this date (YYYY-MM-DD), default: first order')
+    parser.add_argument('--end', help='backfill up to this date (YYYY-MM-DD), default: today')
+    args = parser.parse_args()
+
+    if args.command == 'refresh':
+        print(f"Rebuilt {SalesRollup.refresh()} day(s)")
+        print(f"Rebuilt leaderboard windows: {list(Leaderboards.refresh()) or 'none'}")
+    else:
+        start = datetime.strptime(args.start, '%Y-%m-%d').date() if args.start else None
+        end = datetime.strptime(args.end, '%Y-%m-%d').date() if args.end else None
+        print(f"Rebuilt {SalesRollup.backfill(start, end)} month(s)")
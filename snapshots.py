@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+
+from config import Config
+from leaderboards import Leaderboards
+from models import Database
+
+logger = logging.getLogger('snapshots')
+
+
+class Snapshots:
+    """Precomputed payloads for the heavy dashboard/analytics endpoints.
+
+    Views decorated with @snapshot register here. A scheduler thread in each
+    app process recomputes every registered view on its cadence (in a
+    synthetic request with default arguments) and stores the JSON body in
+    dashboard_snapshots, so the request path is a single primary-key read
+    regardless of data size. Workers share the table: a view another process
+    refreshed within its interval is skipped. The same thread keeps the
+    sales leaderboards current (Leaderboards.ensure_fresh).
+    """
+    _registry = {}  # name -> (view, interval seconds)
+    _next_run = {}
+    _thread = None
+    _pid = None
+    _start_lock = threading.Lock()
+
+    TICK_SECONDS = 5
+    STALE_INTERVALS = 2  # a stored snapshot older than this many intervals is recomputed on read
+
+    # ======================= STORE =======================
+
+    @staticmethod
+    def register(name, view, interval=None):
+        Snapshots._registry[name] = (view, interval or Config.DASHBOARD_SNAPSHOT_INTERVAL)
+
+    @staticmethod
+    def load(name):
+        rows = Database.execute_query(
+            "SELECT payload, computed_at FROM dashboard_snapshots WHERE name = %s", (name,), fetch=True
+        )
+        if not rows:
+            return None
+        return {'body': json.loads(rows[0]['payload']), 'computed_at': rows[0]['computed_at']}
+
+    @staticmethod
+    def compute(name):
+        """Run the view now; store and return its entry, or the error response it produced"""
+        view, _ = Snapshots._registry[name]
+        response = make_response(current_app.ensure_sync(view)())
+        if response.status_code != 200:
+            return response
+        entry = {'body': response.get_json(), 'computed_at': datetime.now().replace(microsecond=0)}
+        Database.execute_query(
+            """INSERT INTO dashboard_snapshots (name, payload, computed_at) VALUES (%s, %s, %s)
+               ON DUPLICATE KEY UPDATE payload = VALUES(payload), computed_at = VALUES(computed_at)""",
+            (name, json.dumps(entry['body'], default=str), entry['computed_at'])
+        )
+        return entry
+
+    @staticmethod
+    def is_stale(name, entry):
+        """True when the scheduler has fallen behind (or is not running) for this snapshot"""
+        _, interval = Snapshots._registry[name]
+        age = (datetime.now() - entry['computed_at']).total_seconds()
+        return age > interval * Snapshots.STALE_INTERVALS
+
+    @staticmethod
+    def to_response(entry, state):
+        if not isinstance(entry, dict):
+            return entry  # the view's own error response
+        response = jsonify({**entry['body'], 'computed_at': entry['computed_at'].isoformat()})
+        response.headers['X-Snapshot'] = state
+        return response
+
+    # ======================= SCHEDULER =======================
+
+    @staticmethod
+    def start(app):
+        """Start this process's refresh thread (idempotent, restarts after fork)"""
+        if not Config.DASHBOARD_SNAPSHOTS_ENABLED or Snapshots._pid == os.getpid():
+            return
+        with Snapshots._start_lock:
+            if Snapshots._pid == os.getpid():
+                return
+            Snapshots._pid = os.getpid()
+            Snapshots._next_run = {}
+            Snapshots._thread = threading.Thread(
+                target=Snapshots._run, args=(app,), name='dashboard-snapshots', daemon=True
+            )
+            Snapshots._thread.start()
+
+    @staticmethod
+    def _run(app):
+        while True:
+            Leaderboards.ensure_fresh()
+            for name in list(Snapshots._registry):
+                if Snapshots._next_run.get(name, 0) <= time.time():
+                    Snapshots.refresh(app, name)
+            time.sleep(Snapshots.TICK_SECONDS)
+
+    @staticmethod
+    def refresh(app, name):
+        """Recompute one snapshot unless another process did so within its interval"""
+        _, interval = Snapshots._registry[name]
+        try:
+            with app.test_request_context():
+                stored = Snapshots.load(name)
+                age = (datetime.now() - stored['computed_at']).total_seconds() if stored else None
+                if age is not None and age < interval:
+                    Snapshots._next_run[name] = time.time() + interval - age
+                    return
+                result = Snapshots.compute(name)
+                if not isinstance(result, dict):
+                    logger.warning('Snapshot %s not stored: view returned %s', name, result.status_code)
+        except Exception as e:
+            logger.warning('Snapshot %s refresh failed: %s', name, e)
+        Snapshots._next_run[name] = time.time() + interval
+
+
+def snapshot(name=None, interval=None):
+    """Serve a GET view's default-argument response from the snapshot store.
+
+    Requests with other query args run the view as usual. ?fresh=1
+    recomputes (and stores) the snapshot before answering, and so does a
+    snapshot older than STALE_INTERVALS intervals (served as a MISS).
+    Responses carry a top-level computed_at. Place below admin_required
+    (and cached).
+    """
+    def decorator(f):
+        key = name or f"{f.__module__}.{f.__name__}"
+        Snapshots.register(key, f, interval)
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            fresh = request.args.get('fresh') == '1'
+            if (not Config.DASHBOARD_SNAPSHOTS_ENABLED or request.method != 'GET' or args or kwargs
+                    or any(arg != 'fresh' for arg in request.args)):
+                return current_app.ensure_sync(f)(*args, **kwargs)
+
+            if not fresh:
+                entry = Snapshots.load(key)
+                if entry is not None and not Snapshots.is_stale(key, entry):
+                    return Snapshots.to_response(entry, 'HIT')
+            return Snapshots.to_response(Snapshots.compute(key), 'FRESH' if fresh else 'MISS')
+        return decorated_function
+    return decorator
@@ -0,0 +1,118 @@
+import argparse
+
+import live_counters
+from models import Database
+
+DEFAULT_THRESHOLD = 10  # inventory_settings.default_low_stock_threshold
+
+
+class LowStockIndex:
+    """Maintained set of active products at or below their low-stock threshold.
+
+    product_low_stock holds one row per listed product, keyed for reads by
+    stock_margin (stock_quantity - threshold, always <= 0). Every stock
+    mutation calls sync() inside its transaction with the products it
+    touched; a product entering the set, or dropping to zero while listed,
+    records one row in stock_alerts. Leaving the set re-arms the alert.
+    Call publish() with sync()'s result after the commit to push the alerts
+    and counter changes to dashboard subscribers.
+    """
+
+    @staticmethod
+    def sync(product_ids):
+        """Bring the index up to date for product_ids; returns {'alerts', 'low_stock', 'out_of_stock'}"""
+        result = {'alerts': [], 'low_stock': 0, 'out_of_stock': 0}
+        product_ids = sorted(set(product_ids))
+        if not product_ids:
+            return result
+
+        placeholders = ','.join(['%s'] * len(product_ids))
+        products = Database.execute_query(f"""
+            SELECT id, name, sku, stock_quantity, COALESCE(low_stock_threshold, %s) AS threshold, status
+            FROM products WHERE id IN ({placeholders})
+            """, (DEFAULT_THRESHOLD, *product_ids), fetch=True
+        )
+        listed = {
+            row['product_id']: row for row in Database.execute_query(
+                f"SELECT product_id, stock_quantity FROM product_low_stock WHERE product_id IN ({placeholders}) FOR UPDATE",
+                tuple(product_ids), fetch=True
+            )
+        }
+
+        upserts = []
+        still_listed = set()
+        for product in products:
+            if product['status'] != 'active' or product['stock_quantity'] > product['threshold']:
+                continue
+            previous = listed.get(product['id'])
+            still_listed.add(product['id'])
+            upserts.append((product['id'], product['stock_quantity'], product['threshold'],
+                            product['stock_quantity'] - product['threshold']))
+
+            was_out = previous is not None and previous['stock_quantity'] == 0
+            is_out = product['stock_quantity'] == 0
+            result['low_stock'] += previous is None
+            result['out_of_stock'] += is_out - was_out
+            if previous is None or (is_out and not was_out):
+                result['alerts'].append({
+                    'product_id': product['id'],
+                    'name': product['name'],
+                    'sku': product['sku'],
+                    'alert_type': 'out_of_stock' if is_out else 'low_stock',
+                    'stock_quantity': product['stock_quantity'],
+                    'low_stock_threshold': product['threshold']
+                })
+
+        # Restocked, deactivated or deleted products leave the set
+        removals = [product_id for product_id in listed if product_id not in still_listed]
+        for product_id in removals:
+            result['low_stock'] -= 1
+            result['out_of_stock'] -= listed[product_id]['stock_quantity'] == 0
+
+        if removals:
+            Database.execute_query(
+                f"DELETE FROM product_low_stock WHERE product_id IN ({','.join(['%s'] * len(removals))})",
+                tuple(removals)
+            )
+        if upserts:
+            Database.execute_many(
+                """INSERT INTO product_low_stock (product_id, stock_quantity, low_stock_threshold, stock_margin)
+                   VALUES (%s, %s, %s, %s)
+                   ON DUPLICATE KEY UPDATE stock_quantity = VALUES(stock_quantity),
+                       low_stock_threshold = VALUES(low_stock_threshold), stock_margin = VALUES(stock_margin)""",
+                upserts
+            )
+        if result['alerts']:
+            Database.execute_many(
+                """INSERT INTO stock_alerts (product_id, alert_type, stock_quantity, low_stock_threshold)
+                   VALUES (%s, %s, %s, %s)""",
+                [(alert['product_id'], alert['alert_type'], alert['stock_quantity'], alert['low_stock_threshold'])
+                 for alert in result['alerts']]
+            )
+        return result
+
+    @staticmethod
+    def publish(result):
+        """Push alerts and counter changes from sync() once its transaction has committed"""
+        live_counters.stock_index_changed(result)
+
+    @staticmethod
+    def rebuild():
+        """Repopulate the index from products without emitting alerts; returns rows listed"""
+        with Database.transaction():
+            Database.execute_query("DELETE FROM product_low_stock")
+            Database.execute_query("""
+            INSERT INTO product_low_stock (product_id, stock_quantity, low_stock_threshold, stock_margin)
+            SELECT id, stock_quantity, COALESCE(low_stock_threshold, %s),
+                   stock_quantity - COALESCE(low_stock_threshold, %s)
+            FROM products
+            WHERE status = 'active' AND stock_quantity <= COALESCE(low_stock_threshold, %s)
+            """, (DEFAULT_THRESHOLD, DEFAULT_THRESHOLD, DEFAULT_THRESHOLD))
+            return Database.execute_query("SELECT COUNT(*) AS listed FROM product_low_stock", fetch=True)[0]['listed']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Maintain the low-stock index')
+    parser.add_argument('command', choices=['rebuild'])
+    parser.parse_args()
+    print(f"Listed {LowStockIndex.rebuild()} product(s)")
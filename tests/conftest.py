@@ -0,0 +1,155 @@
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from db_instrumentation import n_plus_one_guard
+from models import Database
+
+# MySQL field type codes reported in the fake cursor description
+_VAR_STRING = 253
+_NEWDECIMAL = 246
+
+
+class FakeDatabase:
+    """Stands in for the connection pool: records every statement and
+    answers reads from canned rows, so the real Database code (decoding,
+    transactions, query stats) runs unchanged."""
+
+    def __init__(self):
+        self.queries = []  # (sql, params) in execution order
+        self._results = []  # (fragment, rows); first match wins
+
+    def returns(self, fragment, rows):
+        """Answer statements containing fragment with rows"""
+        self._results.append((fragment, rows))
+
+    def rows_for(self, query):
+        for fragment, rows in self._results:
+            if fragment in query:
+                return [dict(row) for row in rows]
+        return []
+
+    def statements(self, fragment):
+        return [(sql, params) for sql, params in self.queries if fragment in sql]
+
+    # ConnectionPool interface
+    def acquire(self, timeout=None):
+        return _FakeConnection(self)
+
+    def release(self, conn, discard=False):
+        pass
+
+    def prepared_cursor(self, conn, sql):
+        return conn.cursor()
+
+    def discard_prepared(self, conn, sql):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class _FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, **kwargs):
+        return _FakeCursor(self.db)
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class _FakeCursor:
+    lastrowid = 1
+    rowcount = 1
+
+    def __init__(self, db):
+        self.db = db
+        self._rows = []
+        self.description = []
+
+    def execute(self, query, params=()):
+        self.db.queries.append((query, params))
+        self._rows = self.db.rows_for(query)
+        columns = self._rows[0] if self._rows else {}
+        self.description = [
+            (name, _NEWDECIMAL if isinstance(value, Decimal) else _VAR_STRING)
+            for name, value in columns.items()
+        ]
+
+    def executemany(self, query, rows):
+        self.db.queries.append((query, list(rows)))
+        self._rows = []
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDatabase()
+    monkeypatch.setattr(Database, '_pool', fake)
+    monkeypatch.setattr(Config, 'DB_REPLICA_HOST', None)
+    return fake
+
+
+@pytest.fixture
+def app(db):
+    from admin.blog import blog_bp
+    from admin.blog_comments import blog_comments_bp
+    from admin.categories import categories_bp
+    from admin.coupons import coupons_bp
+    from admin.customers import customers_bp
+    from admin.integrations import integrations_bp
+    from admin.orders import orders_bp
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['TESTING'] = True
+    JWTManager(app)
+    app.teardown_appcontext(Database.close_request_connection)
+    for blueprint in (orders_bp, customers_bp, categories_bp, coupons_bp, blog_bp, blog_comments_bp,
+                      integrations_bp):
+        app.register_blueprint(blueprint, url_prefix='/admin/api/v1')
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_headers(app):
+    with app.app_context():
+        token = create_access_token(identity={'id': 1, 'email': 'admin@example.com', 'role': 'admin'})
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def no_n_plus_one():
+    """Fail the test if any statement runs more than 5 times"""
+    with n_plus_one_guard(threshold=5) as violations:
+        yield violations
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+from flask import Blueprint
+
+import admin.coupons
+
+COUPONS_ADVANCED = os.path.join(os.path.dirname(admin.coupons.__file__), 'coupons_advanced.py')
+
+
+@pytest.fixture
+def coupons_advanced():
+    """coupons_advanced.py is written to be appended to coupons.py; load it in that namespace"""
+    namespace = dict(vars(admin.coupons), coupons_bp=Blueprint('coupons_advanced', __name__))
+    with open(COUPONS_ADVANCED) as source:
+        exec(compile(source.read(), COUPONS_ADVANCED, 'exec'), namespace)
+    return namespace
+
+
+def test_applicable_coupons_looks_up_the_customer_once(db, coupons_advanced, no_n_plus_one):
+    db.returns('SELECT * FROM coupons', [
+        {'id': coupon_id, 'customer_eligibility': 'specific_customers', 'usage_limit_per_customer': 1}
+        for coupon_id in range(1, 9)
+    ])
+    db.returns('FROM orders', [{'count': 0}])
+    db.returns('FROM coupon_customers', [{'coupon_id': 2}, {'coupon_id': 3}, {'coupon_id': 5}])
+    db.returns('FROM coupon_usage', [{'coupon_id': 3, 'count': 1}])
+
+    coupons = coupons_advanced['get_applicable_coupons_for_customer'](42)
+
+    assert [coupon['id'] for coupon in coupons] == [2, 5]
+    assert len(db.statements('FROM coupon_customers')) == 1
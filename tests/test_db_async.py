@@ -0,0 +1,29 @@
+import asyncio
+
+from flask import Flask, g
+
+from db_async import AsyncDatabase
+from models import Database
+
+
+def test_fan_out_hands_back_the_request_connection_first(db, monkeypatch):
+    released = []
+    monkeypatch.setattr(db, 'release', lambda conn, discard=False: released.append(conn))
+    db.returns('FROM orders', [{'total': 3}])
+
+    with Flask(__name__).test_request_context():
+        Database.execute_query('SELECT 1', fetch=True)
+        bound = g.db_conn
+
+        results = asyncio.run(AsyncDatabase.fetch_all('SELECT COUNT(*) AS total FROM orders', 'SELECT 1'))
+
+        assert results[0] == [{'total': 3}]
+        assert released[0] is bound
+        assert g.get('db_conn') is None
+
+
+def test_fan_out_keeps_the_transaction_connection(db):
+    with Flask(__name__).test_request_context():
+        with Database.transaction() as conn:
+            asyncio.run(AsyncDatabase.fetch_all('SELECT 1'))
+            assert g.db_conn is conn
@@ -0,0 +1,72 @@
+import json
+import logging
+
+import pytest
+from flask import Flask, Response
+
+from config import Config
+from db_instrumentation import add_stats_headers, compact_sql, fingerprint, record_query, start_request_stats
+
+
+# ======================= FINGERPRINTS =======================
+
+@pytest.mark.parametrize('query', [
+    "SELECT * FROM orders WHERE id = 7 AND status = 'paid'",
+    "select *\n  from orders\n where id = %s and status = %s",
+    "SELECT * FROM orders WHERE id = 12 AND status = 'it''s'",
+    "SELECT * FROM orders WHERE id = %(id)s AND status = 'a\\'b'"
+])
+def test_fingerprint_ignores_literals_placeholders_and_layout(query):
+    assert fingerprint(query) == 'select * from orders where id = ? and status = ?'
+
+
+def test_fingerprint_collapses_in_lists_of_any_length():
+    assert fingerprint('SELECT * FROM products WHERE id IN (1, 2, 3)') == \
+        fingerprint('SELECT * FROM products WHERE id IN (%s)') == \
+        'select * from products where id in (...)'
+
+
+def test_fingerprint_keeps_identifiers_with_digits():
+    assert fingerprint('SELECT col1 FROM t2 WHERE x = 3.5') == 'select col1 from t2 where x = ?'
+
+
+def test_compact_sql_truncates_long_statements():
+    assert compact_sql('SELECT\n   1', max_length=10) == 'SELECT 1'
+    assert compact_sql('SELECT ' + 'x, ' * 10, max_length=10) == 'SELECT x, ...'
+
+
+# ======================= REQUEST STATS =======================
+
+def test_slow_request_logs_its_slowest_statements(monkeypatch, caplog):
+    monkeypatch.setattr(Config, 'DB_SLOW_QUERY_MS', 100)
+    app = Flask(__name__)
+
+    with app.test_request_context('/admin/api/v1/orders'):
+        start_request_stats()
+        record_query('SELECT * FROM orders WHERE id = 1', 0.04)
+        record_query('SELECT  *\n FROM customers WHERE id = 2', 0.07)
+        record_query('SELECT 1', 0.001)
+        with caplog.at_level(logging.WARNING, logger='db.slow_query'):
+            response = add_stats_headers(Response())
+
+    assert response.headers['X-DB-Queries'] == '3'
+    entry = json.loads(caplog.records[-1].getMessage())
+    assert entry['event'] == 'slow_request'
+    assert entry['path'] == '/admin/api/v1/orders'
+    assert entry['queries'] == 3
+    assert [query['sql'] for query in entry['slowest']] == [
+        'SELECT * FROM customers WHERE id = 2', 'SELECT * FROM orders WHERE id = 1', 'SELECT 1'
+    ]
+
+
+def test_fast_request_is_not_logged(monkeypatch, caplog):
+    monkeypatch.setattr(Config, 'DB_SLOW_QUERY_MS', 100)
+    app = Flask(__name__)
+
+    with app.test_request_context('/'):
+        start_request_stats()
+        record_query('SELECT 1', 0.002)
+        with caplog.at_level(logging.WARNING, logger='db.slow_query'):
+            add_stats_headers(Response())
+
+    assert caplog.records == []
@@ -0,0 +1,46 @@
+from datetime import datetime
+from decimal import Decimal
+
+
+def test_customer_list_returns_spend_as_numbers(client, db, admin_headers):
+    db.returns('FROM customers c', [
+        {'id': 1, 'name': 'Asha', 'order_count': 2, 'total_spent': Decimal('1250.50'),
+         'avg_order_value': Decimal('625.25'), 'segment': 'new', 'created_at': datetime(2026, 1, 5)}
+    ])
+
+    response = client.get('/admin/api/v1/customers?count=none', headers=admin_headers)
+
+    customer = response.get_json()['data']['items'][0]
+    assert customer['total_spent'] == 1250.5
+    assert customer['avg_order_value'] == 625.25
+
+
+def test_customer_detail_decodes_recent_orders(client, db, admin_headers):
+    db.returns('FROM customers c', [
+        {'id': 1, 'name': 'Asha', 'total_spent': Decimal('0.00'), 'avg_order_value': Decimal('0.00')}
+    ])
+    db.returns('FROM orders', [
+        {'id': 9, 'order_number': 'ORD9', 'total_amount': Decimal('99.90'), 'status': 'pending'}
+    ])
+
+    response = client.get('/admin/api/v1/customers/1', headers=admin_headers)
+
+    customer = response.get_json()['data']
+    assert customer['total_spent'] == 0
+    assert customer['recent_orders'][0]['total_amount'] == 99.9
+
+
+def test_integration_logs_parse_json_bodies(client, db, admin_headers):
+    db.returns('FROM api_logs al', [
+        {'id': 2, 'request_data': '{"sku": "A1"}', 'response_data': 'not json',
+         'created_at': datetime(2026, 3, 1, 9, 0)},
+        {'id': 1, 'request_data': None, 'response_data': '', 'created_at': datetime(2026, 3, 1, 8, 0)}
+    ])
+
+    response = client.get('/admin/api/v1/integrations/logs?count=none', headers=admin_headers)
+
+    assert response.status_code == 200, response.get_json()
+    logs = response.get_json()['data']['items']
+    assert logs[0]['request_data'] == {'sku': 'A1'}
+    assert logs[0]['response_data'] == {}
+    assert logs[1]['request_data'] is None and logs[1]['response_data'] is None
@@ -0,0 +1,58 @@
+import io
+import zipfile
+from decimal import Decimal
+from xml.etree import ElementTree
+
+from flask import Flask
+
+from utils import stream_xlsx_response
+
+SHEET_NS = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+def _workbook(rows, fieldnames, **kwargs):
+    app = Flask(__name__)
+    with app.test_request_context():
+        response = stream_xlsx_response(rows, fieldnames, 'orders.xlsx', **kwargs)
+        chunks = list(response.response)
+    return response, chunks, zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+
+
+def _cells(archive):
+    sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+    return [
+        [cell.findtext('s:v', namespaces=SHEET_NS) or cell.findtext('s:is/s:t', namespaces=SHEET_NS)
+         for cell in row.findall('s:c', SHEET_NS)]
+        for row in sheet.findall('s:sheetData/s:row', SHEET_NS)
+    ]
+
+
+def test_xlsx_writes_a_valid_single_sheet_workbook():
+    rows = [
+        {'order_number': 'ORD1', 'total_amount': Decimal('499.50'), 'items': 3, 'note': '<fragile> & "dry"'},
+        {'order_number': 'ORD2', 'total_amount': None, 'items': True, 'note': 'tab\x01bell\x07'}
+    ]
+
+    response, _, archive = _workbook(rows, ['order_number', 'total_amount', 'items', 'note'], sheet_name='Orders')
+
+    assert response.headers['Content-Disposition'] == 'attachment; filename=orders.xlsx'
+    assert archive.testzip() is None
+    assert set(archive.namelist()) == {
+        '[Content_Types].xml', '_rels/.rels', 'xl/_rels/workbook.xml.rels',
+        'xl/workbook.xml', 'xl/worksheets/sheet1.xml'
+    }
+    assert b'name="Orders"' in archive.read('xl/workbook.xml')
+    assert _cells(archive) == [
+        ['order_number', 'total_amount', 'items', 'note'],
+        ['ORD1', '499.50', '3', '<fragile> & "dry"'],
+        ['ORD2', None, 'True', 'tabbell']  # booleans as text, XML-illegal control characters dropped
+    ]
+
+
+def test_xlsx_streams_in_chunks():
+    rows = ({'sku': f'SKU{n:06d}', 'stock': n} for n in range(20000))
+
+    _, chunks, archive = _workbook(rows, ['sku', 'stock'], flush_size=4096)
+
+    assert len(chunks) > 2
+    assert len(_cells(archive)) == 20001
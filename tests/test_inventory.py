@@ -0,0 +1,68 @@
+import io
+
+import pytest
+
+from admin.inventory import inventory_bp
+
+
+@pytest.fixture
+def inventory_client(app):
+    app.register_blueprint(inventory_bp, url_prefix='/admin/api/v1')
+    return app.test_client()
+
+
+def test_bulk_update_reads_and_writes_stock_in_batches(inventory_client, db, admin_headers):
+    db.returns('SELECT id, sku, stock_quantity FROM products', [
+        {'id': product_id, 'sku': f'SKU-{product_id}', 'stock_quantity': 5} for product_id in range(1, 21)
+    ])
+    updates = [{'product_id': product_id, 'stock_quantity': 5 + product_id % 2} for product_id in range(1, 21)]
+
+    response = inventory_client.put('/admin/api/v1/inventory/bulk-update', json={'updates': updates},
+                                    headers=admin_headers)
+
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['data']['updated_count'] == 10
+    [(stock_sql, _)] = db.statements('SELECT id, sku, stock_quantity FROM products')
+    assert stock_sql.endswith('FOR UPDATE')
+    [(_, params)] = db.statements('UPDATE products SET stock_quantity = CASE id')
+    assert params[:2] == (1, 6) and params[-10:] == tuple(range(1, 21, 2))
+    assert len(db.statements('INSERT INTO stock_movements')) == 1
+
+
+def test_failed_movement_insert_fails_the_bulk_update(inventory_client, db, admin_headers, monkeypatch):
+    db.returns('SELECT id, sku, stock_quantity FROM products', [{'id': 1, 'sku': 'SKU-1', 'stock_quantity': 5}])
+
+    def broken_insert(query, rows, **kwargs):
+        raise RuntimeError('stock_movements is read-only')
+    monkeypatch.setattr('admin.inventory.Database.execute_many', broken_insert)
+
+    response = inventory_client.put('/admin/api/v1/inventory/bulk-update',
+                                    json={'updates': [{'product_id': 1, 'stock_quantity': 9}]}, headers=admin_headers)
+
+    assert response.status_code == 500
+    assert 'read-only' in response.get_json()['error']
+
+
+def test_import_counts_every_csv_row(inventory_client, db, admin_headers):
+    db.returns('SELECT id, sku, stock_quantity FROM products', [{'id': 1, 'sku': 'SKU-1', 'stock_quantity': 5}])
+    csv_file = (io.BytesIO(b'sku,stock_quantity\nSKU-1,7\nSKU-2,3\n,4\n'), 'stock.csv')
+
+    response = inventory_client.post('/admin/api/v1/inventory/import', data={'file': csv_file},
+                                     headers=admin_headers, content_type='multipart/form-data')
+
+    assert response.status_code == 200, response.get_json()
+    result = response.get_json()['data']
+    assert result['imported_count'] == 1
+    assert result['total_rows'] == 3
+    assert result['errors'] == ["Row 3: Product with SKU 'SKU-2' not found", 'Row 4: SKU is required']
+
+
+@pytest.mark.parametrize('query, source', [('', 'FROM product_low_stock ls'), ('?threshold=25', 'FROM products p')])
+def test_low_stock_alerts_use_the_index_only_for_the_default_threshold(inventory_client, db, admin_headers,
+                                                                       query, source):
+    response = inventory_client.get(f'/admin/api/v1/inventory/alerts/low-stock{query}', headers=admin_headers)
+
+    assert response.status_code == 200, response.get_json()
+    [(sql, params)] = db.statements('sales_last_30d')
+    assert source in sql
+    assert params[1:] == ((25,) if query else ())
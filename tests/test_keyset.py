@@ -0,0 +1,162 @@
+import sqlite3
+
+import pytest
+
+from utils import Keyset
+
+
+def _orders(*statuses):
+    return [
+        {'id': 10 + i, 'order_number': f'ORD{i}', 'status': status, 'keyset_position': position}
+        for i, (status, position) in enumerate(statuses)
+    ]
+
+
+# ======================= CURSORS =======================
+
+def test_cursor_round_trips_sort_key_and_id():
+    cursor = Keyset.encode('created_at', 'DESC', '2026-03-01 09:00:00', 42)
+
+    assert '=' not in cursor
+    assert Keyset.decode(cursor, 'created_at', 'DESC') == ('2026-03-01 09:00:00', 42)
+
+
+@pytest.mark.parametrize('sort_by, direction', [('total_amount', 'DESC'), ('created_at', 'ASC')])
+def test_cursor_for_another_sort_is_rejected(sort_by, direction):
+    cursor = Keyset.encode('created_at', 'DESC', '2026-03-01 09:00:00', 42)
+
+    with pytest.raises(ValueError, match='does not match'):
+        Keyset.decode(cursor, sort_by, direction)
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        Keyset.decode('not a cursor', 'created_at', 'DESC')
+
+
+# ======================= SEEK CONDITIONS =======================
+
+def test_condition_seeks_past_value_then_id():
+    assert Keyset.condition('o.total_amount', 'o.id', 'ASC', 10.5, 7) == (
+        '(o.total_amount > %s OR (o.total_amount = %s AND o.id > %s))', [10.5, 10.5, 7]
+    )
+    assert Keyset.condition('o.total_amount', 'o.id', 'DESC', 10.5, 7) == (
+        '(o.total_amount < %s OR (o.total_amount = %s AND o.id < %s))', [10.5, 10.5, 7]
+    )
+
+
+def test_nullable_descending_condition_keeps_trailing_nulls():
+    sql, params = Keyset.condition('c.valid_until', 'c.id', 'DESC', '2026-04-01', 3, nullable=True)
+
+    assert sql == '((c.valid_until < %s OR (c.valid_until = %s AND c.id < %s)) OR c.valid_until IS NULL)'
+    assert params == ['2026-04-01', '2026-04-01', 3]
+
+
+def test_condition_after_a_null_value():
+    # NULLs sort first ascending: finish the NULLs, then every non-NULL row
+    assert Keyset.condition('c.valid_until', 'c.id', 'ASC', None, 3) == (
+        '((c.valid_until IS NULL AND c.id > %s) OR c.valid_until IS NOT NULL)', [3]
+    )
+    # ... and last descending: only the remaining NULLs
+    assert Keyset.condition('c.valid_until', 'c.id', 'DESC', None, 3) == (
+        '(c.valid_until IS NULL AND c.id < %s)', [3]
+    )
+
+
+@pytest.mark.parametrize('direction', ['ASC', 'DESC'])
+def test_nullable_seek_pages_across_nulls_exactly_once(direction):
+    # SQLite orders NULLs like MySQL (first ascending, last descending)
+    db = sqlite3.connect(':memory:')
+    db.row_factory = sqlite3.Row
+    db.execute('CREATE TABLE orders (id INTEGER PRIMARY KEY, status INTEGER)')
+    db.executemany('INSERT INTO orders VALUES (?, ?)',
+                   [(1, 2), (2, None), (3, 1), (4, None), (5, 2), (6, None), (7, 1)])
+
+    seen, cursor = [], None
+    while True:
+        where, params = ('1=1', [])
+        if cursor:
+            where, params = Keyset.after(cursor, 'status', direction, 'status', 'id', nullable=True)
+        rows = [dict(row) for row in db.execute(
+            f'SELECT id, status FROM orders WHERE {where.replace("%s", "?")} '
+            f'ORDER BY status {direction}, id {direction} LIMIT 3', params
+        )]
+        rows, cursor = Keyset.page(rows, 2, 'status', direction)
+        seen.extend(row['id'] for row in rows)
+        if not cursor:
+            break
+
+    expected = [row[0] for row in db.execute(f'SELECT id FROM orders ORDER BY status {direction}, id {direction}')]
+    assert seen == expected
+
+
+def test_order_status_cursor_keeps_null_statuses(client, db, admin_headers):
+    cursor = Keyset.encode('status', 'DESC', 2, 11)
+
+    response = client.get(f'/admin/api/v1/orders?sort_by=status&cursor={cursor}&count=none', headers=admin_headers)
+
+    assert response.status_code == 200
+    sql, _ = db.statements('FROM orders o')[0]
+    assert 'OR (o.status+0) IS NULL)' in sql
+
+
+def test_page_trims_the_lookahead_row():
+    rows = [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}, {'id': 3, 'name': 'c'}]
+
+    page, cursor = Keyset.page(rows, 2, 'name', 'ASC')
+
+    assert page == rows[:2]
+    assert Keyset.decode(cursor, 'name', 'ASC') == ('b', 2)
+    assert Keyset.page(rows, 3, 'name', 'ASC') == (rows, None)
+
+
+# ======================= ENUM SORT KEYS =======================
+
+def test_order_enum_sort_pages_by_definition_position(client, db, admin_headers):
+    # 'shipped' (4) sorts before 'delivered' (5) even though 'd' < 's'
+    db.returns('FROM orders o', _orders(('pending', 1), ('shipped', 4), ('delivered', 5)))
+
+    response = client.get('/admin/api/v1/orders?sort_by=status&sort_order=asc&per_page=2&count=none',
+                          headers=admin_headers)
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert [order['status'] for order in data['items']] == ['pending', 'shipped']
+    assert all('keyset_position' not in order for order in data['items'])
+    sql, _ = db.statements('FROM orders o')[0]
+    assert 'ORDER BY (o.status+0) ASC, o.id ASC' in sql
+    assert Keyset.decode(data['pagination']['next_cursor'], 'status', 'ASC') == (4, 11)
+
+
+def test_order_enum_cursor_seeks_on_position(client, db, admin_headers):
+    cursor = Keyset.encode('payment_status', 'DESC', 2, 11)
+
+    response = client.get(f'/admin/api/v1/orders?sort_by=payment_status&cursor={cursor}&count=none',
+                          headers=admin_headers)
+
+    assert response.status_code == 200
+    sql, params = db.statements('FROM orders o')[0]
+    assert '((o.payment_status+0) < %s OR ((o.payment_status+0) = %s AND o.id < %s))' in sql
+    assert list(params[-5:-2]) == [2, 2, 11]
+
+
+def test_coupon_type_cursor_seeks_on_position(client, db, admin_headers):
+    db.returns('FROM coupons c', [
+        {'id': 3, 'code': 'A', 'type': 'fixed_amount', 'keyset_position': 2,
+         'usage_limit': None, 'used_count': 0, 'valid_from': None, 'valid_until': None},
+        {'id': 4, 'code': 'B', 'type': 'free_shipping', 'keyset_position': 4,
+         'usage_limit': None, 'used_count': 0, 'valid_from': None, 'valid_until': None}
+    ])
+    cursor = Keyset.encode('type', 'ASC', 1, 2)
+
+    response = client.get(f'/admin/api/v1/coupons?sort_by=type&sort_order=asc&per_page=1&cursor={cursor}&count=none',
+                          headers=admin_headers)
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    sql, params = db.statements('FROM coupons c')[0]
+    assert '((c.type+0) > %s OR ((c.type+0) = %s AND c.id > %s))' in sql
+    assert 'ORDER BY (c.type+0) ASC, c.id ASC' in sql
+    assert list(params[-5:-2]) == [1, 1, 2]
+    assert 'keyset_position' not in data['items'][0]
+    assert Keyset.decode(data['pagination']['next_cursor'], 'type', 'ASC') == (2, 3)
@@ -0,0 +1,37 @@
+import pytest
+
+from config import Config
+from live_counters import LiveCounters
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    monkeypatch.setattr(LiveCounters, '_counters', None)
+    monkeypatch.setattr(LiveCounters, '_subscribers', set())
+    return LiveCounters
+
+
+def test_deltas_reported_during_a_seed_are_replayed_on_its_totals(counters, monkeypatch):
+    def seed():
+        LiveCounters.apply(orders_today=1, pending_orders=1)  # committed after the seed's read view
+        return {'orders_today': 4, 'pending_orders': 2, 'revenue_today': 10.0}
+    monkeypatch.setattr(LiveCounters, '_seed', seed)
+
+    assert LiveCounters.snapshot() == {'orders_today': 5, 'pending_orders': 3, 'revenue_today': 10.0}
+
+    LiveCounters.apply(revenue_today=2.5)
+    assert LiveCounters.snapshot()['revenue_today'] == 12.5
+
+
+def test_streams_beyond_the_limit_are_turned_away(counters, monkeypatch):
+    monkeypatch.setattr(Config, 'LIVE_STREAM_MAX_SUBSCRIBERS', 1)
+    monkeypatch.setattr(LiveCounters, '_seed', lambda: {'orders_today': 1})
+    first = LiveCounters.stream()
+    assert 'event: snapshot' in next(first)
+
+    second = list(LiveCounters.stream())
+
+    assert len(second) == 1 and 'event: error' in second[0]
+    assert LiveCounters.full()
+    first.close()
+    assert not LiveCounters.full()
@@ -0,0 +1,28 @@
+from datetime import datetime
+from decimal import Decimal
+
+import live_counters
+
+
+def test_refund_of_a_paid_order_takes_it_out_of_todays_revenue(client, db, admin_headers, monkeypatch):
+    applied = []
+    monkeypatch.setattr(live_counters.LiveCounters, 'apply', lambda **deltas: applied.append(deltas))
+    db.returns('SELECT * FROM orders WHERE id = %s', [{
+        'id': 7, 'customer_id': 3, 'total_amount': Decimal('499.00'),
+        'payment_status': 'paid', 'created_at': datetime.now()
+    }])
+
+    response = client.post('/admin/api/v1/orders/7/refund', json={'reason': 'damaged'}, headers=admin_headers)
+
+    assert response.status_code == 200, response.get_json()
+    assert db.statements('UPDATE orders SET payment_status')[0][1][0] == 'refunded'
+    assert applied == [{'revenue_today': -499.0}]
+
+
+def test_adding_a_note_keeps_the_order_updated_at(db):
+    from admin.orders import add_order_note
+
+    add_order_note(7, 'Called the customer')
+
+    [(sql, params)] = db.statements('UPDATE orders SET notes_count')
+    assert 'updated_at = updated_at' in sql and params == (7,)
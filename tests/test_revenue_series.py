@@ -0,0 +1,95 @@
+from datetime import date, datetime
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from revenue_series import RevenueSeries, local_day_bounds
+
+NEW_YORK = ZoneInfo('America/New_York')
+KOLKATA = ZoneInfo('Asia/Kolkata')
+
+
+def _epoch(year, month, day, hour, minute, tz):
+    return int(datetime(year, month, day, hour, minute, tzinfo=tz).timestamp())
+
+
+# ======================= GAP FILLING =======================
+
+def test_daily_series_fills_missing_days_with_zeros(db):
+    db.returns('FROM revenue_local_daily_rollup', [
+        {'bucket_date': date(2026, 3, 2), 'order_count': 4, 'paid_order_count': 3, 'revenue': Decimal('120.50')},
+        {'bucket_date': date(2026, 3, 4), 'order_count': 1, 'paid_order_count': 1, 'revenue': Decimal('9.99')}
+    ])
+
+    series = RevenueSeries.series('daily', date(2026, 3, 1), date(2026, 3, 5), KOLKATA)
+
+    assert series['buckets'] == ['2026-03-01', '2026-03-02', '2026-03-03', '2026-03-04', '2026-03-05']
+    assert series['orders'] == [0, 4, 0, 1, 0]
+    assert series['paid_orders'] == [0, 3, 0, 1, 0]
+    assert series['revenue'] == [0, 120.5, 0, 9.99, 0]
+    assert series['timezone'] == 'Asia/Kolkata'
+
+
+def test_weekly_and_monthly_series_label_every_period_in_range(db):
+    db.returns('FROM revenue_local_daily_rollup', [
+        {'bucket_date': date(2026, 3, 31), 'order_count': 2, 'paid_order_count': 2, 'revenue': Decimal('10')},
+        {'bucket_date': date(2026, 4, 1), 'order_count': 1, 'paid_order_count': 0, 'revenue': Decimal('0')}
+    ])
+
+    weekly = RevenueSeries.series('weekly', date(2026, 3, 25), date(2026, 4, 8), KOLKATA)
+    monthly = RevenueSeries.series('monthly', date(2026, 2, 20), date(2026, 4, 2), KOLKATA)
+
+    assert weekly['buckets'] == ['2026-03-23', '2026-03-30', '2026-04-06']
+    assert weekly['orders'] == [0, 3, 0]
+    assert monthly['buckets'] == ['2026-02', '2026-03', '2026-04']
+    assert monthly['orders'] == [0, 2, 1]
+
+
+def test_hourly_series_folds_quarter_hours_into_local_hours(db):
+    db.returns('FROM revenue_quarter_hour_rollup', [
+        {'bucket_start': _epoch(2026, 3, 2, 9, 0, KOLKATA), 'order_count': 1, 'paid_order_count': 1,
+         'revenue': Decimal('10.00')},
+        {'bucket_start': _epoch(2026, 3, 2, 9, 45, KOLKATA), 'order_count': 2, 'paid_order_count': 1,
+         'revenue': Decimal('5.25')}
+    ])
+
+    series = RevenueSeries.series('hourly', date(2026, 3, 2), date(2026, 3, 2), KOLKATA)
+
+    assert len(series['buckets']) == 24
+    assert series['buckets'][9] == '2026-03-02T09:00+05:30'
+    assert series['orders'][9] == 3
+    assert series['revenue'][9] == 15.25
+    assert sum(series['orders']) == 3
+
+
+# ======================= DST =======================
+
+@pytest.mark.parametrize('day, hours', [(date(2026, 3, 8), 23), (date(2026, 11, 1), 25), (date(2026, 6, 1), 24)])
+def test_hourly_series_has_one_bucket_per_local_hour_across_dst(db, day, hours):
+    series = RevenueSeries.series('hourly', day, day, NEW_YORK)
+
+    assert len(series['buckets']) == hours
+    assert len(set(series['buckets'])) == hours
+    assert series['orders'] == [0] * hours
+
+
+def test_fall_back_repeats_the_hour_with_its_offset(db):
+    series = RevenueSeries.series('hourly', date(2026, 11, 1), date(2026, 11, 1), NEW_YORK)
+
+    assert series['buckets'][1:3] == ['2026-11-01T01:00-04:00', '2026-11-01T01:00-05:00']
+
+
+def test_local_day_bounds_span_dst_days():
+    lower, upper = local_day_bounds(date(2026, 3, 8), date(2026, 3, 8), NEW_YORK)
+
+    assert upper - lower == 23 * 3600
+
+
+def test_series_rejects_bad_ranges(db):
+    with pytest.raises(ValueError, match='granularity'):
+        RevenueSeries.series('yearly', date(2026, 1, 1), date(2026, 1, 2), KOLKATA)
+    with pytest.raises(ValueError, match='before'):
+        RevenueSeries.series('daily', date(2026, 1, 2), date(2026, 1, 1), KOLKATA)
+    with pytest.raises(ValueError, match='92 days'):
+        RevenueSeries.series('hourly', date(2026, 1, 1), date(2026, 6, 1), KOLKATA)
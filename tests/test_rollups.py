@@ -0,0 +1,134 @@
+from datetime import date, datetime, timedelta
+
+from config import Config
+from leaderboards import Leaderboards
+from revenue_series import RevenueSeries, STATE_NAME as REVENUE_STATE
+from sales_rollup import SalesRollup, STATE_NAME as SALES_STATE
+
+
+def _writes(db):
+    return [sql for sql, _ in db.queries if sql.lstrip().startswith(('INSERT', 'DELETE', 'UPDATE'))]
+
+
+# ======================= SALES ROLLUP =======================
+
+def test_sales_refresh_is_a_noop_before_backfill(db):
+    db.returns('SELECT high_water_mark FROM rollup_state', [{'high_water_mark': None}])
+
+    assert SalesRollup.refresh() == 0
+    assert _writes(db) == []
+    assert not db.statements('FROM orders')
+
+
+def test_sales_refresh_reads_up_to_a_lagged_mark(db):
+    since, mark = datetime(2026, 3, 1, 9, 0), datetime(2026, 3, 1, 9, 55)
+    db.returns('SELECT high_water_mark FROM rollup_state', [{'high_water_mark': since}])
+    db.returns('AS mark FROM orders', [{'mark': mark}])
+    db.returns('AS sales_date FROM orders', [{'sales_date': date(2026, 2, 28)}])
+
+    assert SalesRollup.refresh() == 1
+
+    mark_sql, mark_params = db.statements('AS mark FROM orders')[0]
+    assert 'LEAST(' in mark_sql and 'NOW() - INTERVAL %s SECOND' in mark_sql
+    assert mark_params == (Config.ROLLUP_SAFETY_LAG,)
+    assert db.statements('AS sales_date FROM orders')[0][1] == (since, mark)
+    # Boards are only marked here; the scheduler rebuilds them
+    assert [params for _, params in db.statements('INTO rollup_state (name, high_water_mark')] == [
+        ('leaderboards', date(2026, 2, 28)), (SALES_STATE, mark)
+    ]
+    assert not db.statements('sales_leaderboards')
+
+
+def test_sales_refresh_without_new_orders_writes_nothing(db):
+    mark = datetime(2026, 3, 1, 9, 0)  # the last order's updated_at, already consumed
+    db.returns('SELECT high_water_mark FROM rollup_state', [{'high_water_mark': mark}])
+    db.returns('AS mark FROM orders', [{'mark': mark}])
+    db.returns('AS sales_date FROM orders', [{'sales_date': date(2026, 3, 1)}])
+
+    assert SalesRollup.refresh() == 0
+    assert _writes(db) == []
+    assert not db.statements('AS sales_date FROM orders')
+
+
+def test_sales_ensure_fresh_never_builds_inline(db, monkeypatch):
+    monkeypatch.setattr(SalesRollup, '_last_refresh', 0.0)
+    db.returns('FROM rollup_state', [])
+
+    SalesRollup.ensure_fresh(max_lag=0)
+
+    assert _writes(db) == []
+
+
+# ======================= REVENUE SERIES =======================
+
+def test_revenue_refresh_is_a_noop_before_backfill(db):
+    db.returns('SELECT high_water_mark FROM rollup_state', [{'high_water_mark': None}])
+
+    assert RevenueSeries.refresh() == 0
+    assert _writes(db) == []
+    assert not db.statements('FROM orders')
+
+
+def test_revenue_refresh_reads_up_to_a_lagged_mark(db):
+    since, mark = datetime(2026, 3, 1, 9, 0), datetime(2026, 3, 1, 9, 55)
+    db.returns('SELECT high_water_mark FROM rollup_state', [{'high_water_mark': since}])
+    db.returns('SELECT name FROM rollup_state', [{'name': 'revenue_series:Asia/Kolkata'}])
+    db.returns('AS mark FROM orders', [{'mark': mark}])
+    db.returns('AS utc_day FROM orders', [{'utc_day': 20513}, {'utc_day': 20514}])
+
+    assert RevenueSeries.refresh() == 2
+
+    assert db.statements('AS mark FROM orders')[0][1] == (Config.ROLLUP_SAFETY_LAG,)
+    assert db.statements('AS utc_day FROM orders')[0][1] == (since, mark)
+    # Consecutive days are rebuilt as one run
+    assert [params for _, params in db.statements('DELETE FROM revenue_quarter_hour_rollup')] == [
+        (20513 * 86400, 20515 * 86400)
+    ]
+    assert db.statements('INTO rollup_state (name, high_water_mark')[0][1] == (REVENUE_STATE, mark)
+
+
+def test_revenue_refresh_without_new_orders_writes_nothing(db):
+    mark = datetime(2026, 3, 1, 9, 0)
+    db.returns('SELECT high_water_mark FROM rollup_state', [{'high_water_mark': mark}])
+    db.returns('SELECT name FROM rollup_state', [{'name': 'revenue_series:Asia/Kolkata'}])
+    db.returns('AS mark FROM orders', [{'mark': mark}])
+    db.returns('AS utc_day FROM orders', [{'utc_day': 20513}])
+
+    assert RevenueSeries.refresh() == 0
+    assert _writes(db) == []
+
+
+def test_revenue_backfill_stores_the_mark_taken_before_rebuilding(db):
+    mark = datetime(2026, 3, 1, 9, 55)
+    db.returns('AS mark FROM orders', [{'mark': mark}])
+    db.returns('AS last FROM orders', [{'first': 40 * 86400, 'last': 100 * 86400 + 5}])
+
+    assert RevenueSeries.backfill() == 61
+
+    assert [params for _, params in db.statements('DELETE FROM revenue_quarter_hour_rollup')] == [
+        (40 * 86400, 71 * 86400), (71 * 86400, 101 * 86400)
+    ]
+    assert db.statements('INTO rollup_state (name, refreshed_at)')[0][1] == ('revenue_series:Asia/Kolkata',)
+    assert db.statements('INTO rollup_state (name, high_water_mark')[0][1] == (REVENUE_STATE, mark)
+
+
+# ======================= LEADERBOARDS =======================
+
+def test_leaderboards_rebuild_only_the_windows_a_changed_day_reaches(db):
+    changed = datetime.combine(date.today() - timedelta(days=20), datetime.min.time())
+    db.returns('SELECT high_water_mark, refreshed_at FROM rollup_state',
+               [{'high_water_mark': changed, 'refreshed_at': datetime.now()}])
+
+    assert Leaderboards.refresh() == (30, 90)
+
+    assert db.statements('DELETE FROM sales_leaderboards')[0][1] == (30, 90)
+    assert len(db.statements('INSERT INTO sales_leaderboards')) == 6
+    assert db.statements('INTO rollup_state (name, refreshed_at)')[0][1] == ('leaderboards', changed)
+
+
+def test_leaderboards_without_changes_are_left_alone_until_the_date_rolls_over(db):
+    db.returns('SELECT high_water_mark, refreshed_at FROM rollup_state',
+               [{'high_water_mark': None, 'refreshed_at': datetime.now()}])
+
+    assert Leaderboards.refresh() == ()
+    assert _writes(db) == []
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask, jsonify
+
+from snapshots import snapshot
+
+
+@pytest.fixture
+def snapshot_client(db):
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/report')
+    @snapshot(name='tests.report', interval=60)
+    def report():
+        calls.append(1)
+        return jsonify({'success': True, 'data': {'orders': 5}})
+
+    return app.test_client(), calls
+
+
+def _stored(db, age_seconds):
+    db.returns('FROM dashboard_snapshots', [{
+        'payload': '{"success": true, "data": {"orders": 3}}',
+        'computed_at': datetime.now() - timedelta(seconds=age_seconds)
+    }])
+
+
+def test_recent_snapshot_is_served(snapshot_client, db):
+    client, calls = snapshot_client
+    _stored(db, 100)  # within 2x the interval
+
+    response = client.get('/report')
+
+    assert response.headers['X-Snapshot'] == 'HIT'
+    assert response.get_json()['data'] == {'orders': 3}
+    assert calls == []
+
+
+def test_stale_snapshot_is_recomputed(snapshot_client, db):
+    client, calls = snapshot_client
+    _stored(db, 121)
+
+    response = client.get('/report')
+
+    assert response.headers['X-Snapshot'] == 'MISS'
+    assert response.get_json()['data'] == {'orders': 5}
+    assert calls == [1]
+    assert db.statements('INSERT INTO dashboard_snapshots')
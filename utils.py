@@ -1,8 +1,15 @@
 import os
+import csv
+import io
+import json
+import base64
 import uuid
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape as xml_escape
 from datetime import datetime
 from PIL import Image
-from flask import request, jsonify
+from flask import request, jsonify, g, current_app, Response, stream_with_context
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 from functools import wraps
 import re
@@ -15,7 +22,7 @@ def admin_required(f):
             current_user = get_jwt_identity()
             if not current_user or current_user.get('role') != 'admin':
                 return jsonify({'error': 'Admin access required'}), 403
-            return f(*args, **kwargs)
+            return current_app.ensure_sync(f)(*args, **kwargs)
         except Exception as e:
             return jsonify({'error': 'Invalid token'}), 401
     return decorated_function
@@ -28,11 +35,19 @@ def customer_required(f):
             current_user = get_jwt_identity()
             if not current_user:
                 return jsonify({'error': 'Authentication required'}), 401
-            return f(*args, **kwargs)
+            return current_app.ensure_sync(f)(*args, **kwargs)
         except Exception as e:
             return jsonify({'error': 'Invalid token'}), 401
     return decorated_function
 
+def use_read_replica(f):
+    """Route the view's read queries to the read replica (if configured)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_read_replica = True
+        return current_app.ensure_sync(f)(*args, **kwargs)
+    return decorated_function
+
 def validate_email(email):
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
@@ -105,6 +120,127 @@ def get_request_data():
     except:
         return {}
 
+def stream_csv_response(rows, fieldnames, filename, flush_size=64 * 1024):
+    """Stream dict rows as a CSV download without building the file in memory"""
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= flush_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+class _ByteSink:
+    """Write-only, unseekable file object collecting bytes until drained"""
+    
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+_XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    )
+}
+
+_XML_ILLEGAL_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def _xlsx_cell(value):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = xml_escape(_XML_ILLEGAL_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+def stream_xlsx_response(rows, fieldnames, filename, sheet_name='Sheet1', flush_size=64 * 1024):
+    """Stream dict rows as a single-sheet XLSX download.
+    
+    The workbook is a zip written to an unseekable sink: the sheet XML is
+    deflated row by row and the compressed bytes are sent whenever
+    flush_size has accumulated, so memory stays flat for any row count.
+    Text is stored as inline strings (no shared-string table to hold).
+    """
+    def generate():
+        sink = _ByteSink()
+        with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, content in _XLSX_STATIC_PARTS.items():
+                archive.writestr(name, content)
+            archive.writestr('xl/workbook.xml', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                f'<sheets><sheet name="{xml_escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+                '</workbook>'
+            ))
+            with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+                sheet.write((
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                    + _xlsx_row(fieldnames)
+                ).encode('utf-8'))
+                for row in rows:
+                    sheet.write(_xlsx_row(row.get(name) for name in fieldnames).encode('utf-8'))
+                    if sink.size >= flush_size:
+                        yield sink.drain()
+                sheet.write(b'</sheetData></worksheet>')
+        yield sink.drain()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 def calculate_discount_price(original_price, discount_percentage):
     """Calculate discounted price"""
     if discount_percentage and 0 < discount_percentage < 100:
@@ -128,16 +264,93 @@ class ResponseFormatter:
         return {'success': False, 'error': message}
     
     @staticmethod
-    def paginated(items, total, page, per_page):
+    def paginated(items, total, page, per_page, next_cursor=None, count=None):
+        """count names the strategy behind total (see page_counts); total is None for 'none'"""
+        pagination = {
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'pages': (total + per_page - 1) // per_page if total is not None else None
+        }
+        if count is not None:
+            pagination['count'] = count
+        if next_cursor is not None:
+            pagination['next_cursor'] = next_cursor
         return {
             'success': True,
             'data': {
                 'items': items,
-                'pagination': {
-                    'total': total,
-                    'page': page,
-                    'per_page': per_page,
-                    'pages': (total + per_page - 1) // per_page
-                }
+                'pagination': pagination
             }
-        }
\ No newline at end of file
+        }
+
+
+class Keyset:
+    """Cursor (seek) pagination for ORDER BY <column> <dir>, <id> <dir> listings.
+
+    The cursor is an opaque token holding the sort column, direction and the
+    last row's (sort value, id). The next page seeks past that key with a
+    WHERE condition instead of OFFSET, so every page costs the same. MySQL
+    sorts NULLs first ascending and last descending; nullable columns are
+    handled accordingly.
+    """
+
+    @staticmethod
+    def encode(sort_by, direction, value, row_id):
+        payload = json.dumps([sort_by, direction, value, row_id], default=str)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode(cursor, sort_by, direction):
+        """(value, id) of a cursor; ValueError if malformed or issued for another sort"""
+        try:
+            key, key_direction, value, row_id = json.loads(
+                base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            )
+        except (ValueError, TypeError):
+            raise ValueError('Invalid cursor')
+        if key != sort_by or key_direction != direction:
+            raise ValueError('Cursor does not match sort_by/sort_order')
+        return value, row_id
+
+    @staticmethod
+    def condition(column, id_column, direction, value, row_id, nullable=False):
+        """(sql, params) selecting the rows after (value, row_id)"""
+        op = '>' if direction == 'ASC' else '<'
+        if value is None:
+            if direction == 'ASC':
+                return f"(({column} IS NULL AND {id_column} > %s) OR {column} IS NOT NULL)", [row_id]
+            return f"({column} IS NULL AND {id_column} < %s)", [row_id]
+        sql = f"({column} {op} %s OR ({column} = %s AND {id_column} {op} %s))"
+        if nullable and direction == 'DESC':
+            sql = f"({sql} OR {column} IS NULL)"
+        return sql, [value, value, row_id]
+
+    @staticmethod
+    def after(cursor, sort_by, direction, column, id_column, nullable=False):
+        """Decode a request cursor straight into its seek condition"""
+        value, row_id = Keyset.decode(cursor, sort_by, direction)
+        return Keyset.condition(column, id_column, direction, value, row_id, nullable)
+
+    @staticmethod
+    def enum_position(column):
+        """ENUMs ORDER BY their definition position, not their label; seek on that number too"""
+        return f"({column}+0)"
+
+    @staticmethod
+    def page(rows, per_page, sort_by, direction, sort_key=None, id_key='id', strip_sort_key=False):
+        """Trim a LIMIT per_page + 1 fetch; returns (rows, next_cursor or None).
+
+        sort_key names the column holding the seek value when it is not
+        sort_by (e.g. a selected ENUM position); strip_sort_key drops that
+        helper column from the returned rows.
+        """
+        sort_key = sort_key or sort_by
+        next_cursor = None
+        if len(rows) > per_page:
+            rows = rows[:per_page]
+            next_cursor = Keyset.encode(sort_by, direction, rows[-1][sort_key], rows[-1][id_key])
+        if strip_sort_key:
+            for row in rows:
+                row.pop(sort_key, None)
+        return rows, next_cursor
\ No newline at end of file